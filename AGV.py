@@ -1,9 +1,17 @@
 from pymodbus.client import ModbusTcpClient
-from pymodbus.payload import BinaryPayloadBuilder, BinaryPayloadDecoder
-from pymodbus.constants import Endian
+from collections import namedtuple
+import struct
 import time
+import weakref
 import threading
-import asyncio
+
+from core.modbus_scheduler import (
+    ModbusTransactionScheduler, ScheduledModbusClient,
+    PRIORITY_MOTION, PRIORITY_TELEMETRY, PRIORITY_AUDIO, PRIORITY_DIAGNOSTIC,
+)
+from utils.polling import AdaptiveInterval, poll_until
+from utils.timer_wheel import TimerWheel
+from utils.tracing import trace_event, trace_span
 
 MODBUS_IP = '192.168.2.112'
 MODBUS_PORT = 502
@@ -12,6 +20,7 @@ MODBUS_PORT = 502
 # 线圈寄存器 (Coil Registers) - 用于控制命令
 COIL_RELOCATE_HOME = 1          # 在Home点重定位 (00002-1)
 COIL_CONFIRM_LOCALIZATION = 2   # 确认定位正确 (00003-1)  
+COIL_CANCEL_NAVIGATION = 5      # 取消导航 (00006-1)
 COIL_ACQUIRE_CONTROL = 9        # 抢占控制权 (00010-1)
 COIL_RELEASE_CONTROL = 10       # 释放控制权 (00011-1)
 
@@ -34,97 +43,245 @@ INPUT_ERROR_CODE = 31          # Error错误码 (00032-1)
 INPUT_CONTROL_OCCUPIED = 42    # 控制权是否被外部抢占 (00043-1)
 INPUT_IS_BLOCKED = 1           # 是否被阻挡 (00002-1)
 INPUT_BLOCK_REASON = 43        # 被阻挡的原因 (00044-1)
+INPUT_WARNING_CODE = 32        # Warning错误码 (00033-1)
+INPUT_BLOCK_ULTRASONIC_ID = 44 # 发生阻挡的超声id (00045-1)
+INPUT_BLOCK_DI_ID = 45         # 发生阻挡的DI id (00046-1)
+INPUT_BLOCK_X = 46             # 阻挡位置X坐标 (00047-1)
+INPUT_BLOCK_Y = 48             # 阻挡位置Y坐标 (00049-1)
+INPUT_VX = 50                  # 机器人VX速度 (00051-1)
+INPUT_VY = 52                  # 机器人VY速度 (00053-1)
+INPUT_W = 54                   # 机器人角速度 (00055-1)
+INPUT_SLOW_REASON = 83         # 减速原因 (00084-1)
+
+# 状态快照批量读取范围 - 一次读取覆盖所有状态函数用到的寄存器
+SNAPSHOT_INPUT_START = 0       # 输入寄存器 00001 起
+SNAPSHOT_INPUT_COUNT = 84      # 到 00084 (减速原因)，单次读取上限为125
+SNAPSHOT_COIL_START = 0        # 线圈 00001 起
+SNAPSHOT_COIL_COUNT = 35       # 到 00035 (DI15)
+
+# 阻挡/减速原因描述 (输入寄存器 00044 / 00084)
+SENSOR_REASON_DESC = {
+    0: "超声传感器", 1: "激光传感器", 2: "防跌落传感器",
+    3: "碰撞传感器", 4: "红外传感器", 5: "锁车开关",
+    6: "动态障碍物", 7: "虚拟激光点", 8: "3D相机",
+    9: "距离传感器", 10: "DI超声"
+}
 
 # 全局连接管理器
-class AGVGlobalConnection:
-    """AGV全局连接管理器 - 单例模式"""
+class AGVConnection:
+    """
+    单台AGV的连接会话 - 独占一个Modbus套接字的事务调度器、被动健康监控和后台遥测轮询
+
+    每台AGV一个实例，多台AGV（见 agv_fleet.AGVFleet）各自持有独立的会话，互不阻塞。
+
+    Args:
+        ip: AGV的IP地址
+        port: Modbus端口
+        name: 会话名称，用于日志和调度器线程名
+        telemetry_interval: 后台遥测轮询间隔(秒)，默认为类属性 telemetry_interval
+    """
     
-    _instance = None
-    _client = None
-    _monitor = None
-    _is_connected = False
+    # 后台遥测轮询间隔(秒)，可在创建连接前修改或通过 set_telemetry_interval 调整
+    telemetry_interval = 0.5
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    # 日志前缀，默认为 [AGV 名称]
+    log_tag = None
     
-    def __init__(self):
-        if not hasattr(self, 'initialized'):
-            self.initialized = True
-            self._setup_connection()
+    # 站点行驶时间模型（agv_travel.StationTravelModel），设置后 move_agv_to_station 记录每次移动的耗时
+    travel_model = None
+    
+    def __init__(self, ip, port=502, name="agv", telemetry_interval=None):
+        self.ip = ip
+        self.port = port
+        self.name = name
+        if telemetry_interval is not None:
+            self.telemetry_interval = telemetry_interval
+        self._raw_client = None
+        self._client = None
+        self._scheduler = None
+        self._monitor = None
+        self._telemetry = None
+        self._is_connected = False
+        self._tag = self.log_tag or f"[AGV {name}]"
+        self._setup_connection()
     
     def _setup_connection(self):
         """设置连接和监控"""
-        print(f"[GLOBAL] 初始化AGV全局连接管理器")
+        print(f"{self._tag} 初始化AGV连接管理器 {self.ip}:{self.port}")
         
-        # 创建客户端
-        self._client = ModbusTcpClient(MODBUS_IP, port=MODBUS_PORT)
+        # 创建客户端，由事务调度器独占套接字，所有调用方经调度器串行访问
+        self._raw_client = ModbusTcpClient(self.ip, port=self.port)
+        self._scheduler = ModbusTransactionScheduler(self._raw_client, name=self.name)
+        self._scheduler.start()
+        self._client = ScheduledModbusClient(self._scheduler, PRIORITY_MOTION)
         
-        # 创建监控器
-        self._monitor = AGVConnectionMonitor(MODBUS_IP, MODBUS_PORT, check_interval=3)
+        # 创建被动健康监控器（基于真实通信，空闲时才在同一套接字上保活）
+        self._monitor = AGVConnectionMonitor(self._scheduler, idle_timeout=2.0)
         self._monitor.add_connection_callback(self._on_connection)
         self._monitor.add_disconnection_callback(self._on_disconnection)
         
+        # 初始连接
+        self._connect()
+        
         # 启动监控
         self._monitor.start_monitoring()
         
-        # 初始连接
-        self._connect()
+        # 启动后台遥测轮询
+        self._telemetry = AGVTelemetryPoller(self._client.with_priority(PRIORITY_TELEMETRY),
+                                             interval=self.telemetry_interval)
+        self._telemetry.start()
     
     def _connect(self):
         """建立连接"""
         try:
             if self._client.connect():
                 self._is_connected = True
-                print(f"[GLOBAL] AGV连接已建立")
+                print(f"{self._tag} AGV连接已建立")
                 return True
             else:
                 self._is_connected = False
-                print(f"[GLOBAL] AGV连接失败")
+                print(f"{self._tag} AGV连接失败")
                 return False
         except Exception as e:
             self._is_connected = False
-            print(f"[GLOBAL] AGV连接异常: {e}")
+            print(f"{self._tag} AGV连接异常: {e}")
             return False
     
     def _on_connection(self):
-        """连接恢复回调"""
-        print("[GLOBAL] AGV连接已恢复")
-        if not self._is_connected:
-            self._connect()
+        """连接恢复回调（重连已由监控器在同一会话上完成）"""
+        print(f"{self._tag} AGV连接已恢复")
+        self._is_connected = True
     
     def _on_disconnection(self):
         """连接断开回调"""
-        print("[GLOBAL] AGV连接已断开")
+        print(f"{self._tag} AGV连接已断开")
         self._is_connected = False
+        invalidate_motion_cache(self._client)  # AGV可能重启，重连后重新下发速度参数
     
-    def get_client(self):
-        """获取客户端（如果连接正常）"""
+    def get_client(self, priority=PRIORITY_MOTION):
+        """
+        获取客户端（如果连接正常）
+        
+        Args:
+            priority: 该客户端提交事务的优先级，默认为运动/控制优先级；
+                      音频与诊断调用应使用 PRIORITY_AUDIO / PRIORITY_DIAGNOSTIC
+            
+        Returns:
+            ScheduledModbusClient: 经事务调度器串行化的客户端，连接不可用时返回None
+        """
         if self._is_connected and self._client:
-            return self._client
+            return self._client.with_priority(priority)
         else:
             # 尝试重连
             if self._connect():
-                return self._client
+                return self._client.with_priority(priority)
             return None
     
+    def get_scheduler(self):
+        """获取Modbus事务调度器"""
+        return self._scheduler
+    
     def is_connected(self):
         """检查连接状态"""
         return self._is_connected
     
+    def get_telemetry(self, max_age=None):
+        """
+        获取后台轮询的最新AGV状态（无网络I/O）
+        
+        Args:
+            max_age: 允许的最大数据年龄(秒)，默认不限制
+            
+        Returns:
+            AGVTelemetry: 最新状态，无可用或数据过旧时返回None
+        """
+        if self._telemetry is None:
+            return None
+        return self._telemetry.get(max_age)
+    
+    def get_telemetry_poller(self):
+        """获取后台遥测轮询器"""
+        return self._telemetry
+    
+    def set_telemetry_interval(self, interval):
+        """调整后台遥测轮询间隔(秒)"""
+        self.telemetry_interval = interval
+        if self._telemetry:
+            self._telemetry.set_interval(interval)
+    
+    def set_travel_model(self, model):
+        """设置站点行驶时间模型（None表示不记录）"""
+        self.travel_model = model
+    
+    def estimate_travel(self, station_id, origin=None):
+        """
+        预计从 origin（默认为遥测缓存中的当前站点）行驶到 station_id 的时间
+        
+        Returns:
+            agv_travel.TravelEstimate: 未设置行驶时间模型时返回None
+        """
+        if self.travel_model is None:
+            return None
+        if origin is None:
+            origin = self.cached_station()
+        return self.travel_model.estimate(origin, station_id)
+    
+    def cached_station(self):
+        """遥测缓存中的当前站点（无网络I/O），数据过旧或不在站点时返回None"""
+        cached = self.get_telemetry(max_age=max(1.0, self.telemetry_interval * 3))
+        if cached is None or not cached.current_station:
+            return None
+        return cached.current_station
+    
     def close(self):
         """关闭连接和监控"""
+        if self._telemetry:
+            self._telemetry.stop()
         if self._monitor:
             self._monitor.stop_monitoring()
         if self._client:
-            self._client.close()
+            try:
+                self._client.close()
+            except Exception as e:
+                print(f"{self._tag} 关闭AGV客户端异常: {e}")
+        if self._scheduler:
+            self._scheduler.stop()
         self._is_connected = False
-        print("[GLOBAL] AGV全局连接已关闭")
+        print(f"{self._tag} AGV连接已关闭")
+
+class AGVGlobalConnection(AGVConnection):
+    """AGV全局连接管理器 - 单例模式，连接 MODBUS_IP:MODBUS_PORT（单台AGV的主程序使用）"""
+    
+    _instance = None
+    log_tag = "[GLOBAL]"
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    def __init__(self):
+        if not hasattr(self, 'initialized'):
+            self.initialized = True
+            super().__init__(MODBUS_IP, MODBUS_PORT, name="agv")
 
 # 创建全局连接管理器实例
 _agv_global_connection = None
 
+def configure_agv_endpoint(ip, port=502):
+    """
+    设置AGV的Modbus地址（如指向本地模拟器 agv_simulator.py），需在首次获取全局连接前调用
+
+    Returns:
+        bool: True-已设置，False-全局连接已创建，设置未生效
+    """
+    global MODBUS_IP, MODBUS_PORT
+    if _agv_global_connection is not None:
+        print(f"[WARNING] AGV全局连接已创建，忽略地址设置 {ip}:{port}")
+        return False
+    MODBUS_IP, MODBUS_PORT = ip, port
+    return True
+
 def get_agv_connection():
     """获取AGV全局连接"""
     global _agv_global_connection
@@ -132,15 +289,75 @@ def get_agv_connection():
         _agv_global_connection = AGVGlobalConnection()
     return _agv_global_connection
 
+# 报警优先级（数值越小越优先，与Modbus事务优先级约定一致）
+ALARM_PRIORITY_CRITICAL = 0    # AGV位置未知、机器人状态错误等需要立即处理的故障
+ALARM_PRIORITY_NORMAL = 10     # 取放料/拍照失败
+ALARM_PRIORITY_LOW = 20        # 提示类报警
+
+ALARM_WHEEL_TICK = 0.1         # 报警时间轮槽位时长(秒)
+ALARM_VERIFY_DELAY = 0.5       # 写入播放指令后确认AGV已接收的延迟(秒)，与 play_audio() 的确认超时相同
+
+AlarmVoice = namedtuple('AlarmVoice', ['priority', 'interval', 'audio_duration', 'logger', 'alarm_ids'])
+AlarmVoice.__doc__ = """
+同一音频编号的报警合并后的播放参数
+
+priority: 其中最高的优先级
+interval: 其中最短的静默间隔(秒)
+audio_duration: 其中最长的音频时长(秒)
+logger: 第一个提供了日志记录器的报警的记录器
+alarm_ids: 合并的报警ID
+"""
+
+
+def _alarm_log(logger, msg, level="info"):
+    if logger:
+        getattr(logger, level)(msg)
+    else:
+        print(f"[ALARM] {msg}")
+
+
+class _Alarm:
+    """已登记的连续报警"""
+    __slots__ = ("alarm_id", "audio_id", "priority", "interval", "audio_duration", "logger", "paused")
+
+    def __init__(self, alarm_id, audio_id, priority, interval, audio_duration, logger):
+        self.alarm_id = alarm_id
+        self.audio_id = audio_id
+        self.priority = priority
+        self.interval = interval
+        self.audio_duration = audio_duration
+        self.logger = logger
+        self.paused = False
+
+
 class AudioAlarmManager:
-    """AGV音频报警管理器 - 支持连续音频播放直至用户确认"""
-    
-    def __init__(self):
-        self.alarm_threads = {}  # {alarm_id: thread}
-        self.alarm_events = {}   # {alarm_id: stop_event}
-        self.is_running = {}     # {alarm_id: is_running}
-        
-    def start_continuous_alarm(self, audio_id, alarm_id=None, interval=5.0, audio_duration=3.0, logger=None):
+    """
+    AGV音频报警管理器 - 支持连续音频播放直至用户确认
+
+    所有报警由一个调度线程和时间轮驱动（不再为每个报警创建线程）：
+    - 映射到同一音频编号的报警合并为一路播放（AlarmVoice），不会重复写入同一段音频
+    - AGV同一时刻只能播放一段音频：每个播放时段只播放已到期报警中优先级最高的一路，
+      其余顺延到当前音频结束后
+    - 播放指令以 PRIORITY_AUDIO 异步提交到Modbus事务调度器，同一时刻最多一个音频事务在途；
+      确认读取由时间轮延迟触发，不在调度线程或事务中等待，报警数量不影响运动命令的排队时间
+    - pause()/resume() 暂停和恢复全部或单个报警，暂停期间报警保持登记
+    调度线程在第一个报警启动时创建，所有报警停止后退出。
+    """
+
+    def __init__(self, tick=ALARM_WHEEL_TICK):
+        self._alarms = {}                       # {alarm_id: _Alarm}
+        self._wheel = TimerWheel(tick=tick)     # 键: 音频编号（下一次播放）或 ("verify", 音频编号)
+        self._pending = {}                      # 已到期、等待扬声器空闲的音频编号（按到期先后）
+        self._busy_until = 0.0                  # 当前音频预计播放结束时间
+        self._inflight = None                   # 在途的音频事务 (音频编号, 阶段, Future, 日志记录器)
+        self._paused = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.play_count = 0
+
+    def start_continuous_alarm(self, audio_id, alarm_id=None, interval=5.0, audio_duration=3.0, logger=None,
+                               priority=ALARM_PRIORITY_NORMAL):
         """
         开始连续音频报警
         
@@ -150,63 +367,37 @@ class AudioAlarmManager:
             interval: 两次播放之间的静默间隔时间（秒），默认5秒
             audio_duration: 预估音频播放时长（秒），默认3秒
             logger: 日志记录器
+            priority: 报警优先级（ALARM_PRIORITY_*，数值越小越优先），默认 ALARM_PRIORITY_NORMAL
             
         Returns:
-            str: 报警ID，用于停止报警
+            str: 报警ID，用于停止报警；音频编号无效时返回None
         """
         if alarm_id is None:
             alarm_id = f"alarm_{audio_id}"
-            
-        def log(msg, level="info"):
-            if logger:
-                getattr(logger, level)(msg)
-            else:
-                print(f"[ALARM] {msg}")
+        if not isinstance(audio_id, int) or audio_id < 1:
+            _alarm_log(logger, f"无效的音频ID: {audio_id}，音频ID必须是大于0的整数", "error")
+            return None
         
         # 如果已有相同的报警在运行，先停止
-        if alarm_id in self.is_running and self.is_running[alarm_id]:
-            log(f"停止已存在的报警: {alarm_id}", "warning")
+        if self.is_alarm_running(alarm_id):
+            _alarm_log(logger, f"停止已存在的报警: {alarm_id}", "warning")
             self.stop_alarm(alarm_id)
         
-        # 创建停止事件
-        stop_event = threading.Event()
-        self.alarm_events[alarm_id] = stop_event
-        self.is_running[alarm_id] = True
+        with self._lock:
+            shared = [alarm.alarm_id for alarm in self._alarms.values() if alarm.audio_id == audio_id]
+            self._alarms[alarm_id] = _Alarm(alarm_id, audio_id, priority, interval, audio_duration, logger)
+            if audio_id not in self._wheel and audio_id not in self._pending:
+                self._wheel.schedule(audio_id, 0)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audio-alarm", daemon=True)
+                self._thread.start()
+        self._wake.set()
         
-        def alarm_loop():
-            """报警循环线程"""
-            log(f"开始连续音频报警: {alarm_id}, 音频ID: {audio_id}, 音频时长: {audio_duration}s, 静默间隔: {interval}s")
-            
-            while not stop_event.is_set():
-                try:
-                    # 使用全局连接播放音频
-                    log(f"播放音频 {audio_id}...")
-                    success = simple_play_audio(audio_id, logger)
-                    if not success:
-                        log(f"音频播放失败: {audio_id}", "warning")
-                    
-                    # 等待音频播放完成
-                    if stop_event.wait(timeout=audio_duration):
-                        break  # 收到停止信号
-                    
-                    # 音频播放完成后，等待静默间隔
-                    log(f"音频播放完成，等待 {interval}s 后播放下一次...")
-                    if stop_event.wait(timeout=interval):
-                        break  # 收到停止信号
-                        
-                except Exception as e:
-                    log(f"报警循环异常: {e}", "error")
-                    time.sleep(1)  # 异常时短暂等待
-            
-            log(f"连续音频报警已停止: {alarm_id}")
-            self.is_running[alarm_id] = False
-        
-        # 启动报警线程
-        alarm_thread = threading.Thread(target=alarm_loop, daemon=True)
-        alarm_thread.start()
-        
-        self.alarm_threads[alarm_id] = alarm_thread
-        log(f"✅ 连续音频报警已启动: {alarm_id}")
+        trace_event("alarm:start", category="alarm", alarm_id=alarm_id, audio_id=audio_id, priority=priority)
+        if shared:
+            _alarm_log(logger, f"报警 {alarm_id} 与 {', '.join(shared)} 共用音频 {audio_id}，合并播放")
+        _alarm_log(logger, f"✅ 连续音频报警已启动: {alarm_id}, 音频ID: {audio_id}, 优先级: {priority}, "
+                           f"音频时长: {audio_duration}s, 静默间隔: {interval}s")
         
         return alarm_id
     
@@ -220,34 +411,24 @@ class AudioAlarmManager:
         Returns:
             bool: 是否成功停止
         """
-        if alarm_id not in self.alarm_events:
-            print(f"[ALARM] 未找到报警: {alarm_id}")
-            return False
+        with self._lock:
+            alarm = self._alarms.pop(alarm_id, None)
+            if alarm is None:
+                print(f"[ALARM] 未找到报警: {alarm_id}")
+                return False
+            # 共用该音频的报警都已停止时取消播放
+            if not any(other.audio_id == alarm.audio_id for other in self._alarms.values()):
+                self._wheel.cancel(alarm.audio_id)
+                self._pending.pop(alarm.audio_id, None)
+        self._wake.set()
         
-        try:
-            # 发送停止信号
-            self.alarm_events[alarm_id].set()
-            
-            # 等待线程结束
-            if alarm_id in self.alarm_threads:
-                self.alarm_threads[alarm_id].join(timeout=2)
-                del self.alarm_threads[alarm_id]
-            
-            # 清理事件和状态
-            del self.alarm_events[alarm_id]
-            if alarm_id in self.is_running:
-                del self.is_running[alarm_id]
-            
-            print(f"[ALARM] ✅ 已停止连续报警: {alarm_id}")
-            return True
-            
-        except Exception as e:
-            print(f"[ALARM] 停止报警异常: {e}")
-            return False
+        trace_event("alarm:stop", category="alarm", alarm_id=alarm_id)
+        print(f"[ALARM] ✅ 已停止连续报警: {alarm_id}")
+        return True
     
     def stop_all_alarms(self):
         """停止所有连续报警"""
-        alarm_ids = list(self.alarm_events.keys())
+        alarm_ids = list(self._alarms.keys())
         stopped_count = 0
         
         for alarm_id in alarm_ids:
@@ -257,17 +438,185 @@ class AudioAlarmManager:
         print(f"[ALARM] 已停止 {stopped_count} 个连续报警")
         return stopped_count
     
+    def pause(self, alarm_id=None):
+        """
+        暂停报警播放（报警保持登记，resume() 后继续）
+        
+        Args:
+            alarm_id: 报警标识符，默认暂停全部报警
+            
+        Returns:
+            bool: 是否成功暂停
+        """
+        with self._lock:
+            if alarm_id is None:
+                self._paused = True
+            elif alarm_id in self._alarms:
+                self._alarms[alarm_id].paused = True
+            else:
+                print(f"[ALARM] 未找到报警: {alarm_id}")
+                return False
+        print(f"[ALARM] 已暂停{'全部报警' if alarm_id is None else '报警: ' + alarm_id}")
+        return True
+    
+    def resume(self, alarm_id=None):
+        """
+        恢复报警播放，到期的报警立即进入下一个播放时段
+        
+        Args:
+            alarm_id: 报警标识符，默认恢复全部报警（单独暂停的报警保持暂停）
+            
+        Returns:
+            bool: 是否成功恢复
+        """
+        with self._lock:
+            if alarm_id is None:
+                self._paused = False
+            elif alarm_id in self._alarms:
+                alarm = self._alarms[alarm_id]
+                alarm.paused = False
+                if alarm.audio_id not in self._wheel and alarm.audio_id not in self._pending:
+                    self._wheel.schedule(alarm.audio_id, 0)
+            else:
+                print(f"[ALARM] 未找到报警: {alarm_id}")
+                return False
+        self._wake.set()
+        print(f"[ALARM] 已恢复{'全部报警' if alarm_id is None else '报警: ' + alarm_id}")
+        return True
+    
+    def is_paused(self, alarm_id=None):
+        """检查全部报警（默认）或指定报警是否已暂停"""
+        if alarm_id is None:
+            return self._paused
+        alarm = self._alarms.get(alarm_id)
+        return alarm is not None and alarm.paused
+    
     def get_active_alarms(self):
-        """获取当前活跃的报警列表"""
-        active_alarms = []
-        for alarm_id, is_running in self.is_running.items():
-            if is_running:
-                active_alarms.append(alarm_id)
-        return active_alarms
+        """获取当前活跃的报警列表（包括暂停的报警）"""
+        return list(self._alarms.keys())
     
     def is_alarm_running(self, alarm_id):
         """检查指定报警是否正在运行"""
-        return self.is_running.get(alarm_id, False)
+        return alarm_id in self._alarms
+    
+    def _voice(self, audio_id):
+        """合并同一音频编号的未暂停报警，全部暂停时返回None"""
+        alarms = [alarm for alarm in self._alarms.values() if alarm.audio_id == audio_id and not alarm.paused]
+        if not alarms:
+            return None
+        return AlarmVoice(
+            priority=min(alarm.priority for alarm in alarms),
+            interval=min(alarm.interval for alarm in alarms),
+            audio_duration=max(alarm.audio_duration for alarm in alarms),
+            logger=next((alarm.logger for alarm in alarms if alarm.logger), None),
+            alarm_ids=[alarm.alarm_id for alarm in alarms],
+        )
+    
+    def _audio_client(self):
+        """音频优先级的客户端，AGV未连接时返回None（不在调度线程中等待重连）"""
+        connection = get_agv_connection()
+        if not connection.is_connected():
+            return None
+        return connection.get_client(PRIORITY_AUDIO)
+    
+    def _submit(self, audio_id, stage, logger, method, **kwargs):
+        """异步提交音频事务，完成时唤醒调度线程"""
+        client = self._audio_client()
+        if client is None:
+            _alarm_log(logger, f"AGV连接不可用，跳过本次音频 {audio_id}", "warning")
+            self._inflight = None
+            return
+        future = client.call(method, **kwargs)
+        self._inflight = (audio_id, stage, future, logger)
+        future.add_done_callback(lambda _: self._wake.set())
+    
+    def _play_next(self, now):
+        """在空闲的播放时段中播放已到期报警里优先级最高的一路，其余继续等待"""
+        voices = {}
+        for order, audio_id in enumerate(list(self._pending)):
+            voice = self._voice(audio_id)
+            if voice is None:
+                del self._pending[audio_id]  # 全部暂停，恢复时重新排入
+            else:
+                voices[audio_id] = (voice.priority, order, voice)
+        if not voices:
+            return
+        audio_id = min(voices, key=lambda key: voices[key][:2])
+        voice = voices[audio_id][2]
+        del self._pending[audio_id]
+        
+        self.play_count += 1
+        _alarm_log(voice.logger, f"播放报警音频 {audio_id}（{', '.join(voice.alarm_ids)}），"
+                                 f"{voice.audio_duration + voice.interval:.1f}s 后再次播放")
+        self._submit(audio_id, "write", voice.logger, "write_register", address=ADDR_PLAY_AUDIO, value=audio_id)
+        self._busy_until = now + voice.audio_duration
+        self._wheel.schedule(audio_id, voice.audio_duration + voice.interval, now)
+    
+    def _check_inflight(self, now):
+        """处理已完成的音频事务：写入成功后延迟确认，确认完成后释放扬声器通道"""
+        if self._inflight is None:
+            return
+        audio_id, stage, future, logger = self._inflight
+        if future is None or not future.done():
+            return
+        try:
+            response = future.result()
+            error = response if response.isError() else None
+        except Exception as e:
+            response, error = None, e
+        if stage == "write":
+            if error is not None:
+                _alarm_log(logger, f"音频播放失败: {audio_id}: {error}", "warning")
+                self._inflight = None
+                return
+            # 与 play_audio() 相同，等待一段时间后确认寄存器已被AGV清零
+            self._inflight = (audio_id, "wait", None, logger)
+            self._wheel.schedule(("verify", audio_id), ALARM_VERIFY_DELAY, now)
+            return
+        if error is not None:
+            _alarm_log(logger, f"无法验证音频播放状态: {error}", "warning")
+        elif response.registers[0] != 0:
+            _alarm_log(logger, f"⚠️ 音频播放指令可能未被处理，当前值: {response.registers[0]}", "warning")
+        self._inflight = None
+    
+    def _next_timeout(self, now):
+        """调度线程下一次醒来前的等待时间，无事可做时返回None（等待唤醒）"""
+        deadlines = []
+        next_deadline = self._wheel.next_deadline()
+        if next_deadline is not None:
+            deadlines.append(next_deadline)
+        if self._pending and not self._paused and self._inflight is None:
+            deadlines.append(self._busy_until)
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - now)
+    
+    def _run(self):
+        """报警调度线程：推进时间轮，按优先级占用播放时段"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                try:
+                    for key in self._wheel.advance(now):
+                        if isinstance(key, tuple):
+                            logger = self._inflight[3] if self._inflight else None
+                            self._submit(key[1], "verify", logger, "read_holding_registers",
+                                         address=ADDR_PLAY_AUDIO, count=1)
+                        else:
+                            self._pending.setdefault(key, now)
+                    self._check_inflight(now)
+                    if self._pending and not self._paused and self._inflight is None and now >= self._busy_until:
+                        self._play_next(now)
+                except Exception as e:
+                    print(f"[ALARM] 报警调度异常: {e}")
+                    self._inflight = None
+                if not self._alarms and self._inflight is None:
+                    self._pending.clear()
+                    self._thread = None
+                    return
+                timeout = self._next_timeout(now)
+            self._wake.wait(timeout)
+            self._wake.clear()
 
 # 创建全局音频报警管理器实例
 _audio_alarm_manager = None
@@ -280,17 +629,28 @@ def get_audio_alarm_manager():
     return _audio_alarm_manager
 
 class AGVConnectionMonitor:
-    """AGV异步连接监控器"""
+    """
+    AGV被动连接健康监控器
+
+    不再每隔几秒新建TCP连接探测，而是根据事务调度器上真实请求的成功/失败时间判断连接状态：
+    - 会话空闲超过 idle_timeout 时，才在同一套接字上发送一次保活读取
+    - 真实请求失败时立即唤醒并开始重连，不等待下一个探测周期
+    """
     
-    def __init__(self, ip, port, check_interval=5):
-        self.ip = ip
-        self.port = port
-        self.check_interval = check_interval
+    def __init__(self, scheduler, idle_timeout=2.0, reconnect_interval=0.5, max_reconnect_interval=5.0):
+        self.scheduler = scheduler
+        self.idle_timeout = idle_timeout
+        self.reconnect_interval = reconnect_interval
+        self.max_reconnect_interval = max_reconnect_interval
         self.is_connected = False
         self.monitoring = False
         self.monitor_thread = None
+        self.keepalive_count = 0
+        self.reconnect_count = 0
         self.connection_callbacks = []
         self.disconnection_callbacks = []
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
         
     def add_connection_callback(self, callback):
         """添加连接回调函数"""
@@ -300,59 +660,107 @@ class AGVConnectionMonitor:
         """添加断连回调函数"""
         self.disconnection_callbacks.append(callback)
         
-    def _test_connection(self):
-        """测试连接是否正常"""
+    def _on_transaction(self, ok, error):
+        """事务结果监听：失败时立即唤醒监控线程"""
+        if not ok:
+            self._wake_event.set()
+            
+    def _session_healthy(self):
+        """根据最近一次成功/失败事务时间判断会话是否正常"""
+        return self.scheduler.last_success_time > self.scheduler.last_failure_time
+            
+    def _send_keepalive(self):
+        """会话空闲时在同一套接字上发送一次保活读取"""
+        self.keepalive_count += 1
         try:
-            test_client = ModbusTcpClient(self.ip, port=self.port)
-            if test_client.connect():
-                # 尝试读取一个简单的寄存器来验证通信
-                result = test_client.read_input_registers(address=INPUT_LOCALIZATION_STATE, count=1)
-                test_client.close()
-                return not result.isError()
-            return False
+            self.scheduler.call(
+                "read_input_registers", address=INPUT_LOCALIZATION_STATE, count=1,
+                priority=PRIORITY_DIAGNOSTIC,
+            ).result(timeout=self.idle_timeout + 5)
         except Exception:
-            return False
+            pass  # 失败已由事务监听器记录
+            
+    def _reconnect(self):
+        """关闭并重新建立同一客户端的连接，再以一次读取验证通信"""
+        self.reconnect_count += 1
+        try:
+            connected = self.scheduler.submit(
+                lambda client: (client.close(), client.connect())[1],
+                priority=PRIORITY_MOTION, track=False, name="reconnect",
+            ).result(timeout=10)
+            if connected:
+                self._send_keepalive()
+        except Exception:
+            pass
+            
+    def _set_status(self, current_status):
+        """检测状态变化并执行回调"""
+        if current_status == self.is_connected:
+            return
+        self.is_connected = current_status
+        if current_status:
+            # 从断连变为连接
+            print("✅ [MONITOR] AGV连接恢复")
+            for callback in self.connection_callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"[ERROR] 连接回调执行失败: {e}")
+        else:
+            # 从连接变为断连
+            print("❌ [MONITOR] AGV连接断开")
+            for callback in self.disconnection_callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"[ERROR] 断连回调执行失败: {e}")
             
     def _monitor_loop(self):
         """监控循环"""
-        print(f"[MONITOR] 开始监控AGV连接 {self.ip}:{self.port}")
+        print(f"[MONITOR] 开始被动监控AGV连接（空闲 {self.idle_timeout}s 后保活）")
+        backoff = self.reconnect_interval
         
         while self.monitoring:
-            current_status = self._test_connection()
-            
-            # 检测状态变化
-            if current_status != self.is_connected:
-                if current_status:
-                    # 从断连变为连接
-                    print(f"✅ [MONITOR] AGV连接恢复 {self.ip}:{self.port}")
-                    for callback in self.connection_callbacks:
-                        try:
-                            callback()
-                        except Exception as e:
-                            print(f"[ERROR] 连接回调执行失败: {e}")
-                else:
-                    # 从连接变为断连
-                    print(f"❌ [MONITOR] AGV连接断开 {self.ip}:{self.port}")
-                    for callback in self.disconnection_callbacks:
-                        try:
-                            callback()
-                        except Exception as e:
-                            print(f"[ERROR] 断连回调执行失败: {e}")
-                            
-                self.is_connected = current_status
-            
-            time.sleep(self.check_interval)
+            if self.scheduler.last_success_time == 0.0 and self.scheduler.last_failure_time == 0.0:
+                # 尚无任何真实通信，主动验证一次
+                self._send_keepalive()
+            
+            healthy = self._session_healthy()
+            self._set_status(healthy)
+            
+            if healthy:
+                backoff = self.reconnect_interval
+                idle = self.scheduler.idle_time()
+                if idle >= self.idle_timeout:
+                    self._send_keepalive()
+                    continue
+                # 等到会话空闲超时，或被真实请求失败提前唤醒
+                self._wake_event.wait(self.idle_timeout - idle)
+                self._wake_event.clear()
+            else:
+                # 真实请求失败：立即重连，失败后按指数退避等待，不被后续失败提前唤醒
+                self._reconnect()
+                if self._session_healthy():
+                    continue
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, self.max_reconnect_interval)
+                self._wake_event.clear()
             
     def start_monitoring(self):
         """开始监控"""
         if not self.monitoring:
             self.monitoring = True
+            self._stop_event.clear()
+            self.scheduler.add_listener(self._on_transaction)
             self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
             self.monitor_thread.start()
             
     def stop_monitoring(self):
         """停止监控"""
         self.monitoring = False
+        self.scheduler.remove_listener(self._on_transaction)
+        self._stop_event.set()
+        self._wake_event.set()
         if self.monitor_thread:
             self.monitor_thread.join(timeout=1)
             
@@ -360,68 +768,358 @@ class AGVConnectionMonitor:
         """获取当前连接状态"""
         return self.is_connected
 
-def check_agv_status(client):
-    """检查AGV当前状态，返回状态信息"""
+def _decode_float32(high, low):
+    """将两个输入寄存器解析为float32 (高字在前，与AGV读数顺序一致)"""
+    return struct.unpack('>f', struct.pack('>HH', high, low))[0]
+
+class AGVSnapshot:
+    """
+    AGV状态快照 - 一次批量读取后解析得到的只读状态对象
+
+    输入寄存器字段 (int/float):
+        robot_x, robot_y, robot_angle: 机器人位姿 (m, m, rad)
+        localization_state: 定位状态 (0失败/1正确/2重定位中/3完成)
+        navigation_state: 导航状态 (0-7)
+        fatal_code, error_code, warning_code: 错误码
+        current_station: 当前所在站点 (0表示不在站点)
+        control_occupied: 控制权是否被外部抢占
+        is_blocked, block_reason: 阻挡状态与原因
+        block_ultrasonic_id, block_di_id: 阻挡传感器id
+        block_x, block_y: 阻挡位置 (m)
+        vx, vy, w: 实时速度 (m/s, m/s, rad/s)
+        slow_reason: 减速原因
+
+    线圈字段 (bool，未读取线圈时为None):
+        is_slowing, charging, emergency_stop, brake, fork_in_place, auto_mode,
+        has_fatal, has_error, has_warning, lift_enabled, is_loaded, is_static
+        di_states: DI0-DI15 电平元组
+    """
+
+    __slots__ = (
+        'timestamp', 'input_registers', 'coils',
+        'robot_x', 'robot_y', 'robot_angle',
+        'localization_state', 'navigation_state',
+        'fatal_code', 'error_code', 'warning_code',
+        'current_station', 'control_occupied',
+        'is_blocked', 'block_reason', 'block_ultrasonic_id', 'block_di_id',
+        'block_x', 'block_y', 'vx', 'vy', 'w', 'slow_reason',
+        'is_slowing', 'charging', 'emergency_stop', 'brake', 'fork_in_place',
+        'auto_mode', 'has_fatal', 'has_error', 'has_warning', 'lift_enabled',
+        'is_loaded', 'is_static', 'di_states',
+    )
+
+    def __init__(self, input_registers, coils=None, timestamp=None):
+        regs = tuple(input_registers)
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.input_registers = regs
+        self.coils = tuple(bool(bit) for bit in coils[:SNAPSHOT_COIL_COUNT]) if coils is not None else None
+
+        # 输入寄存器解析
+        self.robot_x = _decode_float32(regs[INPUT_ROBOT_X], regs[INPUT_ROBOT_X + 1])
+        self.robot_y = _decode_float32(regs[INPUT_ROBOT_Y], regs[INPUT_ROBOT_Y + 1])
+        self.robot_angle = _decode_float32(regs[INPUT_ROBOT_ANGLE], regs[INPUT_ROBOT_ANGLE + 1])
+        self.localization_state = regs[INPUT_LOCALIZATION_STATE]
+        self.navigation_state = regs[INPUT_NAVIGATION_STATE]
+        self.fatal_code = regs[INPUT_FATAL_ERROR]
+        self.error_code = regs[INPUT_ERROR_CODE]
+        self.warning_code = regs[INPUT_WARNING_CODE]
+        self.current_station = regs[INPUT_CURRENT_STATION]
+        self.control_occupied = regs[INPUT_CONTROL_OCCUPIED]
+        self.is_blocked = regs[INPUT_IS_BLOCKED]
+        self.block_reason = regs[INPUT_BLOCK_REASON]
+        self.block_ultrasonic_id = regs[INPUT_BLOCK_ULTRASONIC_ID]
+        self.block_di_id = regs[INPUT_BLOCK_DI_ID]
+        self.block_x = _decode_float32(regs[INPUT_BLOCK_X], regs[INPUT_BLOCK_X + 1])
+        self.block_y = _decode_float32(regs[INPUT_BLOCK_Y], regs[INPUT_BLOCK_Y + 1])
+        self.vx = _decode_float32(regs[INPUT_VX], regs[INPUT_VX + 1])
+        self.vy = _decode_float32(regs[INPUT_VY], regs[INPUT_VY + 1])
+        self.w = _decode_float32(regs[INPUT_W], regs[INPUT_W + 1])
+        self.slow_reason = regs[INPUT_SLOW_REASON]
+
+        # 线圈解析
+        bits = self.coils
+        if bits is None:
+            self.is_slowing = self.charging = self.emergency_stop = None
+            self.brake = self.fork_in_place = self.auto_mode = None
+            self.has_fatal = self.has_error = self.has_warning = None
+            self.lift_enabled = self.is_loaded = self.is_static = None
+            self.di_states = None
+        else:
+            self.is_slowing = bits[0]
+            self.charging, self.emergency_stop, self.brake = bits[2], bits[3], bits[4]
+            self.fork_in_place, self.auto_mode = bits[5], bits[6]
+            self.has_fatal, self.has_error, self.has_warning = bits[7], bits[8], bits[9]
+            self.lift_enabled = bits[10]
+            self.is_loaded, self.is_static = bits[16], bits[18]
+            self.di_states = bits[19:35]
+
+    @property
+    def age(self):
+        """快照距今的时间(秒)"""
+        return time.time() - self.timestamp
+
+    def __repr__(self):
+        return (f"AGVSnapshot(station={self.current_station}, nav={self.navigation_state}, "
+                f"loc={self.localization_state}, blocked={self.is_blocked}, age={self.age:.2f}s)")
+
+def _fetch_snapshot(client, include_coils=False):
+    """批量读取寄存器并构造快照，输入寄存器读取失败时抛出异常"""
+    res = client.read_input_registers(address=SNAPSHOT_INPUT_START, count=SNAPSHOT_INPUT_COUNT)
+    if res.isError() or len(res.registers) < SNAPSHOT_INPUT_COUNT:
+        raise Exception(f"批量读取输入寄存器失败: {res}")
+
+    coils = None
+    if include_coils:
+        coil_res = client.read_coils(address=SNAPSHOT_COIL_START, count=SNAPSHOT_COIL_COUNT)
+        if not coil_res.isError():
+            coils = coil_res.bits
+        else:
+            print(f"[ERROR] 批量读取线圈失败: {coil_res}")
+
+    return AGVSnapshot(res.registers, coils)
+
+def read_agv_snapshot(client, include_coils=False):
+    """
+    批量读取AGV状态并解析为快照
+
+    Args:
+        client: Modbus客户端
+        include_coils: 是否同时读取线圈状态（传感器诊断需要），默认False
+
+    Returns:
+        AGVSnapshot: 状态快照，读取失败返回None
+    """
+    try:
+        return _fetch_snapshot(client, include_coils)
+    except Exception as e:
+        print(f"[ERROR] 读取AGV状态快照失败: {e}")
+        return None
+
+class AGVTelemetry(namedtuple('AGVTelemetry', [
+        'timestamp', 'navigation_state', 'current_station', 'localization_state',
+        'control_occupied', 'is_blocked', 'block_reason',
+        'robot_x', 'robot_y', 'robot_angle', 'fatal_code', 'error_code', 'snapshot'])):
+    """
+    AGV遥测状态 - 后台轮询器发布的不可变缓存状态
+
+    读取方无需任何网络I/O，通过 age 判断数据新鲜度。
+    snapshot 字段为生成该状态的原始快照，可直接传给 check_block_status 等函数。
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """由状态快照构造遥测状态"""
+        return cls(
+            timestamp=snapshot.timestamp,
+            navigation_state=snapshot.navigation_state,
+            current_station=snapshot.current_station,
+            localization_state=snapshot.localization_state,
+            control_occupied=snapshot.control_occupied,
+            is_blocked=snapshot.is_blocked,
+            block_reason=snapshot.block_reason,
+            robot_x=snapshot.robot_x,
+            robot_y=snapshot.robot_y,
+            robot_angle=snapshot.robot_angle,
+            fatal_code=snapshot.fatal_code,
+            error_code=snapshot.error_code,
+            snapshot=snapshot,
+        )
+
+    @property
+    def age(self):
+        """状态距今的时间(秒)"""
+        return time.time() - self.timestamp
+
+class AGVTelemetryPoller:
+    """AGV后台遥测轮询器 - 按固定频率刷新状态快照并发布为缓存状态"""
+
+    def __init__(self, client, interval=0.5):
+        self.client = client
+        self.interval = interval
+        self.poll_count = 0
+        self.error_count = 0
+        self._latest = None
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._healthy = None
+
+    def start(self):
+        """启动后台轮询"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台轮询"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=max(1.0, self.interval * 2))
+            self._thread = None
+
+    def is_running(self):
+        """轮询线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def set_interval(self, interval):
+        """调整轮询间隔(秒)"""
+        self.interval = max(0.05, float(interval))
+
+    def _poll_once(self):
+        """执行一次轮询，返回新的遥测状态"""
+        return AGVTelemetry.from_snapshot(_fetch_snapshot(self.client))
+
+    def _poll_loop(self):
+        """轮询循环"""
+        print(f"[TELEMETRY] 开始AGV遥测轮询，间隔 {self.interval}s")
+
+        while not self._stop_event.is_set():
+            try:
+                telemetry = self._poll_once()
+                with self._condition:
+                    self._latest = telemetry
+                    self.poll_count += 1
+                    self._condition.notify_all()
+                if self._healthy is not True:
+                    print(f"[TELEMETRY] 遥测数据正常 - 站点: {telemetry.current_station}, 导航状态: {telemetry.navigation_state}")
+                    self._healthy = True
+            except Exception as e:
+                self.error_count += 1
+                if self._healthy is not False:
+                    print(f"[TELEMETRY] 遥测轮询失败: {e}")
+                    self._healthy = False
+
+            self._stop_event.wait(self.interval)
+
+        print("[TELEMETRY] AGV遥测轮询已停止")
+
+    def get(self, max_age=None):
+        """
+        获取最新遥测状态（无网络I/O）
+
+        Args:
+            max_age: 允许的最大数据年龄(秒)，超过时返回None；默认不限制
+
+        Returns:
+            AGVTelemetry: 最新状态，无可用数据时返回None
+        """
+        telemetry = self._latest
+        if telemetry is None:
+            return None
+        if max_age is not None and telemetry.age > max_age:
+            return None
+        return telemetry
+
+    def wait_for_update(self, after_timestamp=0.0, timeout=None):
+        """
+        等待一条比 after_timestamp 更新的遥测状态
+
+        Returns:
+            AGVTelemetry: 新状态，超时返回None
+        """
+        with self._condition:
+            updated = self._condition.wait_for(
+                lambda: self._latest is not None and self._latest.timestamp > after_timestamp,
+                timeout=timeout,
+            )
+            return self._latest if updated else None
+
+def check_agv_status(client, snapshot=None):
+    """
+    检查AGV当前状态，返回状态信息
+
+    Args:
+        client: Modbus客户端
+        snapshot: 已有的状态快照（可选），未提供时批量读取一次
+    """
     print("[INFO] 检查AGV当前状态...")
     status = {}
     
     try:
-        # 读取定位状态
-        res = client.read_input_registers(address=INPUT_LOCALIZATION_STATE, count=1)
-        if not res.isError():
-            loc_state = res.registers[0]
-            status['localization'] = loc_state
-            loc_desc = {0: "定位失败", 1: "定位正确", 2: "正在重定位", 3: "定位完成"}.get(loc_state, "未知")
-            print(f"[INFO] 定位状态: {loc_state} ({loc_desc})")
-            if loc_state == 0:
-                print("[WARNING] AGV定位失败，无法抢占控制权")
-        else:
-            print(f"[ERROR] 读取定位状态失败: {res}")
-            status['localization'] = -1
-            
-        # 读取控制权状态
-        res = client.read_input_registers(address=INPUT_CONTROL_OCCUPIED, count=1)
-        if not res.isError():
-            control_state = res.registers[0]
-            status['control'] = control_state
-            control_desc = {0: "自己抢占或未被抢占", 1: "被外部抢占"}.get(control_state, "未知")
-            print(f"[INFO] 控制权状态: {control_state} ({control_desc})")
-        else:
-            print(f"[ERROR] 读取控制权状态失败: {res}")
-            status['control'] = -1
-            
-        # 读取Fatal错误
-        res = client.read_input_registers(address=INPUT_FATAL_ERROR, count=1)
-        if not res.isError():
-            fatal_error = res.registers[0]
-            status['fatal'] = fatal_error
-            if fatal_error != 0:
-                print(f"[ERROR] AGV有Fatal错误: {fatal_error}")
-            else:
-                print("[INFO] 无Fatal错误")
+        if snapshot is None:
+            snapshot = read_agv_snapshot(client)
+        if snapshot is None:
+            print("[ERROR] 读取AGV状态失败")
+            return {'localization': -1, 'control': -1, 'fatal': -1, 'error': -1}
+
+        # 定位状态
+        loc_state = snapshot.localization_state
+        status['localization'] = loc_state
+        loc_desc = {0: "定位失败", 1: "定位正确", 2: "正在重定位", 3: "定位完成"}.get(loc_state, "未知")
+        print(f"[INFO] 定位状态: {loc_state} ({loc_desc})")
+        if loc_state == 0:
+            print("[WARNING] AGV定位失败，无法抢占控制权")
+            
+        # 控制权状态
+        control_state = snapshot.control_occupied
+        status['control'] = control_state
+        control_desc = {0: "自己抢占或未被抢占", 1: "被外部抢占"}.get(control_state, "未知")
+        print(f"[INFO] 控制权状态: {control_state} ({control_desc})")
+            
+        # Fatal错误
+        fatal_error = snapshot.fatal_code
+        status['fatal'] = fatal_error
+        if fatal_error != 0:
+            print(f"[ERROR] AGV有Fatal错误: {fatal_error}")
         else:
-            print(f"[ERROR] 读取Fatal错误失败: {res}")
-            status['fatal'] = -1
-            
-        # 读取Error错误
-        res = client.read_input_registers(address=INPUT_ERROR_CODE, count=1)
-        if not res.isError():
-            error_code = res.registers[0]
-            status['error'] = error_code
-            if error_code != 0:
-                print(f"[WARNING] AGV有Error错误: {error_code}")
-            else:
-                print("[INFO] 无Error错误")
+            print("[INFO] 无Fatal错误")
+            
+        # Error错误
+        error_code = snapshot.error_code
+        status['error'] = error_code
+        if error_code != 0:
+            print(f"[WARNING] AGV有Error错误: {error_code}")
         else:
-            print(f"[ERROR] 读取Error错误失败: {res}")
-            status['error'] = -1
+            print("[INFO] 无Error错误")
             
     except Exception as e:
         print(f"[ERROR] 检查AGV状态异常: {e}")
     
     return status
 
-def relocate_at_home(client):
+REGISTER_INPUT = "input"       # 输入寄存器
+REGISTER_HOLDING = "holding"   # 保持寄存器
+REGISTER_COIL = "coil"         # 线圈
+
+def wait_until(client, register, predicate, timeout, register_type=REGISTER_INPUT,
+               min_interval=0.05, max_interval=1.0):
+    """
+    自适应等待寄存器满足条件
+
+    命令发出后先快速轮询，读数保持不变时逐渐退避到 max_interval，条件满足立即返回，
+    代替"固定睡眠 + 读取"的等待方式。
+
+    Args:
+        client: Modbus客户端
+        register: 寄存器地址
+        predicate: predicate(value) 为真时停止等待
+        timeout: 最长等待时间(秒)
+        register_type: REGISTER_INPUT / REGISTER_HOLDING（输入/保持寄存器，值为int）或 REGISTER_COIL（线圈，值为bool）
+        min_interval: 最小轮询间隔(秒)
+        max_interval: 最大轮询间隔(秒)
+
+    Returns:
+        PollResult: (ok, value, elapsed, polls)，读取失败时value为None
+    """
+    def probe():
+        if register_type == REGISTER_COIL:
+            res = client.read_coils(address=register, count=1)
+        elif register_type == REGISTER_HOLDING:
+            res = client.read_holding_registers(address=register, count=1)
+        else:
+            res = client.read_input_registers(address=register, count=1)
+        if res.isError():
+            print(f"[ERROR] 读取{register_type}寄存器 {register} 失败: {res}")
+            return None
+        return res.bits[0] if register_type == REGISTER_COIL else res.registers[0]
+
+    return poll_until(probe, predicate, timeout, min_interval=min_interval, max_interval=max_interval)
+
+def relocate_at_home(client, timeout=30.0):
     """在Home点重定位"""
     print("[INFO] 开始在Home点重定位...")
     
@@ -431,27 +1129,21 @@ def relocate_at_home(client):
         return False
     print("[SUCCESS] 成功发送重定位命令")
     
-    # 等待重定位完成
+    # 等待重定位完成：定位正确(1)/定位完成(3)为成功，定位失败(0)立即结束
     print("[INFO] 等待重定位完成...")
-    for _ in range(30):  # 最多等30秒
-        time.sleep(1)
-        res = client.read_input_registers(address=INPUT_LOCALIZATION_STATE, count=1)
-        if not res.isError():
-            loc_state = res.registers[0]
-            print(f"[DEBUG] 重定位进度 - 定位状态: {loc_state}")
-            if loc_state in (1, 3):  # 定位正确或定位完成
-                print("✅ 重定位成功")
-                return True
-            elif loc_state == 0:  # 定位失败
-                print("❌ 重定位失败")
-                return False
-        else:
-            print(f"[ERROR] 读取定位状态失败: {res}")
+    result = wait_until(client, INPUT_LOCALIZATION_STATE, lambda state: state in (0, 1, 3), timeout)
+    print(f"[DEBUG] 重定位进度 - 定位状态: {result.value} (耗时{result.elapsed:.2f}s)")
+    if result.ok and result.value in (1, 3):
+        print("✅ 重定位成功")
+        return True
+    elif result.ok:
+        print("❌ 重定位失败")
+        return False
     
     print("⏳ 重定位超时")
     return False
 
-def confirm_localization(client):
+def confirm_localization(client, timeout=2.0):
     """确认定位正确"""
     print("[INFO] 确认定位正确...")
     
@@ -461,49 +1153,43 @@ def confirm_localization(client):
         return False
     print("[SUCCESS] 成功发送确认定位命令")
     
-    # 检查定位状态是否变为1
-    time.sleep(1)
-    res = client.read_input_registers(address=INPUT_LOCALIZATION_STATE, count=1)
-    if not res.isError():
-        loc_state = res.registers[0]
-        if loc_state == 1:
-            print("✅ 定位状态确认成功")
-            return True
-        else:
-            print(f"❌ 定位状态确认失败，当前状态: {loc_state}")
-            return False
+    # 等待定位状态变为1
+    result = wait_until(client, INPUT_LOCALIZATION_STATE, lambda state: state == 1, timeout)
+    if result.ok:
+        print("✅ 定位状态确认成功")
+        return True
+    elif result.value is not None:
+        print(f"❌ 定位状态确认失败，当前状态: {result.value}")
+        return False
     else:
-        print(f"[ERROR] 读取定位状态失败: {res}")
+        print("[ERROR] 读取定位状态失败")
         return False
 
 
-def check_block_status(client):
-    """检查AGV阻挡状态"""
+def check_block_status(client, snapshot=None):
+    """
+    检查AGV阻挡状态
+
+    Args:
+        client: Modbus客户端
+        snapshot: 已有的状态快照（可选），未提供时批量读取一次
+
+    Returns:
+        tuple: (is_blocked, reason)，读取失败返回 (None, None)
+    """
     try:
-        # 读取是否被阻挡
-        res = client.read_input_registers(address=INPUT_IS_BLOCKED, count=1)
-        if res.isError():
-            print(f"[ERROR] 读取阻挡状态失败: {res}")
+        if snapshot is None:
+            snapshot = read_agv_snapshot(client)
+        if snapshot is None:
+            print("[ERROR] 读取阻挡状态失败")
             return None, None
             
-        is_blocked = res.registers[0]
-        
-        if is_blocked == 0:
+        if snapshot.is_blocked == 0:
             return False, None  # 未阻挡
             
-        # 如果被阻挡，读取阻挡原因
-        reason_res = client.read_input_registers(address=INPUT_BLOCK_REASON, count=1)
-        if reason_res.isError():
-            print(f"[ERROR] 读取阻挡原因失败: {reason_res}")
-            return True, "未知原因"
-            
-        block_reason = reason_res.registers[0]
-        reason_desc = {
-            0: "超声传感器", 1: "激光传感器", 2: "防跌落传感器", 
-            3: "碰撞传感器", 4: "红外传感器", 5: "锁车开关",
-            6: "动态障碍物", 7: "虚拟激光点", 8: "3D相机",
-            9: "距离传感器", 10: "DI超声"
-        }.get(block_reason, f"未知原因({block_reason})")
+        # 被阻挡，解析阻挡原因
+        block_reason = snapshot.block_reason
+        reason_desc = SENSOR_REASON_DESC.get(block_reason, f"未知原因({block_reason})")
         
         return True, reason_desc
         
@@ -511,191 +1197,147 @@ def check_block_status(client):
         print(f"[ERROR] 检查阻挡状态异常: {e}")
         return None, None
 
-def print_detailed_sensor_status(client):
-    """打印详细的传感器和系统状态信息"""
+def print_detailed_sensor_status(client, snapshot=None):
+    """
+    打印详细的传感器和系统状态信息
+
+    Args:
+        client: Modbus客户端
+        snapshot: 已有的状态快照（可选），未提供或缺少线圈数据时批量读取一次
+    """
     print("\n📊 === AGV详细传感器状态 ===")
     
     try:
+        if snapshot is None or snapshot.coils is None:
+            snapshot = read_agv_snapshot(client, include_coils=True)
+        if snapshot is None:
+            print("❌ 读取传感器状态失败")
+            print("=" * 50)
+            return
+
         # 1. 阻挡传感器详细信息
         print("🚧 阻挡传感器状态:")
-        block_res = client.read_input_registers(address=INPUT_IS_BLOCKED, count=1)
-        reason_res = client.read_input_registers(address=INPUT_BLOCK_REASON, count=1)
+        is_blocked = snapshot.is_blocked
+        print(f"  · 阻挡状态: {'🔴 被阻挡' if is_blocked else '🟢 未阻挡'} ({is_blocked})")
         
-        if not block_res.isError():
-            is_blocked = block_res.registers[0]
-            print(f"  · 阻挡状态: {'🔴 被阻挡' if is_blocked else '🟢 未阻挡'} ({is_blocked})")
-            
-            if is_blocked and not reason_res.isError():
-                block_reason = reason_res.registers[0]
-                reason_map = {
-                    0: "超声传感器", 1: "激光传感器", 2: "防跌落传感器",
-                    3: "碰撞传感器", 4: "红外传感器", 5: "锁车开关",
-                    6: "动态障碍物", 7: "虚拟激光点", 8: "3D相机",
-                    9: "距离传感器", 10: "DI超声"
-                }
-                reason_desc = reason_map.get(block_reason, f"未知({block_reason})")
-                print(f"  · 触发传感器: 🚨 {reason_desc} (代码:{block_reason})")
-                
-                # 根据阻挡原因读取更详细信息
-                if block_reason == 0:  # 超声传感器
-                    ultrasonic_id_res = client.read_input_registers(address=44, count=1)
-                    if not ultrasonic_id_res.isError():
-                        ultrasonic_id = ultrasonic_id_res.registers[0]
-                        print(f"  · 超声传感器ID: {ultrasonic_id}")
-                        
-                elif block_reason in [2, 3, 4]:  # 防跌落、碰撞、红外传感器
-                    di_id_res = client.read_input_registers(address=45, count=1)
-                    if not di_id_res.isError():
-                        di_id = di_id_res.registers[0]
-                        print(f"  · DI传感器ID: {di_id}")
-                
-                # 读取阻挡位置坐标
-                block_pos_res = client.read_input_registers(address=46, count=4)
-                if not block_pos_res.isError() and len(block_pos_res.registers) >= 4:
-                    try:
-                        import struct
-                        x_bytes = struct.pack('>HH', block_pos_res.registers[0], block_pos_res.registers[1])
-                        y_bytes = struct.pack('>HH', block_pos_res.registers[2], block_pos_res.registers[3])
-                        block_x = struct.unpack('>f', x_bytes)[0]
-                        block_y = struct.unpack('>f', y_bytes)[0]
-                        print(f"  · 阻挡位置: X={block_x:.3f}m, Y={block_y:.3f}m")
-                    except:
-                        pass
+        if is_blocked:
+            block_reason = snapshot.block_reason
+            reason_desc = SENSOR_REASON_DESC.get(block_reason, f"未知({block_reason})")
+            print(f"  · 触发传感器: 🚨 {reason_desc} (代码:{block_reason})")
+            
+            # 根据阻挡原因显示更详细信息
+            if block_reason == 0:  # 超声传感器
+                print(f"  · 超声传感器ID: {snapshot.block_ultrasonic_id}")
+            elif block_reason in [2, 3, 4]:  # 防跌落、碰撞、红外传感器
+                print(f"  · DI传感器ID: {snapshot.block_di_id}")
+            
+            # 阻挡位置坐标
+            print(f"  · 阻挡位置: X={snapshot.block_x:.3f}m, Y={snapshot.block_y:.3f}m")
         
-        # 2. 减速传感器状态
-        print("\n🐌 减速传感器状态:")
-        slow_res = client.read_coils(address=0, count=1)
-        if not slow_res.isError():
-            is_slowing = slow_res.bits[0]
+        if snapshot.coils is not None:
+            # 2. 减速传感器状态
+            print("\n🐌 减速传感器状态:")
+            is_slowing = snapshot.is_slowing
             print(f"  · 减速状态: {'🟡 减速中' if is_slowing else '🟢 正常'} ({int(is_slowing)})")
             
             if is_slowing:
-                slow_reason_res = client.read_input_registers(address=83, count=1)
-                if not slow_reason_res.isError():
-                    slow_reason = slow_reason_res.registers[0]
-                    slow_reason_map = {
-                        0: "超声传感器", 1: "激光传感器", 2: "防跌落传感器",
-                        3: "碰撞传感器", 4: "红外传感器", 5: "锁车开关",
-                        6: "动态障碍物", 7: "虚拟激光点", 8: "3D相机",
-                        9: "距离传感器", 10: "DI超声"
-                    }
-                    slow_desc = slow_reason_map.get(slow_reason, f"未知({slow_reason})")
-                    print(f"  · 减速原因: 🟡 {slow_desc} (代码:{slow_reason})")
-        
-        # 3. 安全状态检查
-        print("\n🛡️ 安全状态检查:")
-        safety_res = client.read_coils(address=2, count=5)
-        if not safety_res.isError():
+                slow_reason = snapshot.slow_reason
+                slow_desc = SENSOR_REASON_DESC.get(slow_reason, f"未知({slow_reason})")
+                print(f"  · 减速原因: 🟡 {slow_desc} (代码:{slow_reason})")
+            
+            # 3. 安全状态检查
+            print("\n🛡️ 安全状态检查:")
             safety_states = [
-                ("充电状态", "🔋 充电中" if safety_res.bits[0] else "⚡ 未充电"),
-                ("急停状态", "🚨 急停" if safety_res.bits[1] else "✅ 正常"),
-                ("抱闸状态", "🔒 抱闸" if safety_res.bits[2] else "🔓 未抱闸"),
-                ("货叉到位", "📦 到位" if safety_res.bits[3] else "📦 未到位"),
-                ("控制模式", "🤖 自动" if safety_res.bits[4] else "👨 手动")
+                ("充电状态", "🔋 充电中" if snapshot.charging else "⚡ 未充电"),
+                ("急停状态", "🚨 急停" if snapshot.emergency_stop else "✅ 正常"),
+                ("抱闸状态", "🔒 抱闸" if snapshot.brake else "🔓 未抱闸"),
+                ("货叉到位", "📦 到位" if snapshot.fork_in_place else "📦 未到位"),
+                ("控制模式", "🤖 自动" if snapshot.auto_mode else "👨 手动")
             ]
             for desc, status in safety_states:
                 print(f"  · {desc}: {status}")
-        
-        # 4. DI传感器状态 (前16个)
-        print("\n🔌 DI传感器状态 (DI0-DI15):")
-        di_res = client.read_coils(address=19, count=16)
-        if not di_res.isError():
-            for i in range(16):
-                state = "🟢 HIGH" if di_res.bits[i] else "🔴 LOW"
+            
+            # 4. DI传感器状态 (前16个)
+            print("\n🔌 DI传感器状态 (DI0-DI15):")
+            for i, di_state in enumerate(snapshot.di_states):
+                state = "🟢 HIGH" if di_state else "🔴 LOW"
                 print(f"  · DI{i:2d}: {state}")
-        
-        # 5. 系统状态详情
-        print("\n⚠️ 系统状态:")
-        system_res = client.read_coils(address=7, count=4)
-        if not system_res.isError():
-            has_fatal = system_res.bits[0]
-            has_error = system_res.bits[1] 
-            has_warning = system_res.bits[2]
-            lift_enabled = system_res.bits[3] if len(system_res.bits) > 3 else False
-            
-            print(f"  · Fatal错误: {'🚨 有' if has_fatal else '✅ 无'}")
-            print(f"  · Error错误: {'⚠️ 有' if has_error else '✅ 无'}")
-            print(f"  · Warning警告: {'🟡 有' if has_warning else '✅ 无'}")
-            print(f"  · 顶升启用: {'📤 启用' if lift_enabled else '📥 未启用'}")
-        
-        # 6. 机器人运动状态
-        print("\n🤖 运动状态:")
-        motion_res = client.read_coils(address=16, count=3)
-        if not motion_res.isError():
-            is_loaded = motion_res.bits[0] if len(motion_res.bits) > 0 else False
-            is_static = motion_res.bits[2] if len(motion_res.bits) > 2 else False
-            
-            print(f"  · 载货状态: {'📦 载货中' if is_loaded else '📭 空载'}")
-            print(f"  · 运动状态: {'🛑 静止' if is_static else '🏃 运动中'}")
+            
+            # 5. 系统状态详情
+            print("\n⚠️ 系统状态:")
+            print(f"  · Fatal错误: {'🚨 有' if snapshot.has_fatal else '✅ 无'}")
+            print(f"  · Error错误: {'⚠️ 有' if snapshot.has_error else '✅ 无'}")
+            print(f"  · Warning警告: {'🟡 有' if snapshot.has_warning else '✅ 无'}")
+            print(f"  · 顶升启用: {'📤 启用' if snapshot.lift_enabled else '📥 未启用'}")
+            
+            # 6. 机器人运动状态
+            print("\n🤖 运动状态:")
+            print(f"  · 载货状态: {'📦 载货中' if snapshot.is_loaded else '📭 空载'}")
+            print(f"  · 运动状态: {'🛑 静止' if snapshot.is_static else '🏃 运动中'}")
         
         # 7. 速度状态
         print("\n📏 当前速度:")
-        speed_res = client.read_input_registers(address=50, count=6)
-        if not speed_res.isError() and len(speed_res.registers) >= 6:
-            try:
-                import struct
-                vx_bytes = struct.pack('>HH', speed_res.registers[0], speed_res.registers[1])
-                vy_bytes = struct.pack('>HH', speed_res.registers[2], speed_res.registers[3])
-                w_bytes = struct.pack('>HH', speed_res.registers[4], speed_res.registers[5])
-                
-                vx = struct.unpack('>f', vx_bytes)[0]
-                vy = struct.unpack('>f', vy_bytes)[0] 
-                w = struct.unpack('>f', w_bytes)[0]
-                
-                print(f"  · VX速度: {vx:+.3f} m/s")
-                print(f"  · VY速度: {vy:+.3f} m/s") 
-                print(f"  · 角速度: {w:+.3f} rad/s")
-            except:
-                print("  · 速度信息解析失败")
+        print(f"  · VX速度: {snapshot.vx:+.3f} m/s")
+        print(f"  · VY速度: {snapshot.vy:+.3f} m/s") 
+        print(f"  · 角速度: {snapshot.w:+.3f} rad/s")
                 
     except Exception as e:
         print(f"❌ 读取传感器状态时发生异常: {e}")
     
     print("=" * 50)
 
-def diagnose_navigation_failure(client, nav_status):
-    """诊断导航失败的具体原因"""
+def diagnose_navigation_failure(client, nav_status, snapshot=None):
+    """
+    诊断导航失败的具体原因
+
+    Args:
+        client: Modbus客户端
+        nav_status: 导航状态码
+        snapshot: 已有的状态快照（可选），未提供时批量读取一次
+    """
     print(f"\n🔍 诊断导航失败原因 (状态码={nav_status})...")
     
-    # 读取当前站点和目标站点
+    if snapshot is None:
+        snapshot = read_agv_snapshot(client)
+    if snapshot is None:
+        print("⚠️ 状态快照读取失败，无法诊断")
+        return
+
+    # 当前站点和目标站点（目标站点位于保持寄存器，需单独读取）
     try:
-        current_station_res = client.read_input_registers(address=INPUT_CURRENT_STATION, count=1)
         target_station_res = client.read_holding_registers(address=ADDR_TARGET_STATION, count=1)
-        
-        if not current_station_res.isError() and not target_station_res.isError():
-            current_station = current_station_res.registers[0]
+        if not target_station_res.isError():
             target_station = target_station_res.registers[0]
-            print(f"📍 当前站点: {current_station}, 目标站点: {target_station}")
+            print(f"📍 当前站点: {snapshot.current_station}, 目标站点: {target_station}")
         
-        # 读取机器人位置
-        pos_res = client.read_input_registers(address=INPUT_ROBOT_X, count=6)  # X,Y,角度
-        if not pos_res.isError():
-            # 简化显示，不解析float32
-            print(f"📍 机器人位置寄存器: X={pos_res.registers[0:2]}, Y={pos_res.registers[2:4]}, 角度={pos_res.registers[4:6]}")
+        # 机器人位置
+        regs = snapshot.input_registers
+        print(f"📍 机器人位置寄存器: X={list(regs[0:2])}, Y={list(regs[2:4])}, 角度={list(regs[4:6])}")
+        print(f"📍 机器人位置: X={snapshot.robot_x:.3f}m, Y={snapshot.robot_y:.3f}m, 角度={snapshot.robot_angle:.3f}rad")
             
     except Exception as e:
         print(f"⚠️ 位置信息读取异常: {e}")
     
     # 检查错误码
-    try:
-        fatal_res = client.read_input_registers(address=INPUT_FATAL_ERROR, count=1)
-        error_res = client.read_input_registers(address=INPUT_ERROR_CODE, count=1)
-        
-        if not fatal_res.isError() and not error_res.isError():
-            fatal_code = fatal_res.registers[0]
-            error_code = error_res.registers[0]
-            
-            if fatal_code != 0:
-                print(f"❌ Fatal错误: {fatal_code}")
-            if error_code != 0:
-                print(f"⚠️ Error错误: {error_code}")
-            if fatal_code == 0 and error_code == 0:
-                print("✅ 无系统错误")
-                
-    except Exception as e:
-        print(f"⚠️ 错误码读取异常: {e}")
+    fatal_code = snapshot.fatal_code
+    error_code = snapshot.error_code
+    
+    if fatal_code != 0:
+        print(f"❌ Fatal错误: {fatal_code}")
+    if error_code != 0:
+        print(f"⚠️ Error错误: {error_code}")
+    if fatal_code == 0 and error_code == 0:
+        print("✅ 无系统错误")
+
+def _next_navigation_snapshot(client, telemetry, after_timestamp):
+    """获取导航监控用的状态快照：优先使用晚于 after_timestamp 的后台遥测，否则直接读取"""
+    if telemetry is not None and telemetry.is_running():
+        state = telemetry.wait_for_update(after_timestamp, timeout=max(1.0, telemetry.interval * 3))
+        if state is not None:
+            return state.snapshot
+    return read_agv_snapshot(client)
 
-def monitor_navigation_with_block_handling(client, max_total_time=300, max_continuous_block_time=60, wait_forever_on_block=False):
+def monitor_navigation_with_block_handling(client, max_total_time=300, max_continuous_block_time=60, wait_forever_on_block=False, telemetry=None):
     """
     智能导航监控，处理阻挡等待
     
@@ -704,18 +1346,32 @@ def monitor_navigation_with_block_handling(client, max_total_time=300, max_conti
         max_total_time: 总超时时间(秒)，默认5分钟
         max_continuous_block_time: 连续阻挡最大等待时间(秒)，默认1分钟
         wait_forever_on_block: 是否无限等待障碍物消失，默认False
+        telemetry: 后台遥测轮询器（可选），提供时使用缓存状态代替直接读取
     
     Returns:
         bool: 导航是否成功
     """
     start_time = time.time()
     block_start_time = None
+    block_info = {}
     total_block_time = 0
     
+    def record_blockage(end_time, resolved):
+        # 每次阻挡记录一个事件（父span为 agv:navigation，含起点/目标站点），用于统计阻挡热点
+        trace_event("agv:blockage", category="agv", seconds=round(end_time - block_start_time, 3),
+                    resolved=resolved, **block_info)
+    interval = AdaptiveInterval(min_interval=0.1, max_interval=1.0)  # 状态变化后快速轮询，稳定后退避到1秒
+    last_report_time = 0.0
+    
     print("[INFO] 开始智能导航监控...")
     
-    # 等待一小段时间让导航命令生效
-    time.sleep(0.5)
+    # 等待导航命令生效（进入等待执行/执行中/暂停），避免读到上一次导航的结束状态；
+    # 最多等待0.5秒，命令被立即拒绝时按之后读到的状态处理
+    try:
+        wait_until(client, INPUT_NAVIGATION_STATE, lambda state: state in (1, 2, 3), timeout=0.5)
+    except Exception as e:
+        print(f"⚠️ 读取导航状态异常: {e}")
+    last_snapshot_time = time.time()  # 只接受命令生效之后的遥测数据
     
     attempt = 0
     while time.time() - start_time < max_total_time:
@@ -723,14 +1379,15 @@ def monitor_navigation_with_block_handling(client, max_total_time=300, max_conti
         current_time = time.time()
         elapsed = current_time - start_time
         
-        # 读取导航状态
-        nav_res = client.read_input_registers(address=INPUT_NAVIGATION_STATE, count=1)
-        if nav_res.isError():
-            print(f"⚠️ 读取导航状态失败: {nav_res}")
-            time.sleep(1)
+        # 批量读取状态快照（导航状态 + 阻挡状态一次读取）
+        snapshot = _next_navigation_snapshot(client, telemetry, last_snapshot_time)
+        if snapshot is None:
+            print("⚠️ 读取导航状态失败")
+            time.sleep(interval.next(None))  # 连续失败时按同一策略退避
             continue
             
-        nav_status = nav_res.registers[0]
+        last_snapshot_time = snapshot.timestamp
+        nav_status = snapshot.navigation_state
         
         # 检查导航完成状态
         if nav_status == 4:  # 到达
@@ -741,7 +1398,7 @@ def monitor_navigation_with_block_handling(client, max_total_time=300, max_conti
             print(f"❌ 导航{status_desc}，状态码={nav_status}")
             
             # 进行详细诊断
-            diagnose_navigation_failure(client, nav_status)
+            diagnose_navigation_failure(client, nav_status, snapshot)
             
             # 如果是立即取消，可能是配置问题
             if nav_status == 6 and elapsed < 2:
@@ -754,42 +1411,56 @@ def monitor_navigation_with_block_handling(client, max_total_time=300, max_conti
             return False
             
         # 检查阻挡状态
-        is_blocked, block_reason = check_block_status(client)
+        is_blocked, block_reason = check_block_status(client, snapshot)
+        next_interval = interval.next((nav_status, is_blocked))
+        # 快速轮询期间限制输出频率，状态变化时立即输出
+        report = next_interval == interval.min_interval or current_time - last_report_time >= 1.0
+        if report:
+            last_report_time = current_time
         
         if is_blocked is None:  # 读取阻挡状态失败
             print(f"⚠️ [第{attempt}次] 无法读取阻挡状态，继续监控...")
         elif is_blocked:  # 被阻挡
             if block_start_time is None:
                 block_start_time = current_time
+                block_info = {"reason": block_reason, "reason_code": snapshot.block_reason,
+                              "x": round(snapshot.block_x, 2), "y": round(snapshot.block_y, 2)}
                 print(f"🚧 [第{attempt}次] AGV被阻挡: {block_reason}，开始等待...")
-                # 打印详细传感器状态
-                print_detailed_sensor_status(client)
+                # 打印详细传感器状态（补充读取线圈）
+                print_detailed_sensor_status(client, snapshot)
             else:
                 block_duration = current_time - block_start_time
-                total_block_time += 1
                 
                 # 检查是否连续阻挡时间过长
                 if not wait_forever_on_block and block_duration > max_continuous_block_time:
                     print(f"⏰ AGV连续阻挡时间过长({block_duration:.1f}秒)，可能需要人工干预")
+                    record_blockage(current_time, resolved=False)
                     return False
                     
-                status_msg = f"🚧 [第{attempt}次] 仍被阻挡: {block_reason} (已等待{block_duration:.1f}s)"
-                if wait_forever_on_block:
-                    status_msg += " [无限等待模式]"
-                print(status_msg)
+                if report:
+                    status_msg = f"🚧 [第{attempt}次] 仍被阻挡: {block_reason} (已等待{block_duration:.1f}s)"
+                    if wait_forever_on_block:
+                        status_msg += " [无限等待模式]"
+                    print(status_msg)
         else:  # 未阻挡
             if block_start_time is not None:
                 block_duration = current_time - block_start_time
+                total_block_time += block_duration
                 print(f"✅ 阻挡解除，继续前进 (阻挡持续了{block_duration:.1f}秒)")
+                record_blockage(current_time, resolved=True)
                 block_start_time = None
             
             # 显示正常导航状态
-            status_desc = {0: "无", 1: "等待执行", 2: "执行中", 3: "暂停"}.get(nav_status, "未知")
-            print(f"⌛ [第{attempt}次] 导航状态: {nav_status} ({status_desc}) | 已用时: {elapsed:.1f}s")
+            if report:
+                status_desc = {0: "无", 1: "等待执行", 2: "执行中", 3: "暂停"}.get(nav_status, "未知")
+                print(f"⌛ [第{attempt}次] 导航状态: {nav_status} ({status_desc}) | 已用时: {elapsed:.1f}s")
             
-        time.sleep(1)
+        time.sleep(next_interval)
     
-    print(f"⏳ 导航总超时({max_total_time}s)，累计阻挡时间: {total_block_time}s")
+    if block_start_time is not None:
+        total_block_time += time.time() - block_start_time
+        record_blockage(time.time(), resolved=False)
+    print(f"⏳ 导航总超时({max_total_time}s)，累计阻挡时间: {total_block_time:.1f}s")
     return False
 
 def ensure_proper_localization(client):
@@ -828,11 +1499,14 @@ def ensure_proper_localization(client):
         print(f"❌ AGV定位状态异常: {status.get('localization', -1)}")
         return False
 
+def encode_float32(value):
+    """将浮点数编码为写入保持寄存器的两个寄存器值（低字在前，与BinaryPayloadBuilder BIG/LITTLE一致）"""
+    high, low = struct.unpack('>HH', struct.pack('>f', value))
+    return [low, high]
+
 def write_float32(client, address, value):
     """写入32位浮点数到保持寄存器"""
-    builder = BinaryPayloadBuilder(byteorder=Endian.BIG, wordorder=Endian.LITTLE)
-    builder.add_32bit_float(value)
-    payload = builder.to_registers()
+    payload = encode_float32(value)
     print(f"[DEBUG] 写入float32: 地址={address}, 值={value}, payload={payload}")
     rr = client.write_registers(address=address, values=payload)
     if rr.isError():
@@ -840,7 +1514,85 @@ def write_float32(client, address, value):
         raise Exception(f"写入浮点数失败，地址={address}")
     print(f"[SUCCESS] 成功写入float32: 地址={address}, 值={value}")
 
-def acquire_control(client):
+# 速度参数保持寄存器块 VX..W (00005-00010)，三个float32连续存放
+MOTION_SPEED_START = ADDR_VX
+MOTION_SPEED_COUNT = ADDR_W + 2 - ADDR_VX
+
+# 最近一次成功写入AGV的速度块，按连接（调度器或客户端）区分
+_motion_speed_cache = weakref.WeakKeyDictionary()
+
+def _motion_cache_key(client):
+    """同一调度器下不同优先级的代理共享同一缓存"""
+    return getattr(client, 'scheduler', None) or client
+
+def invalidate_motion_cache(client=None):
+    """清除速度参数缓存（重连或AGV重启后调用），client为None时清除全部"""
+    if client is None:
+        _motion_speed_cache.clear()
+    else:
+        _motion_speed_cache.pop(_motion_cache_key(client), None)
+
+def encode_speed_block(vx, vy, w):
+    """将VX/VY/W编码为速度寄存器块（6个寄存器）"""
+    return encode_float32(vx) + encode_float32(vy) + encode_float32(w)
+
+def _run_transaction(client, transaction, timeout=10.0):
+    """在调度器中作为单个事务执行（连续请求不被其他事务插入）；普通客户端直接执行"""
+    if hasattr(client, 'submit'):
+        return client.submit(transaction).result(timeout=timeout)
+    return transaction(client)
+
+def send_motion_command(client, station_id, vx=1.0, vy=0.0, w=0.5, read_nav_state=False):
+    """
+    下发运动命令：速度块 + 目标站点在同一事务内连续写入
+
+    速度块 VX..W 用一次 write_registers 写入，与缓存的已写值相同时跳过；
+    目标站点寄存器(00001)与速度块之间有未定义地址，故单独写入但不离开事务。
+
+    Args:
+        client: Modbus客户端（调度器代理或普通客户端）
+        station_id: 目标站点号
+        vx, vy, w: 速度参数
+        read_nav_state: 是否在写入前读取当前导航状态（同一事务内）
+
+    Returns:
+        dict: {'ok': bool, 'speeds_written': bool, 'nav_state': int或None, 'error': str或None}
+    """
+    speeds = encode_speed_block(vx, vy, w)
+    cache_key = _motion_cache_key(client)
+    skip_speeds = _motion_speed_cache.get(cache_key) == speeds
+
+    def motion_command(raw):
+        result = {'ok': False, 'speeds_written': False, 'nav_state': None, 'error': None}
+        if read_nav_state:
+            nav_res = raw.read_input_registers(address=INPUT_NAVIGATION_STATE, count=1)
+            if not nav_res.isError():
+                result['nav_state'] = nav_res.registers[0]
+        if not skip_speeds:
+            rr = raw.write_registers(address=MOTION_SPEED_START, values=speeds)
+            if rr.isError():
+                result['error'] = f"写入速度参数失败: {rr}"
+                return result
+            result['speeds_written'] = True
+        rr = raw.write_register(address=ADDR_TARGET_STATION, value=station_id)
+        if rr.isError():
+            result['error'] = f"写入目标站点失败: {rr}"
+            return result
+        result['ok'] = True
+        return result
+
+    try:
+        result = _run_transaction(client, motion_command)
+    except Exception as e:
+        result = {'ok': False, 'speeds_written': False, 'nav_state': None, 'error': f"运动命令异常: {e}"}
+
+    if result['speeds_written']:
+        _motion_speed_cache[cache_key] = speeds
+    elif not result['ok'] and not skip_speeds:
+        _motion_speed_cache.pop(cache_key, None)
+    return result
+
+def acquire_control(client, timeout=2.0):
     """抢占AGV控制权"""
     print("[INFO] 开始抢占控制权...")
     
@@ -863,20 +1615,15 @@ def acquire_control(client):
         return False
     print("[SUCCESS] 成功写入抢占控制权线圈")
 
-    # 写完延时1秒，等待设备响应
+    # 等待线圈被清零（成功抢占控制权线圈被设备自动清零）
     print("[INFO] 等待设备响应...")
-    time.sleep(1)
-
-    # 读取线圈确认是否被清零（成功抢占控制权线圈被设备自动清零）
-    print(f"[DEBUG] 读取线圈寄存器 {COIL_ACQUIRE_CONTROL} 状态")
-    rr = client.read_coils(address=COIL_ACQUIRE_CONTROL, count=1)
-    if rr.isError():
-        print(f"[ERROR] 读取抢占控制权线圈失败: {rr}")
+    result = wait_until(client, COIL_ACQUIRE_CONTROL, lambda val: not val, timeout, register_type=REGISTER_COIL)
+    if result.value is None:
+        print("[ERROR] 读取抢占控制权线圈失败")
         return False
     
-    val = rr.bits[0]  # 线圈寄存器用bits不是registers
-    print(f"[DEBUG] 抢占线圈当前值: {val}")
-    if not val:  # 清零(False)表示成功
+    print(f"[DEBUG] 抢占线圈当前值: {result.value} (耗时{result.elapsed:.2f}s)")
+    if result.ok:  # 清零(False)表示成功
         print("✅ 成功抢占控制权")
         # 再次检查控制权状态确认
         print("[INFO] 确认控制权状态...")
@@ -895,7 +1642,7 @@ def acquire_control(client):
         return False
 
 
-def release_control(client):
+def release_control(client, timeout=2.0):
     """释放AGV控制权"""
     print("[INFO] 开始释放控制权...")
     
@@ -909,25 +1656,21 @@ def release_control(client):
 
     # 等待线圈清零，确认释放成功
     print("[INFO] 等待线圈清零确认...")
-    for attempt in range(10):
-        print(f"[DEBUG] 第{attempt+1}次检查释放控制权线圈状态")
-        rr = client.read_coils(address=COIL_RELEASE_CONTROL, count=1)
-        if rr.isError():
-            print(f"[ERROR] 读取释放控制权线圈失败: {rr}")
-            return False
-        val = rr.bits[0]  # 线圈寄存器用bits
-        print(f"[DEBUG] 释放线圈当前值: {val}")
-        if not val:  # 清零(False)表示成功
-            print("✅ 成功释放控制权")
-            # 验证控制权状态
-            status = check_agv_status(client)
-            return status.get('control', -1) == 0
-        time.sleep(0.2)
+    result = wait_until(client, COIL_RELEASE_CONTROL, lambda val: not val, timeout, register_type=REGISTER_COIL)
+    if result.value is None:
+        print("[ERROR] 读取释放控制权线圈失败")
+        return False
+    print(f"[DEBUG] 释放线圈当前值: {result.value} (第{result.polls}次检查, 耗时{result.elapsed:.2f}s)")
+    if result.ok:  # 清零(False)表示成功
+        print("✅ 成功释放控制权")
+        # 验证控制权状态
+        status = check_agv_status(client)
+        return status.get('control', -1) == 0
 
     print("❌ 释放控制权超时")
     return False
 
-def move_to_station(client, station_id, vx=1.0, vy=0.0, w=0.5, wait_forever_on_block=True):
+def move_to_station(client, station_id, vx=1.0, vy=0.0, w=0.5, wait_forever_on_block=True, telemetry=None):
     """
     控制AGV移动到指定站点
     
@@ -938,10 +1681,21 @@ def move_to_station(client, station_id, vx=1.0, vy=0.0, w=0.5, wait_forever_on_b
         vy: VY速度，默认0.0，范围[-3.0, 3.0]
         w: 角速度，默认0.5，范围[0, 3.0]
         wait_forever_on_block: 遇到障碍物时是否无限等待，默认True
+        telemetry: 后台遥测轮询器（可选），提供时状态检查和导航监控使用缓存状态
         
     Returns:
         bool: 是否成功到达目标站点
     """
+    cached = telemetry.get(max_age=max(1.0, telemetry.interval * 3)) if telemetry is not None else None
+    origin = cached.current_station if cached is not None and cached.current_station else None
+    with trace_span("agv:navigation", category="agv", station=station_id, origin=origin, vx=vx, vy=vy, w=w) as span:
+        arrived = _move_to_station(client, station_id, vx, vy, w, wait_forever_on_block, telemetry)
+        span.set_attribute("arrived", arrived)
+        span.set_status(arrived)
+        return arrived
+
+def _move_to_station(client, station_id, vx, vy, w, wait_forever_on_block, telemetry):
+    """move_to_station 的实现"""
     print(f"[INFO] 开始移动到站点 {station_id}, 速度参数: VX={vx}, VY={vy}, W={w}")
     
     # 参数验证
@@ -955,44 +1709,35 @@ def move_to_station(client, station_id, vx=1.0, vy=0.0, w=0.5, wait_forever_on_b
         print(f"[ERROR] 角速度超出范围 [-2π, 2π]: {w}")
         return False
     
-    # 检查当前导航状态，确保没有正在进行的导航
+    # 检查当前导航状态，确保没有正在进行的导航（无遥测缓存时在运动命令事务内读取）
     print("[INFO] 检查当前导航状态...")
-    try:
-        nav_res = client.read_input_registers(address=INPUT_NAVIGATION_STATE, count=1)
-        if not nav_res.isError():
-            current_nav_status = nav_res.registers[0]
-            if current_nav_status in (1, 2):  # 等待执行或执行中
-                print(f"[WARNING] 当前有导航正在进行 (状态={current_nav_status})，建议先取消")
-        else:
-            print(f"[WARNING] 无法读取当前导航状态: {nav_res}")
-    except Exception as e:
-        print(f"[WARNING] 导航状态检查异常: {e}")
-    
-    # 设置速度参数
-    print("[INFO] 设置速度参数...")
-    try:
-        write_float32(client, ADDR_VX, vx)
-        write_float32(client, ADDR_VY, vy)
-        write_float32(client, ADDR_W, w)
-        print(f"[SUCCESS] 速度参数设置完成 VX={vx}, VY={vy}, W={w}")
-    except Exception as e:
-        print(f"[ERROR] 设置速度参数失败: {e}")
-        return False
-
-    # 设置目标站点
-    print(f"[INFO] 设置目标站点为 {station_id}")
-    print(f"[DEBUG] 写入保持寄存器 {ADDR_TARGET_STATION} = {station_id}")
-    rr = client.write_register(address=ADDR_TARGET_STATION, value=station_id)
-    if rr.isError():
-        print(f"[ERROR] 写入目标站点失败: {rr}")
+    cached = telemetry.get(max_age=max(1.0, telemetry.interval * 3)) if telemetry is not None else None
+    current_nav_status = cached.navigation_state if cached is not None else None
+    if current_nav_status in (1, 2):  # 等待执行或执行中
+        print(f"[WARNING] 当前有导航正在进行 (状态={current_nav_status})，建议先取消")
+    
+    # 下发速度参数和目标站点（单个事务）
+    print(f"[INFO] 下发运动命令: 目标站点 {station_id}, VX={vx}, VY={vy}, W={w}")
+    result = send_motion_command(client, station_id, vx, vy, w, read_nav_state=cached is None)
+    if cached is None:
+        if result['nav_state'] is None:
+            print("[WARNING] 无法读取当前导航状态")
+        elif result['nav_state'] in (1, 2):
+            print(f"[WARNING] 下发前有导航正在进行 (状态={result['nav_state']})，新目标将覆盖")
+    if not result['ok']:
+        print(f"[ERROR] {result['error']}")
         return False
+    if result['speeds_written']:
+        print(f"[SUCCESS] 速度参数设置完成 VX={vx}, VY={vy}, W={w}")
+    else:
+        print("[INFO] 速度参数与上次下发相同，跳过写入")
     print(f"[SUCCESS] 成功设置目标站点为 {station_id}")
 
     # 注意：目标站点写入后，机器人会自动开始导航
     print("[INFO] 机器人开始路径导航，使用智能阻挡处理...")
     
     # 使用新的智能导航监控（支持阻挡等待）
-    return monitor_navigation_with_block_handling(client, max_total_time=300, max_continuous_block_time=60, wait_forever_on_block=wait_forever_on_block)
+    return monitor_navigation_with_block_handling(client, max_total_time=300, max_continuous_block_time=60, wait_forever_on_block=wait_forever_on_block, telemetry=telemetry)
 
 class AGVController:
     """AGV控制器类，封装AGV的所有操作"""
@@ -1002,6 +1747,7 @@ class AGVController:
         self.port = port
         self.logger = logger
         self.client = None
+        self.scheduler = None
         self.monitor = None
         self.is_connected = False
         self.has_control = False
@@ -1017,26 +1763,37 @@ class AGVController:
         """连接AGV"""
         try:
             self._log("info", f"正在连接AGV {self.ip}:{self.port}...")
-            self.client = ModbusTcpClient(self.ip, port=self.port)
+            self.scheduler = ModbusTransactionScheduler(ModbusTcpClient(self.ip, port=self.port), name=f"agv-{self.ip}")
+            self.scheduler.start()
+            self.client = ScheduledModbusClient(self.scheduler, PRIORITY_MOTION)
             
             if self.client.connect():
                 self._log("info", f"成功连接到AGV - {self.ip}:{self.port}")
                 self.is_connected = True
                 
                 # 启动连接监控
-                self.monitor = AGVConnectionMonitor(self.ip, self.port, check_interval=3)
+                self.monitor = AGVConnectionMonitor(self.scheduler, idle_timeout=2.0)
                 self.monitor.add_disconnection_callback(self._on_disconnection)
                 self.monitor.start_monitoring()
                 
                 return True
             else:
                 self._log("error", f"连接失败 - {self.ip}:{self.port}")
+                self._stop_scheduler()
                 return False
                 
         except Exception as e:
             self._log("error", f"连接异常: {e}")
+            self._stop_scheduler()
             return False
             
+    def _stop_scheduler(self):
+        """停止事务调度器并丢弃客户端"""
+        if self.scheduler:
+            self.scheduler.stop()
+            self.scheduler = None
+        self.client = None
+            
     def disconnect(self):
         """断开AGV连接"""
         try:
@@ -1050,7 +1807,8 @@ class AGVController:
                 
             if self.client:
                 self.client.close()
-                self.client = None
+                
+            self._stop_scheduler()
                 
             self.is_connected = False
             self._log("info", "AGV连接已断开")
@@ -1063,6 +1821,7 @@ class AGVController:
         self._log("warning", "AGV连接意外断开")
         self.is_connected = False
         self.has_control = False
+        invalidate_motion_cache(self.client)
         
     def acquire_control(self):
         """抢占控制权"""
@@ -1147,7 +1906,7 @@ class AGVController:
             
         try:
             self._log("info", f"播放音频文件 {audio_id}")
-            success = play_audio(self.client, audio_id, self.logger)
+            success = play_audio(self.client.with_priority(PRIORITY_AUDIO), audio_id, self.logger)
             
             if success:
                 self._log("info", f"音频 {audio_id} 播放指令发送成功")
@@ -1171,13 +1930,15 @@ class AGVController:
         """上下文管理器出口"""
         self.disconnect()
 
-def move_agv_to_station(station_id, logger=None):
+def move_agv_to_station(station_id, logger=None, control_acquired=False, connection=None):
     """
     超简单的AGV移动函数 - 使用全局连接，无需每次建立连接
     
     Args:
         station_id: 目标站点号
         logger: 日志记录器（可选）
+        control_acquired: 调用方是否已提前抢占控制权（如与机械臂作业并行预抢占），默认False
+        connection: 使用的AGV连接会话（AGVConnection），默认为全局连接
         
     Returns:
         bool: True-成功，False-失败
@@ -1195,8 +1956,8 @@ def move_agv_to_station(station_id, logger=None):
     try:
         log(f"开始移动AGV到站点 {station_id}")
         
-        # 使用全局连接管理器
-        global_conn = get_agv_connection()
+        # 使用指定的连接会话或全局连接管理器
+        global_conn = connection or get_agv_connection()
         client = global_conn.get_client()
         
         if not client:
@@ -1204,12 +1965,21 @@ def move_agv_to_station(station_id, logger=None):
             return False
         
         # 抢占控制权并移动
-        if acquire_control(client):
-            success = move_to_station(client, station_id, vx=1.0, vy=0.0, w=0.5)
+        if control_acquired or acquire_control(client):
+            origin = global_conn.cached_station()
+            estimate = global_conn.estimate_travel(station_id, origin)
+            if estimate is not None:
+                log(f"预计 {estimate.seconds:.1f}s 到达站点 {station_id} ({estimate.source})")
+            start = time.monotonic()
+            success = move_to_station(client, station_id, vx=1.0, vy=0.0, w=0.5,
+                                      telemetry=global_conn.get_telemetry_poller())
             release_control(client)  # 释放控制权
             
             if success:
-                log(f"✅ AGV成功到达站点 {station_id}")
+                elapsed = time.monotonic() - start
+                if global_conn.travel_model is not None:
+                    global_conn.travel_model.record(origin, station_id, elapsed)
+                log(f"✅ AGV成功到达站点 {station_id} ({elapsed:.1f}s)")
                 return True
             else:
                 log(f"❌ AGV移动到站点 {station_id} 失败", "error")
@@ -1260,22 +2030,18 @@ def play_audio(client, audio_id, logger=None):
             
         log(f"✅ 成功发送音频播放指令，音频ID: {audio_id}")
         
-        # 等待一小段时间确保指令被处理
-        time.sleep(0.5)
-        
-        # 验证寄存器是否被清零（AGV收到后会将该地址改为0）
+        # 验证寄存器是否被清零（AGV收到后会将该地址改为0），最多等待0.5秒
         try:
-            check_res = client.read_holding_registers(address=ADDR_PLAY_AUDIO, count=1)
-            if not check_res.isError():
-                current_value = check_res.registers[0]
-                if current_value == 0:
-                    log(f"✅ 音频播放指令已被AGV接收并处理")
-                    return True
-                else:
-                    log(f"⚠️ 音频播放指令可能未被处理，当前值: {current_value}", "warning")
-                    return True  # 仍然返回True，因为指令已发送
+            result = wait_until(client, ADDR_PLAY_AUDIO, lambda value: value == 0, timeout=0.5,
+                                register_type=REGISTER_HOLDING)
+            if result.ok:
+                log("✅ 音频播放指令已被AGV接收并处理")
+                return True
+            elif result.value is not None:
+                log(f"⚠️ 音频播放指令可能未被处理，当前值: {result.value}", "warning")
+                return True  # 仍然返回True，因为指令已发送
             else:
-                log(f"无法验证音频播放状态: {check_res}", "warning")
+                log("无法验证音频播放状态", "warning")
                 return True  # 仍然返回True，因为指令已发送
         except Exception as e:
             log(f"验证音频播放状态时发生异常: {e}", "warning")
@@ -1285,32 +2051,47 @@ def play_audio(client, audio_id, logger=None):
         log(f"播放音频异常: {e}", "error")
         return False
 
-def get_current_station(client):
-    """获取AGV当前所在站点"""
+def get_current_station(client, telemetry=None, max_age=1.0):
+    """
+    获取AGV当前所在站点
+    
+    Args:
+        client: Modbus客户端
+        telemetry: 后台遥测轮询器（可选），缓存数据足够新时不发起读取
+        max_age: 可接受的缓存数据最大年龄(秒)，默认1秒
+        
+    Returns:
+        int: 有效站点号，不在有效站点或读取失败返回None
+    """
     try:
-        res = client.read_input_registers(address=INPUT_CURRENT_STATION, count=1)
-        if not res.isError():
+        cached = telemetry.get(max_age) if telemetry is not None else None
+        if cached is not None:
+            raw_value = cached.current_station
+            print(f"🏷️  [STATION] 当前缓存的站点号: {raw_value} (数据年龄 {cached.age:.2f}s)")
+        else:
+            res = client.read_input_registers(address=INPUT_CURRENT_STATION, count=1)
+            if res.isError():
+                print(f"[ERROR] 读取当前站点失败: {res}")
+                return None
             raw_value = res.registers[0]
             print(f"🏷️  [STATION] 当前读取到的站点号: {raw_value}")
-            print(f"[DEBUG] AGV原始寄存器值: {raw_value}")
-            
-            # 定义有效站点列表
-            valid_stations = [4, 5, 8, 9, 10]
-            
-            # 站点有效性检查
-            if raw_value == 0:
-                print("[INFO] AGV报告站点0，表示不在任何站点")
-                return None
-            elif raw_value in valid_stations:
-                print(f"[INFO] AGV在有效站点: {raw_value}")
-                return raw_value
-            else:
-                print(f"[WARNING] AGV报告未知站点ID: {raw_value}，视为不在有效站点")
-                print(f"[DEBUG] 有效站点列表: {valid_stations}")
-                return None  # 将未知站点ID当作不在任何站点处理
-        else:
-            print(f"[ERROR] 读取当前站点失败: {res}")
+        
+        print(f"[DEBUG] AGV原始寄存器值: {raw_value}")
+        
+        # 定义有效站点列表
+        valid_stations = [4, 5, 8, 9, 10]
+        
+        # 站点有效性检查
+        if raw_value == 0:
+            print("[INFO] AGV报告站点0，表示不在任何站点")
             return None
+        elif raw_value in valid_stations:
+            print(f"[INFO] AGV在有效站点: {raw_value}")
+            return raw_value
+        else:
+            print(f"[WARNING] AGV报告未知站点ID: {raw_value}，视为不在有效站点")
+            print(f"[DEBUG] 有效站点列表: {valid_stations}")
+            return None  # 将未知站点ID当作不在任何站点处理
     except Exception as e:
         print(f"[ERROR] 获取当前站点异常: {e}")
         return None
@@ -1347,8 +2128,8 @@ def initialize_agv_to_station4(logger=None):
             log("AGV全局连接不可用", "error")
             return False
         
-        # 获取当前站点
-        current_station = get_current_station(client)
+        # 获取当前站点（优先使用后台遥测缓存）
+        current_station = get_current_station(client, global_conn.get_telemetry_poller())
         if current_station is None:
             log("⚠️  AGV当前不在任何预设站点（4,5,8,9,10）", "error")
             log("AGV可能在站点0（未定位）或其他未知站点", "error")
@@ -1363,7 +2144,8 @@ def initialize_agv_to_station4(logger=None):
                 alarm_id="agv_unknown_position",
                 interval=3.0,  # 每3秒播放一次
                 audio_duration=2.0,  # 音频时长2秒
-                logger=logger
+                logger=logger,
+                priority=ALARM_PRIORITY_CRITICAL  # AGV位置未知时优先于其他报警播放
             )
             
             log("已启动音频报警，请操作员检查AGV位置并重新定位", "error")
@@ -1396,7 +2178,8 @@ def initialize_agv_to_station4(logger=None):
                 alarm_id="agv_unknown_station",
                 interval=3.0,  # 每3秒播放一次
                 audio_duration=2.0,  # 音频时长2秒
-                logger=logger
+                logger=logger,
+                priority=ALARM_PRIORITY_CRITICAL  # AGV位置未知时优先于其他报警播放
             )
             
             log(f"AGV在未识别的站点{current_station}，已启动音频报警", "error")
@@ -1443,9 +2226,9 @@ def simple_play_audio(audio_id, logger=None):
     try:
         log(f"开始播放AGV音频 {audio_id}")
         
-        # 使用全局连接管理器
+        # 使用全局连接管理器，音频事务优先级低于运动控制命令
         global_conn = get_agv_connection()
-        client = global_conn.get_client()
+        client = global_conn.get_client(PRIORITY_AUDIO)
         
         if not client:
             log("AGV全局连接不可用", "error")
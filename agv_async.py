@@ -0,0 +1,462 @@
+"""
+AGV asyncio驱动 - 基于pymodbus异步TCP客户端
+
+与AGV.py中的阻塞函数并存：所有等待均为可取消的协程，一个事件循环即可同时监管
+导航、报警与遥测，不必为每个关注点占用一个系统线程。
+AGVAsyncFacade 在后台线程中运行事件循环，为同步代码（如main.py）提供阻塞调用接口。
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+from pymodbus.client import AsyncModbusTcpClient
+
+from AGV import (
+    MODBUS_IP, MODBUS_PORT,
+    COIL_RELOCATE_HOME, COIL_CONFIRM_LOCALIZATION, COIL_CANCEL_NAVIGATION,
+    COIL_ACQUIRE_CONTROL, COIL_RELEASE_CONTROL, INPUT_LOCALIZATION_STATE, INPUT_NAVIGATION_STATE,
+    ADDR_TARGET_STATION, ADDR_PLAY_AUDIO, MOTION_SPEED_START, encode_speed_block,
+    SNAPSHOT_INPUT_START, SNAPSHOT_INPUT_COUNT, SNAPSHOT_COIL_START, SNAPSHOT_COIL_COUNT,
+    AGVSnapshot,
+    check_agv_status, check_block_status, print_detailed_sensor_status,
+)
+from utils.polling import AdaptiveInterval, async_poll_until
+from utils.tracing import trace_event, trace_span
+
+
+class AGVAsyncError(Exception):
+    """AGV异步通信错误"""
+
+
+class AsyncAGVDriver:
+    """AGV asyncio驱动，提供AGV.py各项操作的协程版本"""
+
+    def __init__(self, ip=MODBUS_IP, port=MODBUS_PORT, logger=None, timeout=3.0):
+        self.ip = ip
+        self.port = port
+        self.logger = logger
+        self.timeout = timeout
+        self.client = None  # 需在事件循环内创建，见 connect()
+        self.has_control = False
+        self._io_lock = None
+        self._speed_cache = None  # 最近一次成功写入的速度块
+
+    def _log(self, level, message):
+        """统一日志记录"""
+        if self.logger:
+            getattr(self.logger, level)(message)
+        else:
+            print(f"[{level.upper()}] {message}")
+
+    # ------------------------------------------------------------------
+    # 连接与底层读写
+    # ------------------------------------------------------------------
+    async def connect(self):
+        """连接AGV"""
+        if self._io_lock is None:
+            self._io_lock = asyncio.Lock()
+        if self.client is None:
+            self.client = AsyncModbusTcpClient(self.ip, port=self.port, timeout=self.timeout)
+        self._log("info", f"正在连接AGV {self.ip}:{self.port} (asyncio)...")
+        connected = await self.client.connect()
+        if connected:
+            self._log("info", f"成功连接到AGV - {self.ip}:{self.port}")
+        else:
+            self._log("error", f"连接失败 - {self.ip}:{self.port}")
+        return connected
+
+    async def close(self):
+        """断开连接（持有控制权时先释放）"""
+        if self.client is None:
+            return
+        if self.has_control and self.client.connected:
+            await self.release_control()
+        self.client.close()
+        self._speed_cache = None
+        self._log("info", "AGV连接已断开")
+
+    async def _request(self, method, *args, **kwargs):
+        """串行执行一次Modbus请求，错误响应抛出AGVAsyncError"""
+        if self._io_lock is None:
+            self._io_lock = asyncio.Lock()
+        if self.client is None:
+            raise AGVAsyncError("AGV未连接")
+        with trace_span(f"modbus:{method}", category="modbus", scheduler="agv_async"):
+            async with self._io_lock:
+                result = await getattr(self.client, method)(*args, **kwargs)
+            if result.isError():
+                raise AGVAsyncError(f"{method} 失败: {result}")
+        return result
+
+    async def read_snapshot(self, include_coils=False):
+        """批量读取AGV状态快照"""
+        res = await self._request("read_input_registers", SNAPSHOT_INPUT_START, count=SNAPSHOT_INPUT_COUNT)
+        coils = None
+        if include_coils:
+            coil_res = await self._request("read_coils", SNAPSHOT_COIL_START, count=SNAPSHOT_COIL_COUNT)
+            coils = coil_res.bits
+        return AGVSnapshot(res.registers, coils)
+
+    async def _read_coil(self, address):
+        res = await self._request("read_coils", address, count=1)
+        return res.bits[0]
+
+    async def _write_coil(self, address, value=True):
+        await self._request("write_coil", address, value)
+
+    async def _write_speeds(self, vx, vy, w):
+        """一次写入VX..W速度块，与上次写入相同时跳过；返回是否实际写入"""
+        speeds = encode_speed_block(vx, vy, w)
+        if speeds == self._speed_cache:
+            return False
+        self._speed_cache = None
+        await self._request("write_registers", MOTION_SPEED_START, speeds)
+        self._speed_cache = speeds
+        return True
+
+    async def _wait_until(self, probe, predicate, timeout):
+        """自适应等待 probe() 的结果满足条件，读取失败视为未知值继续等待"""
+        async def safe_probe():
+            try:
+                return await probe()
+            except AGVAsyncError as e:
+                self._log("warning", f"读取状态失败: {e}")
+                return None
+        return await async_poll_until(safe_probe, predicate, timeout)
+
+    async def _read_localization_state(self):
+        res = await self._request("read_input_registers", INPUT_LOCALIZATION_STATE, count=1)
+        return res.registers[0]
+
+    async def _read_navigation_state(self):
+        res = await self._request("read_input_registers", INPUT_NAVIGATION_STATE, count=1)
+        return res.registers[0]
+
+    async def _read_holding(self, address):
+        res = await self._request("read_holding_registers", address, count=1)
+        return res.registers[0]
+
+    # ------------------------------------------------------------------
+    # 状态与定位
+    # ------------------------------------------------------------------
+    async def get_status(self):
+        """检查AGV当前状态，返回与 check_agv_status 相同的字典"""
+        return check_agv_status(None, await self.read_snapshot())
+
+    async def relocate_at_home(self, timeout=30.0):
+        """在Home点重定位，等待过程可取消"""
+        self._log("info", "开始在Home点重定位...")
+        await self._write_coil(COIL_RELOCATE_HOME)
+
+        result = await self._wait_until(self._read_localization_state, lambda state: state in (0, 1, 3), timeout)
+        self._log("debug", f"重定位进度 - 定位状态: {result.value} (耗时{result.elapsed:.2f}s)")
+        if result.ok and result.value in (1, 3):
+            self._log("info", "✅ 重定位成功")
+            return True
+        if result.ok:
+            self._log("error", "❌ 重定位失败")
+            return False
+
+        self._log("warning", "⏳ 重定位超时")
+        return False
+
+    async def confirm_localization(self, timeout=2.0):
+        """确认定位正确"""
+        await self._write_coil(COIL_CONFIRM_LOCALIZATION)
+        result = await self._wait_until(self._read_localization_state, lambda state: state == 1, timeout)
+        if result.ok:
+            self._log("info", "✅ 定位状态确认成功")
+            return True
+        self._log("error", f"❌ 定位状态确认失败，当前状态: {result.value}")
+        return False
+
+    async def ensure_proper_localization(self):
+        """确保AGV处于正确的定位状态"""
+        status = await self.get_status()
+        if status.get('fatal', 0) != 0:
+            self._log("error", "AGV存在Fatal错误，无法继续操作")
+            return False
+
+        loc_state = status.get('localization', -1)
+        if loc_state == 0:
+            if not await self.relocate_at_home():
+                return False
+            loc_state = (await self.get_status()).get('localization', -1)
+
+        if loc_state == 3 and not await self.confirm_localization():
+            return False
+
+        return (await self.get_status()).get('localization', -1) == 1
+
+    # ------------------------------------------------------------------
+    # 控制权
+    # ------------------------------------------------------------------
+    async def acquire_control(self, timeout=2.0):
+        """抢占AGV控制权"""
+        self._log("info", "开始抢占控制权...")
+        if not await self.ensure_proper_localization():
+            self._log("error", "定位状态不正确，无法抢占控制权")
+            return False
+
+        await self._write_coil(COIL_ACQUIRE_CONTROL)
+
+        # 线圈被设备自动清零表示抢占成功
+        result = await self._wait_until(lambda: self._read_coil(COIL_ACQUIRE_CONTROL), lambda val: not val, timeout)
+        if not result.ok:
+            self._log("error", "❌ 抢占控制权失败，线圈未清零")
+            return False
+
+        if (await self.get_status()).get('control', -1) != 0:
+            self._log("error", "❌ 控制权状态确认失败")
+            return False
+
+        self.has_control = True
+        self._log("info", "✅ 成功抢占控制权")
+        return True
+
+    async def release_control(self, timeout=2.0):
+        """释放AGV控制权"""
+        self._log("info", "开始释放控制权...")
+        await self._write_coil(COIL_RELEASE_CONTROL)
+
+        result = await self._wait_until(lambda: self._read_coil(COIL_RELEASE_CONTROL), lambda val: not val, timeout)
+        if result.ok:
+            self.has_control = False
+            self._log("info", "✅ 成功释放控制权")
+            return (await self.get_status()).get('control', -1) == 0
+
+        self._log("error", "❌ 释放控制权超时")
+        return False
+
+    # ------------------------------------------------------------------
+    # 导航
+    # ------------------------------------------------------------------
+    async def cancel_navigation(self):
+        """向AGV发送取消导航命令"""
+        self._log("warning", "发送取消导航命令")
+        await self._write_coil(COIL_CANCEL_NAVIGATION)
+
+    async def monitor_navigation(self, max_total_time=300, max_continuous_block_time=60,
+                                 wait_forever_on_block=False, previous_state=None):
+        """
+        导航监控协程，处理阻挡等待
+
+        Args:
+            max_total_time: 总超时时间(秒)
+            max_continuous_block_time: 连续阻挡最大等待时间(秒)
+            wait_forever_on_block: 是否无限等待障碍物消失
+            previous_state: 下发目标站点前的导航状态（可选），状态离开该值即视为命令已生效
+
+        Returns:
+            bool: 导航是否成功；任务被取消时抛出 asyncio.CancelledError
+        """
+        start_time = time.monotonic()
+        block_start_time = None
+        interval = AdaptiveInterval(min_interval=0.1, max_interval=1.0)
+
+        # 等待导航命令生效（进入执行状态或离开下发前的状态），最多0.5秒，避免读到上一次导航的结束状态
+        def accepted(state):
+            return state in (1, 2, 3) or (previous_state is not None and state != previous_state)
+        await self._wait_until(self._read_navigation_state, accepted, 0.5)
+
+        while time.monotonic() - start_time < max_total_time:
+            now = time.monotonic()
+            try:
+                snapshot = await self.read_snapshot()
+            except AGVAsyncError as e:
+                self._log("warning", f"读取导航状态失败: {e}")
+                await asyncio.sleep(interval.next(None))  # 连续失败时按同一策略退避
+                continue
+
+            nav_status = snapshot.navigation_state
+            if nav_status == 4:
+                self._log("info", "✅ 机器人已到达目标站点")
+                return True
+            if nav_status in (5, 6, 7):
+                status_desc = {5: "失败", 6: "取消", 7: "超时"}.get(nav_status)
+                self._log("error", f"❌ 导航{status_desc}，状态码={nav_status}")
+                return False
+
+            is_blocked, block_reason = check_block_status(None, snapshot)
+            if is_blocked:
+                if block_start_time is None:
+                    block_start_time = now
+                    block_info = {"reason": block_reason, "reason_code": snapshot.block_reason,
+                                  "x": round(snapshot.block_x, 2), "y": round(snapshot.block_y, 2)}
+                    self._log("warning", f"🚧 AGV被阻挡: {block_reason}，开始等待...")
+                    print_detailed_sensor_status(None, await self.read_snapshot(include_coils=True))
+                else:
+                    block_duration = now - block_start_time
+                    if not wait_forever_on_block and block_duration > max_continuous_block_time:
+                        self._log("error", f"⏰ AGV连续阻挡时间过长({block_duration:.1f}秒)")
+                        trace_event("agv:blockage", category="agv", seconds=round(block_duration, 3),
+                                    resolved=False, **block_info)
+                        return False
+            elif block_start_time is not None:
+                self._log("info", f"✅ 阻挡解除，继续前进 (阻挡持续了{now - block_start_time:.1f}秒)")
+                trace_event("agv:blockage", category="agv", seconds=round(now - block_start_time, 3),
+                            resolved=True, **block_info)
+                block_start_time = None
+
+            await asyncio.sleep(interval.next((nav_status, is_blocked)))
+
+        self._log("error", f"⏳ 导航总超时({max_total_time}s)")
+        return False
+
+    async def move_to_station(self, station_id, vx=1.0, vy=0.0, w=0.5,
+                              wait_forever_on_block=True, cancel_on_abort=False):
+        """
+        控制AGV移动到指定站点
+
+        Args:
+            station_id: 目标站点号
+            vx, vy, w: 速度参数，范围同 AGV.move_to_station
+            wait_forever_on_block: 遇到障碍物时是否无限等待
+            cancel_on_abort: 等待被取消时是否同时向AGV发送取消导航命令，默认False（仅停止等待）
+
+        Returns:
+            bool: 是否成功到达目标站点
+        """
+        if not (0 < vx <= 3.0) or not (-3.0 <= vy <= 3.0) or not (-6.28 <= w <= 6.28):
+            self._log("error", f"速度参数超出范围: VX={vx}, VY={vy}, W={w}")
+            return False
+
+        self._log("info", f"开始移动到站点 {station_id}, 速度参数: VX={vx}, VY={vy}, W={w}")
+        with trace_span("agv:navigation", category="agv", station=station_id, vx=vx, vy=vy, w=w) as span:
+            if not await self._write_speeds(vx, vy, w):
+                self._log("debug", "速度参数与上次下发相同，跳过写入")
+            try:
+                previous_state = await self._read_navigation_state()
+            except AGVAsyncError:
+                previous_state = None
+            await self._request("write_register", ADDR_TARGET_STATION, station_id)
+
+            try:
+                arrived = await self.monitor_navigation(wait_forever_on_block=wait_forever_on_block,
+                                                        previous_state=previous_state)
+            except asyncio.CancelledError:
+                self._log("warning", f"移动到站点 {station_id} 的等待已取消")
+                span.set_status("cancelled")
+                if cancel_on_abort:
+                    await asyncio.shield(self.cancel_navigation())
+                raise
+            span.set_attribute("arrived", arrived)
+            span.set_status(arrived)
+            return arrived
+
+    async def move_agv_to_station(self, station_id, cancel_on_abort=False):
+        """抢占控制权、移动到站点并释放控制权"""
+        if not await self.acquire_control():
+            self._log("error", "AGV控制权抢占失败")
+            return False
+        try:
+            return await self.move_to_station(station_id, cancel_on_abort=cancel_on_abort)
+        finally:
+            await asyncio.shield(self.release_control())
+
+    # ------------------------------------------------------------------
+    # 音频
+    # ------------------------------------------------------------------
+    async def play_audio(self, audio_id, verify_timeout=0.5):
+        """AGV播放音频文件，轮询确认AGV已接收（最多 verify_timeout 秒），等待不阻塞其他协程"""
+        if not isinstance(audio_id, int) or audio_id < 1:
+            self._log("error", f"无效的音频ID: {audio_id}，音频ID必须是大于0的整数")
+            return False
+
+        await self._request("write_register", ADDR_PLAY_AUDIO, audio_id)
+        self._log("info", f"✅ 成功发送音频播放指令，音频ID: {audio_id}")
+
+        # AGV收到后将该地址清零
+        result = await self._wait_until(lambda: self._read_holding(ADDR_PLAY_AUDIO), lambda value: value == 0,
+                                        verify_timeout)
+        if result.value is None:
+            self._log("warning", "无法验证音频播放状态")
+        elif not result.ok:
+            self._log("warning", f"⚠️ 音频播放指令可能未被处理，当前值: {result.value}")
+        return True  # 指令已发送
+
+
+class AGVAsyncFacade:
+    """
+    AsyncAGVDriver 的同步门面
+
+    在后台线程中运行事件循环；阻塞方法与AGV.py的同名函数行为一致，
+    start_move() 返回可立即取消的 concurrent.futures.Future。
+    """
+
+    def __init__(self, ip=MODBUS_IP, port=MODBUS_PORT, logger=None):
+        self.driver = AsyncAGVDriver(ip, port, logger)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="agv-asyncio", daemon=True)
+        self._thread.start()
+        self._current_move = None
+
+    def submit(self, coro):
+        """在事件循环中调度协程，返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run(self, coro, timeout=None):
+        """在事件循环中执行协程并阻塞等待结果"""
+        return self.submit(coro).result(timeout)
+
+    def connect(self):
+        return self.run(self.driver.connect())
+
+    def close(self):
+        """断开连接并停止事件循环"""
+        try:
+            self.run(self.driver.close(), timeout=10)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=2)
+
+    def get_status(self):
+        return self.run(self.driver.get_status())
+
+    def acquire_control(self):
+        return self.run(self.driver.acquire_control())
+
+    def release_control(self):
+        return self.run(self.driver.release_control())
+
+    def relocate_at_home(self):
+        return self.run(self.driver.relocate_at_home())
+
+    def play_audio(self, audio_id):
+        return self.run(self.driver.play_audio(audio_id))
+
+    def start_move(self, station_id, cancel_on_abort=False):
+        """开始移动到站点（抢占/释放控制权），立即返回Future"""
+        self._current_move = self.submit(self.driver.move_agv_to_station(station_id, cancel_on_abort))
+        return self._current_move
+
+    def move_agv_to_station(self, station_id, cancel_on_abort=False):
+        """移动到站点并阻塞等待结果，被取消时返回False"""
+        future = self.start_move(station_id, cancel_on_abort)
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            self.driver._log("warning", f"移动到站点 {station_id} 已取消")
+            return False
+        except Exception as e:
+            self.driver._log("error", f"AGV移动异常: {e}")
+            return False
+        except BaseException:
+            future.cancel()
+            raise
+
+    def cancel_move(self):
+        """立即取消正在进行的导航等待"""
+        if self._current_move is not None and not self._current_move.done():
+            return self._current_move.cancel()
+        return False
+
+    def __enter__(self):
+        if self.connect():
+            return self
+        self.close()
+        raise ConnectionError("无法连接到AGV")
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
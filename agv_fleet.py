@@ -0,0 +1,438 @@
+"""
+多AGV车队管理 - 一个进程内同时管理多台AGV
+
+每台AGV一个 AGVSession：独立的连接会话（AGV.AGVConnection：事务调度器、健康监控、后台遥测）
+和独立的命令队列/工作线程，一台AGV的导航不会阻塞其他AGV。
+AGVFleet 接收"移动到站点"请求，按代价选择最合适的空闲AGV执行；没有空闲AGV时请求排队，
+有AGV空闲后按提交顺序分派。
+
+用法:
+    fleet = AGVFleet(logger)
+    fleet.add_agv("agv1", "192.168.2.112")
+    fleet.add_agv("agv2", "192.168.2.113")
+    result = fleet.move_agv_to_station(5)             # 阻塞，由车队选择AGV
+    future = fleet.dispatch(8, agv_id="agv2")         # 指定AGV，返回Future
+    print(fleet.state())
+
+    python agv_fleet.py --simulate 3 --move 5 --move 8 --move 9   # 使用本地模拟器演示
+"""
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from AGV import AGVConnection, move_agv_to_station
+from utils.polling import poll_until
+from utils.tracing import current_span, trace_span
+
+# AGV状态
+AGV_IDLE = "idle"          # 在线、无故障、无待执行命令
+AGV_BUSY = "busy"          # 正在执行或有排队的命令
+AGV_OFFLINE = "offline"    # 连接断开或遥测数据过旧
+AGV_FAULT = "fault"        # 存在Fatal/Error错误码
+
+# 遥测数据超过该年龄(秒)视为离线
+DEFAULT_MAX_TELEMETRY_AGE = 3.0
+
+DispatchResult = namedtuple('DispatchResult', ['agv_id', 'station', 'success', 'wait', 'elapsed'])
+DispatchResult.__doc__ = """
+分派结果
+
+agv_id: 执行请求的AGV
+station: 目标站点
+success: 是否到达
+wait: 请求排队等待分派和AGV命令队列的时间(秒)
+elapsed: 导航耗时(秒)
+"""
+
+
+def station_hop_cost(from_station, to_station):
+    """默认代价：已在目标站点为0，位置未知为2，其余为1"""
+    if from_station == to_station:
+        return 0
+    return 2 if from_station is None else 1
+
+
+class AGVSession:
+    """
+    车队中的一台AGV：连接会话 + 串行执行命令的工作线程
+
+    Args:
+        agv_id: AGV标识
+        connection: AGV.AGVConnection（或接口相同的对象）
+        max_telemetry_age: 遥测数据超过该年龄视为离线
+    """
+
+    def __init__(self, agv_id, connection, max_telemetry_age=DEFAULT_MAX_TELEMETRY_AGE):
+        self.id = agv_id
+        self.connection = connection
+        self.max_telemetry_age = max_telemetry_age
+        self.target_station = None
+        self.completed = 0
+        self.failed = 0
+        self.last_finished = 0.0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker_loop, name=f"agv-{agv_id}", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """排队和执行中的命令数"""
+        return self._pending
+
+    def telemetry(self):
+        """最新遥测状态（无网络I/O），无可用数据或过旧时为None"""
+        return self.connection.get_telemetry(max_age=self.max_telemetry_age)
+
+    @property
+    def current_station(self):
+        telemetry = self.telemetry()
+        return telemetry.current_station if telemetry else None
+
+    @property
+    def status(self):
+        telemetry = self.telemetry()
+        if not self.connection.is_connected() or telemetry is None:
+            return AGV_OFFLINE
+        if telemetry.fatal_code or telemetry.error_code:
+            return AGV_FAULT
+        return AGV_BUSY if self._pending else AGV_IDLE
+
+    def submit(self, func, *args, **kwargs):
+        """
+        将命令加入该AGV的命令队列，按提交顺序执行
+
+        Returns:
+            Future: 命令的返回值
+        """
+        future = concurrent.futures.Future()
+        with self._lock:
+            self._pending += 1
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def move_to(self, station_id, logger=None):
+        """将移动命令加入命令队列，Future结果为是否到达"""
+        return self.submit(self.navigate, station_id, logger)
+
+    def navigate(self, station_id, logger=None):
+        """在调用线程中执行移动（应在该AGV的命令队列中调用，见 move_to），返回是否到达"""
+        self.target_station = station_id
+        try:
+            return move_agv_to_station(station_id, logger, connection=self.connection)
+        finally:
+            self.target_station = None
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, func, args, kwargs = item
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(func(*args, **kwargs))
+                    except Exception as e:
+                        future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                    self.last_finished = time.monotonic()
+
+    def state(self):
+        """该AGV的状态字典"""
+        telemetry = self.telemetry()
+        return {
+            "id": self.id,
+            "endpoint": f"{getattr(self.connection, 'ip', '?')}:{getattr(self.connection, 'port', '?')}",
+            "status": self.status,
+            "station": telemetry.current_station if telemetry else None,
+            "target_station": self.target_station,
+            "navigation_state": telemetry.navigation_state if telemetry else None,
+            "blocked": bool(telemetry.is_blocked) if telemetry else None,
+            "fatal_code": telemetry.fatal_code if telemetry else None,
+            "error_code": telemetry.error_code if telemetry else None,
+            "telemetry_age": telemetry.age if telemetry else None,
+            "pending": self._pending,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    def close(self):
+        """停止工作线程（排队的命令执行完后）并关闭连接"""
+        self._queue.put(None)
+        self._thread.join()
+        self.connection.close()
+
+
+class _FleetRequest:
+    __slots__ = ("station", "agv_id", "logger", "future", "submitted", "parent")
+
+    def __init__(self, station, agv_id, logger):
+        self.station = station
+        self.agv_id = agv_id
+        self.logger = logger
+        self.future = concurrent.futures.Future()
+        self.submitted = time.monotonic()
+        self.parent = current_span()
+
+
+class AGVFleet:
+    """
+    多AGV车队管理器
+
+    Args:
+        logger: 日志记录器（可选）
+        cost: cost(当前站点, 目标站点) -> 数值，选择代价最小的空闲AGV，默认为 travel_model 的预计行驶时间，
+              未指定 travel_model 时为 station_hop_cost；代价相同时选择完成任务较少、空闲较久的AGV
+        telemetry_interval: 各AGV后台遥测轮询间隔(秒)
+        max_telemetry_age: 遥测数据超过该年龄(秒)视为离线
+        travel_model: 站点行驶时间模型（agv_travel.StationTravelModel），各AGV共用，记录每次移动的耗时
+    """
+
+    def __init__(self, logger=None, cost=None, telemetry_interval=0.5,
+                 max_telemetry_age=DEFAULT_MAX_TELEMETRY_AGE, travel_model=None):
+        self.logger = logger
+        self.travel_model = travel_model
+        self.cost = cost or (travel_model.travel_time if travel_model is not None else station_hop_cost)
+        self.telemetry_interval = telemetry_interval
+        self.max_telemetry_age = max_telemetry_age
+        self.sessions = collections.OrderedDict()
+        self.dispatched = 0
+        self._pending = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        # 命令完成时会通知调度线程；AGV恢复在线、故障清除等遥测变化不会通知，有等待的请求时以该间隔重新检查
+        self._recheck_interval = 0.2
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="agv-fleet", daemon=True)
+        self._dispatcher.start()
+
+    def _log(self, msg, level="info"):
+        if self.logger:
+            getattr(self.logger, level)(msg)
+        else:
+            print(f"[FLEET] {msg}")
+
+    # ------------------------------------------------------------------
+    # AGV管理
+    # ------------------------------------------------------------------
+    def add_agv(self, agv_id, ip, port=502):
+        """连接一台AGV并加入车队，返回AGVSession"""
+        connection = AGVConnection(ip, port, name=str(agv_id), telemetry_interval=self.telemetry_interval)
+        return self.add_session(AGVSession(agv_id, connection, self.max_telemetry_age))
+
+    def add_session(self, session):
+        """加入已创建的AGVSession"""
+        with self._condition:
+            if session.id in self.sessions:
+                raise ValueError(f"AGV {session.id} 已在车队中")
+            self.sessions[session.id] = session
+            if self.travel_model is not None:
+                session.connection.set_travel_model(self.travel_model)
+            self._condition.notify_all()
+        self._log(f"AGV {session.id} 加入车队 ({session.state()['endpoint']})")
+        return session
+
+    def remove_agv(self, agv_id):
+        """移出车队并关闭连接（已分派给它的命令执行完后）"""
+        with self._condition:
+            session = self.sessions.pop(agv_id)
+        session.close()
+        self._log(f"AGV {agv_id} 已移出车队")
+
+    # ------------------------------------------------------------------
+    # 分派
+    # ------------------------------------------------------------------
+    def select_agv(self, station_id):
+        """选择执行移动到 station_id 的最佳空闲AGV，没有空闲AGV时返回None"""
+        candidates = []
+        for order, session in enumerate(self.sessions.values()):
+            if session.status != AGV_IDLE:
+                continue
+            cost = self.cost(session.current_station, station_id)
+            candidates.append((cost, session.completed + session.failed, session.last_finished, order, session))
+        return min(candidates)[-1] if candidates else None
+
+    def dispatch(self, station_id, logger=None, agv_id=None):
+        """
+        提交移动请求
+
+        Args:
+            station_id: 目标站点
+            logger: 该请求使用的日志记录器（可选）
+            agv_id: 指定执行的AGV，默认由车队选择
+
+        Returns:
+            Future: 结果为 DispatchResult；请求可通过 future.cancel() 在分派前取消
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("车队已关闭")
+            if agv_id is not None and agv_id not in self.sessions:
+                raise KeyError(f"AGV {agv_id} 不在车队中")
+            request = _FleetRequest(station_id, agv_id, logger)
+            self._pending.append(request)
+            self._condition.notify_all()
+        return request.future
+
+    def move_agv_to_station(self, station_id, logger=None, agv_id=None, timeout=None):
+        """
+        阻塞版本的 dispatch，与 AGV.move_agv_to_station 用法相同
+
+        Returns:
+            DispatchResult: 等待超时时抛出 concurrent.futures.TimeoutError
+        """
+        return self.dispatch(station_id, logger, agv_id).result(timeout)
+
+    def _assign(self, request, session):
+        """将请求交给AGV的命令队列（需持有锁）"""
+        if not request.future.set_running_or_notify_cancel():
+            return
+        self.dispatched += 1
+        assigned = time.monotonic()
+        self._log(f"站点 {request.station} 的移动请求分派给 AGV {session.id} "
+                  f"(当前站点 {session.current_station}，排队 {assigned - request.submitted:.2f}s)")
+
+        def run():
+            start = time.monotonic()
+            with trace_span("fleet:move", category="agv", parent=request.parent, agv=session.id,
+                            station=request.station, wait_ms=round((start - request.submitted) * 1000, 1)) as span:
+                success = session.navigate(request.station, request.logger)
+                span.set_status(bool(success))
+            if success:
+                session.completed += 1
+            else:
+                session.failed += 1
+            return DispatchResult(session.id, request.station, bool(success), start - request.submitted,
+                                  time.monotonic() - start)
+
+        command = session.submit(run)
+        command.add_done_callback(lambda done: self._complete(request, done))
+
+    def _complete(self, request, command):
+        error = command.exception()
+        if error is not None:
+            request.future.set_exception(error)
+        else:
+            request.future.set_result(command.result())
+        with self._condition:
+            self._condition.notify_all()
+
+    def _dispatch_loop(self):
+        with self._condition:
+            while not self._closed:
+                waiting = collections.deque()
+                while self._pending:
+                    request = self._pending.popleft()
+                    if request.future.cancelled():
+                        continue
+                    if request.agv_id is not None:
+                        session = self.sessions.get(request.agv_id)
+                        if session is None:
+                            request.future.set_exception(KeyError(f"AGV {request.agv_id} 不在车队中"))
+                        else:
+                            self._assign(request, session)  # 指定AGV：直接进入其命令队列
+                        continue
+                    session = self.select_agv(request.station)
+                    if session is None:
+                        waiting.append(request)
+                    else:
+                        self._assign(request, session)
+                self._pending = waiting
+                self._condition.wait(self._recheck_interval if waiting else None)
+
+    # ------------------------------------------------------------------
+    # 状态
+    # ------------------------------------------------------------------
+    def state(self):
+        """车队状态：各AGV状态、按状态计数、等待分派的请求数"""
+        with self._condition:
+            agvs = {agv_id: session.state() for agv_id, session in self.sessions.items()}
+            pending = len(self._pending)
+        counts = collections.Counter(agv["status"] for agv in agvs.values())
+        return {
+            "agvs": agvs,
+            "counts": {status: counts.get(status, 0) for status in (AGV_IDLE, AGV_BUSY, AGV_OFFLINE, AGV_FAULT)},
+            "pending_requests": pending,
+            "dispatched": self.dispatched,
+        }
+
+    def close(self):
+        """停止分派（未分派的请求被取消），等待各AGV的命令执行完后关闭连接"""
+        with self._condition:
+            self._closed = True
+            pending, self._pending = list(self._pending), collections.deque()
+            self._condition.notify_all()
+        for request in pending:
+            request.future.cancel()
+        self._dispatcher.join()
+        for agv_id in list(self.sessions):
+            self.remove_agv(agv_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+def _parse_agv(text):
+    """"id=ip:port" 或 "id=ip" -> (id, ip, port)"""
+    agv_id, _, endpoint = text.partition("=")
+    if not endpoint:
+        raise argparse.ArgumentTypeError(f"AGV格式应为 id=ip[:port]: {text}")
+    ip, _, port = endpoint.partition(":")
+    return agv_id, ip, int(port) if port else 502
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多AGV车队管理")
+    parser.add_argument("--agv", action="append", type=_parse_agv, default=[], help="AGV，格式 id=ip[:port]，可重复")
+    parser.add_argument("--simulate", type=int, default=0, help="启动N台本地AGV模拟器加入车队")
+    parser.add_argument("--time-scale", type=float, default=0.1, help="模拟器行驶时间缩放系数")
+    parser.add_argument("--move", action="append", type=int, default=[], help="移动请求的目标站点，可重复，同时提交")
+    parser.add_argument("--travel-model", help="站点行驶时间模型文件，按预计行驶时间选择AGV并记录实测耗时")
+    args = parser.parse_args()
+
+    simulators = []
+    if args.simulate:
+        from agv_simulator import AGVSimulator, DEFAULT_STATIONS
+        stations = itertools.cycle(sorted(DEFAULT_STATIONS))
+        for index in range(args.simulate):
+            simulator = AGVSimulator(port=0, initial_station=next(stations), time_scale=args.time_scale, verbose=False)
+            simulator.start()
+            simulators.append(simulator)
+            args.agv.append((f"sim{index + 1}", "127.0.0.1", simulator.port))
+
+    try:
+        travel_model = None
+        if args.travel_model:
+            from agv_travel import StationTravelModel
+            travel_model = StationTravelModel.load(args.travel_model)
+        with AGVFleet(travel_model=travel_model) as fleet:
+            for agv_id, ip, port in args.agv:
+                fleet.add_agv(agv_id, ip, port)
+            poll_until(lambda: all(session.telemetry() for session in fleet.sessions.values()), bool, 5.0)  # 等待首次遥测
+            futures = [fleet.dispatch(station) for station in args.move]
+            for future in futures:
+                result = future.result()
+                print(f"[INFO] {result.agv_id} -> 站点 {result.station}: {'成功' if result.success else '失败'}，"
+                      f"等待 {result.wait:.2f}s，导航 {result.elapsed:.2f}s")
+            for agv in fleet.state()["agvs"].values():
+                print(f"[INFO] {agv['id']} ({agv['endpoint']}): {agv['status']}，站点 {agv['station']}，"
+                      f"完成 {agv['completed']}，失败 {agv['failed']}")
+    finally:
+        for simulator in simulators:
+            simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,687 @@
+"""
+本地AGV Modbus TCP模拟器 - 按 AGV.txt 寄存器表模拟AGV，用于无硬件时运行和计时AGV函数及完整工作流程
+
+模拟内容:
+    - 线圈: 重定位、确认定位、暂停/继续/取消导航、抢占/释放控制权（处理后自动清零）
+    - 保持寄存器: 目标站点（导航开始后清零）、VX/VY/W速度、播放音频（接收后清零）
+    - 输入寄存器: 位姿、导航站点、定位状态、导航状态(0→1→2→4)、错误码、当前/上一/下一站点、
+      控制权占用、阻挡原因与位置、实时速度
+    - 离散输入: 减速、阻挡、急停、Fatal/Error/Warning、静止、DI0-DI15
+
+用法:
+    python agv_simulator.py --port 1502 --station 4 --travel-time 5
+    python main.py --robot-backend fake --agv-ip 127.0.0.1 --agv-port 1502
+
+    或在进程内:
+        with AGVSimulator(port=1502, time_scale=0.1) as sim:
+            sim.schedule_blockage(after=1.0, duration=2.0, reason=6)
+            ...
+"""
+import argparse
+import math
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+# Modbus功能码
+FC_READ_COILS = 1
+FC_READ_DISCRETE_INPUTS = 2
+FC_READ_HOLDING_REGISTERS = 3
+FC_READ_INPUT_REGISTERS = 4
+FC_WRITE_SINGLE_COIL = 5
+FC_WRITE_SINGLE_REGISTER = 6
+FC_WRITE_MULTIPLE_COILS = 15
+FC_WRITE_MULTIPLE_REGISTERS = 16
+
+# Modbus异常码
+EXC_ILLEGAL_FUNCTION = 1
+EXC_ILLEGAL_ADDRESS = 2
+EXC_ILLEGAL_VALUE = 3
+
+# 各寄存器区大小
+BANK_SIZE = 256
+
+# 线圈 (文档地址-1)
+COIL_RELOCATE_HOME = 1
+COIL_CONFIRM_LOCALIZATION = 2
+COIL_PAUSE_NAVIGATION = 3
+COIL_RESUME_NAVIGATION = 4
+COIL_CANCEL_NAVIGATION = 5
+COIL_ACQUIRE_CONTROL = 9
+COIL_RELEASE_CONTROL = 10
+COMMAND_COILS = (COIL_RELOCATE_HOME, COIL_CONFIRM_LOCALIZATION, COIL_PAUSE_NAVIGATION,
+                 COIL_RESUME_NAVIGATION, COIL_CANCEL_NAVIGATION, COIL_ACQUIRE_CONTROL, COIL_RELEASE_CONTROL)
+
+# 保持寄存器
+HOLD_TARGET_STATION = 0
+HOLD_VX, HOLD_VY, HOLD_W = 4, 6, 8
+HOLD_PLAY_AUDIO = 29
+
+# 输入寄存器
+IN_ROBOT_X, IN_ROBOT_Y, IN_ROBOT_ANGLE = 0, 2, 4
+IN_NAV_STATION = 6
+IN_LOCALIZATION_STATE = 7
+IN_NAVIGATION_STATE = 8
+IN_NAVIGATION_TYPE = 9
+IN_FATAL_CODE, IN_ERROR_CODE, IN_WARNING_CODE = 30, 31, 32
+IN_CURRENT_STATION = 33
+IN_LAST_STATION = 34
+IN_NEXT_STATION = 35
+IN_CONTROL_OCCUPIED = 42
+IN_BLOCK_REASON = 43
+IN_BLOCK_ULTRASONIC_ID = 44
+IN_BLOCK_DI_ID = 45
+IN_BLOCK_X, IN_BLOCK_Y = 46, 48
+IN_VX, IN_VY, IN_W = 50, 52, 54
+IN_SLOW_REASON = 83
+# AGV.py 从输入寄存器 00002 读取阻挡标志（文档中为离散输入 00002），模拟器同时写入两处
+IN_LEGACY_IS_BLOCKED = 1
+
+# 离散输入
+DI_IS_SLOWING = 0
+DI_IS_BLOCKED = 1
+DI_EMERGENCY_STOP = 3
+DI_HAS_FATAL, DI_HAS_ERROR, DI_HAS_WARNING = 7, 8, 9
+DI_IS_STATIC = 18
+DI_INPUT_START = 19             # DI0-DI15
+
+# 导航状态 (输入寄存器 00009)
+NAV_NONE, NAV_WAITING, NAV_RUNNING, NAV_PAUSED = 0, 1, 2, 3
+NAV_ARRIVED, NAV_FAILED, NAV_CANCELLED, NAV_TIMEOUT = 4, 5, 6, 7
+
+# 定位状态 (输入寄存器 00008)
+LOC_FAILED, LOC_OK, LOC_RELOCATING, LOC_DONE = 0, 1, 2, 3
+
+# 导航类型 (输入寄存器 00010)
+NAV_TYPE_STATION = 3
+
+# 默认站点坐标 (x, y, angle)，与流程使用的有效站点一致
+DEFAULT_STATIONS = {
+    4: (0.0, 0.0, 0.0),
+    5: (3.0, 0.0, 0.0),
+    8: (3.0, 4.0, 1.5708),
+    9: (0.0, 4.0, 3.1416),
+    10: (-3.0, 2.0, -1.5708),
+}
+HOME_STATION = 4
+
+
+def float_to_input_registers(value):
+    """float32 -> 两个输入寄存器（高字在前，与AGV.py读取顺序一致）"""
+    return list(struct.unpack('>HH', struct.pack('>f', value)))
+
+
+def holding_registers_to_float(low, high):
+    """两个保持寄存器 -> float32（低字在前，与速度写入顺序一致）"""
+    return struct.unpack('>f', struct.pack('>HH', high, low))[0]
+
+
+class Blockage:
+    """
+    阻挡注入
+
+    Args:
+        after: 导航开始后多久发生阻挡(秒，模拟时间)
+        duration: 阻挡持续时间(秒)，None表示直到 clear_block() 为止
+        reason: 阻挡原因 (输入寄存器 00044，见 AGV.py SENSOR_REASON_DESC)
+        ultrasonic_id, di_id: 发生阻挡的超声/DI编号
+    """
+
+    def __init__(self, after=0.0, duration=5.0, reason=6, ultrasonic_id=0, di_id=0):
+        self.after = after
+        self.duration = duration
+        self.reason = reason
+        self.ultrasonic_id = ultrasonic_id
+        self.di_id = di_id
+
+
+class AGVSimulator:
+    """
+    AGV Modbus TCP模拟器
+
+    服务线程处理Modbus请求，仿真线程按 tick 推进导航、重定位和阻挡状态。
+    所有时长按 time_scale 缩放（0.1表示以十分之一的时间运行）。
+
+    Args:
+        host, port: 监听地址，port为0时自动分配（见 address 属性）
+        stations: 站点id -> (x, y, angle)，默认 DEFAULT_STATIONS
+        initial_station: 初始所在站点，None表示不在站点
+        travel_time: 站点间行驶时间(秒)；可以是数值，也可以是 callable(from_station, to_station, vx) 返回秒数
+        localization_state: 初始定位状态
+        relocate_time: 重定位耗时(秒)
+        start_delay: 导航从等待执行(1)到执行中(2)的延迟(秒)
+        command_delay: 命令线圈/音频寄存器处理后清零的延迟(秒)
+        block_probability: 每次导航随机发生阻挡的概率
+        block_duration: 随机阻挡的持续时间(秒)
+        seed: 随机数种子
+        time_scale: 时长缩放系数
+        tick: 仿真步长(秒，实际时间)
+        verbose: 是否打印命令日志
+    """
+
+    def __init__(self, host="127.0.0.1", port=1502, stations=None, initial_station=HOME_STATION, travel_time=5.0,
+                 localization_state=LOC_OK, relocate_time=3.0, start_delay=0.2, command_delay=0.05,
+                 block_probability=0.0, block_duration=3.0, seed=None, time_scale=1.0, tick=0.02, verbose=False):
+        self.host = host
+        self.port = port
+        self.stations = dict(DEFAULT_STATIONS if stations is None else stations)
+        self.travel_time = travel_time
+        self.relocate_time = relocate_time
+        self.start_delay = start_delay
+        self.command_delay = command_delay
+        self.block_probability = block_probability
+        self.block_duration = block_duration
+        self.time_scale = time_scale
+        self.tick = tick
+        self.verbose = verbose
+
+        self.coils = [0] * BANK_SIZE
+        self.discrete_inputs = [0] * BANK_SIZE
+        self.holding_registers = [0] * BANK_SIZE
+        self.input_registers = [0] * BANK_SIZE
+
+        # 统计
+        self.request_counts = {}         # 功能码 -> 请求次数
+        self.navigations = []            # (起点, 终点, 开始时间, 结束时间, 结束状态)
+        self.audio_played = []           # (时间, 音频编号)
+
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._pending_clears = []        # (清零时间, 区名称, 地址)
+        self._nav = None                 # 当前导航状态字典
+        self._relocate_done_at = None
+        self._block = None               # (Blockage, 开始时间)
+        self._scheduled_blocks = []      # 下一次导航要注入的 Blockage
+        self._fail_next = None           # 下一次导航的失败状态
+        self._server = None
+        self._threads = []
+        self._stop_event = threading.Event()
+
+        with self._lock:
+            self.input_registers[IN_LOCALIZATION_STATE] = localization_state
+            self._place_at(initial_station)
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+    def start(self):
+        """启动Modbus服务和仿真线程"""
+        simulator = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                simulator._serve_connection(self.request)
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self._server = Server((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.1}, daemon=True),
+            threading.Thread(target=self._simulation_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        self._log(f"AGV模拟器已启动 {self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        """停止服务"""
+        self._stop_event.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        self._threads = []
+
+    @property
+    def address(self):
+        return self.host, self.port
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _log(self, message):
+        if self.verbose:
+            print(f"[AGV_SIM] {message}")
+
+    # ------------------------------------------------------------------
+    # 故障与阻挡注入
+    # ------------------------------------------------------------------
+    def schedule_blockage(self, after=0.0, duration=5.0, reason=6, ultrasonic_id=0, di_id=0):
+        """在下一次导航开始后 after 秒注入阻挡"""
+        with self._lock:
+            self._scheduled_blocks.append(Blockage(after, duration, reason, ultrasonic_id, di_id))
+
+    def set_blocked(self, reason=6, duration=None, ultrasonic_id=0, di_id=0):
+        """立即进入阻挡状态，duration为None时保持到 clear_block()"""
+        with self._lock:
+            self._start_block(Blockage(0.0, duration, reason, ultrasonic_id, di_id), time.monotonic())
+
+    def clear_block(self):
+        with self._lock:
+            self._end_block()
+
+    def inject_fault(self, fatal=0, error=0, warning=0):
+        """设置错误码；Fatal/Error会使正在进行的导航失败"""
+        with self._lock:
+            ir, di = self.input_registers, self.discrete_inputs
+            ir[IN_FATAL_CODE], ir[IN_ERROR_CODE], ir[IN_WARNING_CODE] = fatal, error, warning
+            di[DI_HAS_FATAL], di[DI_HAS_ERROR], di[DI_HAS_WARNING] = int(bool(fatal)), int(bool(error)), int(bool(warning))
+            if (fatal or error) and self._nav is not None:
+                self._finish_navigation(NAV_FAILED)
+
+    def clear_faults(self):
+        self.inject_fault(0, 0, 0)
+
+    def fail_next_navigation(self, status=NAV_FAILED):
+        """下一次导航以指定状态结束（5失败/6取消/7超时）"""
+        with self._lock:
+            self._fail_next = status
+
+    def set_emergency_stop(self, active=True):
+        """急停：导航暂停直到解除"""
+        with self._lock:
+            self.discrete_inputs[DI_EMERGENCY_STOP] = int(active)
+
+    def set_localization_state(self, state):
+        with self._lock:
+            self.input_registers[IN_LOCALIZATION_STATE] = state
+
+    def set_external_control(self, occupied=True):
+        """模拟控制权被外部（调度系统）占用"""
+        with self._lock:
+            self.input_registers[IN_CONTROL_OCCUPIED] = int(occupied)
+
+    def set_di(self, index, value):
+        """设置 DI0-DI15 电平"""
+        with self._lock:
+            self.discrete_inputs[DI_INPUT_START + index] = int(bool(value))
+
+    def teleport(self, station_id):
+        """直接将AGV放到某个站点（None表示不在任何站点）"""
+        with self._lock:
+            self._nav = None
+            self._place_at(station_id)
+
+    # ------------------------------------------------------------------
+    # 状态查询
+    # ------------------------------------------------------------------
+    @property
+    def current_station(self):
+        with self._lock:
+            return self.input_registers[IN_CURRENT_STATION]
+
+    @property
+    def navigation_state(self):
+        with self._lock:
+            return self.input_registers[IN_NAVIGATION_STATE]
+
+    @property
+    def is_blocked(self):
+        with self._lock:
+            return self._block is not None
+
+    # ------------------------------------------------------------------
+    # 寄存器辅助
+    # ------------------------------------------------------------------
+    def _set_input_float(self, address, value):
+        self.input_registers[address:address + 2] = float_to_input_registers(value)
+
+    def _holding_float(self, address):
+        return holding_registers_to_float(self.holding_registers[address], self.holding_registers[address + 1])
+
+    def _set_pose(self, x, y, angle):
+        self._set_input_float(IN_ROBOT_X, x)
+        self._set_input_float(IN_ROBOT_Y, y)
+        self._set_input_float(IN_ROBOT_ANGLE, angle)
+        self._sync_block_flag()
+
+    def _sync_block_flag(self):
+        """阻挡标志写入离散输入 00002，并兼容 AGV.py 读取的输入寄存器 00002"""
+        blocked = int(self._block is not None)
+        self.discrete_inputs[DI_IS_BLOCKED] = blocked
+        self.input_registers[IN_LEGACY_IS_BLOCKED] = blocked
+
+    def _set_speeds(self, vx, vy, w):
+        self._set_input_float(IN_VX, vx)
+        self._set_input_float(IN_VY, vy)
+        self._set_input_float(IN_W, w)
+        self.discrete_inputs[DI_IS_STATIC] = int(vx == 0 and vy == 0 and w == 0)
+
+    def _place_at(self, station_id):
+        if station_id is not None and station_id not in self.stations:
+            raise ValueError(f"未知站点: {station_id}")
+        pose = self.stations.get(station_id, (0.0, 0.0, 0.0))
+        self._pose = pose
+        self._set_pose(*pose)
+        self.input_registers[IN_CURRENT_STATION] = station_id or 0
+        self.input_registers[IN_NAV_STATION] = station_id or 0
+        self._set_speeds(0.0, 0.0, 0.0)
+
+    def _schedule_clear(self, bank, address):
+        self._pending_clears.append((time.monotonic() + self.command_delay, bank, address))
+
+    # ------------------------------------------------------------------
+    # 命令处理（持有锁）
+    # ------------------------------------------------------------------
+    def _on_coil_written(self, address, value):
+        if not value or address not in COMMAND_COILS:
+            return
+        ir = self.input_registers
+        if address == COIL_RELOCATE_HOME:
+            self._log("重定位到Home点")
+            self._nav = None
+            self._place_at(HOME_STATION if HOME_STATION in self.stations else None)
+            ir[IN_LOCALIZATION_STATE] = LOC_RELOCATING
+            self._relocate_done_at = time.monotonic() + self.relocate_time * self.time_scale
+        elif address == COIL_CONFIRM_LOCALIZATION:
+            if ir[IN_LOCALIZATION_STATE] == LOC_DONE:
+                ir[IN_LOCALIZATION_STATE] = LOC_OK
+        elif address == COIL_PAUSE_NAVIGATION:
+            if ir[IN_NAVIGATION_STATE] in (NAV_WAITING, NAV_RUNNING):
+                ir[IN_NAVIGATION_STATE] = NAV_PAUSED
+        elif address == COIL_RESUME_NAVIGATION:
+            if ir[IN_NAVIGATION_STATE] == NAV_PAUSED:
+                ir[IN_NAVIGATION_STATE] = NAV_RUNNING
+        elif address == COIL_CANCEL_NAVIGATION:
+            if self._nav is not None:
+                self._finish_navigation(NAV_CANCELLED)
+        elif address == COIL_ACQUIRE_CONTROL:
+            self._log("控制权已被抢占")
+            ir[IN_CONTROL_OCCUPIED] = 0
+        elif address == COIL_RELEASE_CONTROL:
+            self._log("控制权已释放")
+            ir[IN_CONTROL_OCCUPIED] = 0
+        self._schedule_clear("coils", address)
+
+    def _on_holding_written(self, address, count):
+        written = range(address, address + count)
+        if HOLD_PLAY_AUDIO in written and self.holding_registers[HOLD_PLAY_AUDIO]:
+            self.audio_played.append((time.time(), self.holding_registers[HOLD_PLAY_AUDIO]))
+            self._log(f"播放音频 {self.holding_registers[HOLD_PLAY_AUDIO]}")
+            self._schedule_clear("holding_registers", HOLD_PLAY_AUDIO)
+        if HOLD_TARGET_STATION in written and self.holding_registers[HOLD_TARGET_STATION]:
+            target = self.holding_registers[HOLD_TARGET_STATION]
+            self.holding_registers[HOLD_TARGET_STATION] = 0
+            self._start_navigation(target)
+
+    def _travel_seconds(self, origin, target, vx):
+        if callable(self.travel_time):
+            return float(self.travel_time(origin, target, vx))
+        return float(self.travel_time)
+
+    def _start_navigation(self, target):
+        ir = self.input_registers
+        now = time.monotonic()
+        origin = ir[IN_CURRENT_STATION] or ir[IN_NAV_STATION]
+        if self._nav is not None:
+            self._finish_navigation(NAV_CANCELLED)
+        self._log(f"导航 {origin} -> {target}")
+
+        ir[IN_NAV_STATION] = target
+        ir[IN_NAVIGATION_TYPE] = NAV_TYPE_STATION
+        ir[IN_NAVIGATION_STATE] = NAV_WAITING
+        ir[IN_NEXT_STATION] = target
+        self._nav = {"origin": origin, "target": target, "started_at": now, "progress": 0.0,
+                     "duration": 0.0, "from_pose": self._pose, "blocks": list(self._scheduled_blocks)}
+        self._scheduled_blocks = []
+        self.navigations.append([origin, target, time.time(), None, None])
+
+        # 无法执行的导航按真实AGV的表现立即结束
+        if target not in self.stations:
+            self._finish_navigation(NAV_CANCELLED)
+            return
+        if ir[IN_LOCALIZATION_STATE] != LOC_OK or ir[IN_FATAL_CODE] or ir[IN_ERROR_CODE] or ir[IN_CONTROL_OCCUPIED]:
+            self._finish_navigation(NAV_FAILED)
+            return
+
+        vx = self._holding_float(HOLD_VX)
+        self._nav["duration"] = max(0.0, self._travel_seconds(origin, target, vx)) * self.time_scale
+        if self.block_probability and self._random.random() < self.block_probability:
+            self._nav["blocks"].append(Blockage(self._random.uniform(0.0, self._nav["duration"] / self.time_scale),
+                                                self.block_duration))
+
+    def _finish_navigation(self, status):
+        ir = self.input_registers
+        nav, self._nav = self._nav, None
+        self._end_block()
+        ir[IN_NAVIGATION_STATE] = status
+        ir[IN_NEXT_STATION] = 0
+        self._set_speeds(0.0, 0.0, 0.0)
+        if status == NAV_ARRIVED:
+            self._place_at(nav["target"])
+            ir[IN_LAST_STATION] = nav["target"]
+        if self.navigations and self.navigations[-1][3] is None:
+            self.navigations[-1][3:] = [time.time(), status]
+        self._log(f"导航结束，状态 {status}")
+
+    def _start_block(self, blockage, now):
+        self._block = (blockage, now)
+        ir = self.input_registers
+        ir[IN_BLOCK_REASON] = blockage.reason
+        ir[IN_BLOCK_ULTRASONIC_ID] = blockage.ultrasonic_id
+        ir[IN_BLOCK_DI_ID] = blockage.di_id
+        self._set_input_float(IN_BLOCK_X, self._pose[0])
+        self._set_input_float(IN_BLOCK_Y, self._pose[1])
+        self._set_speeds(0.0, 0.0, 0.0)
+        self._sync_block_flag()
+        self._log(f"注入阻挡，原因 {blockage.reason}")
+
+    def _end_block(self):
+        if self._block is None:
+            return
+        self._block = None
+        self.input_registers[IN_BLOCK_REASON] = 0
+        self._sync_block_flag()
+        self._log("阻挡解除")
+
+    # ------------------------------------------------------------------
+    # 仿真循环
+    # ------------------------------------------------------------------
+    def _simulation_loop(self):
+        last = time.monotonic()
+        while not self._stop_event.wait(self.tick):
+            now = time.monotonic()
+            with self._lock:
+                self._step(now, now - last)
+            last = now
+
+    def _step(self, now, dt):
+        # 命令线圈/音频寄存器延迟清零
+        due = [item for item in self._pending_clears if item[0] <= now]
+        if due:
+            self._pending_clears = [item for item in self._pending_clears if item[0] > now]
+            for _, bank, address in due:
+                getattr(self, bank)[address] = 0
+
+        ir = self.input_registers
+        if self._relocate_done_at is not None and now >= self._relocate_done_at:
+            self._relocate_done_at = None
+            if ir[IN_LOCALIZATION_STATE] == LOC_RELOCATING:
+                ir[IN_LOCALIZATION_STATE] = LOC_DONE
+
+        if self._block is not None:
+            blockage, started = self._block
+            if blockage.duration is not None and now - started >= blockage.duration * self.time_scale:
+                self._end_block()
+
+        nav = self._nav
+        if nav is None:
+            return
+        elapsed = now - nav["started_at"]
+        if ir[IN_NAVIGATION_STATE] == NAV_WAITING:
+            if elapsed < self.start_delay * self.time_scale:
+                return
+            if self._fail_next is not None:
+                status, self._fail_next = self._fail_next, None
+                self._finish_navigation(status)
+                return
+            ir[IN_NAVIGATION_STATE] = NAV_RUNNING
+            ir[IN_CURRENT_STATION] = 0
+            ir[IN_LAST_STATION] = nav["origin"]
+
+        for blockage in list(nav["blocks"]):
+            if elapsed >= (self.start_delay + blockage.after) * self.time_scale:
+                nav["blocks"].remove(blockage)
+                self._start_block(blockage, now)
+
+        if ir[IN_NAVIGATION_STATE] != NAV_RUNNING or self._block is not None or self.discrete_inputs[DI_EMERGENCY_STOP]:
+            self._set_speeds(0.0, 0.0, 0.0)
+            return
+
+        if nav["duration"] > 0:
+            nav["progress"] = min(1.0, nav["progress"] + dt / nav["duration"])
+        else:
+            nav["progress"] = 1.0
+        if nav["progress"] >= 1.0:
+            self._finish_navigation(NAV_ARRIVED)
+            return
+
+        (x0, y0, a0), (x1, y1, a1) = nav["from_pose"], self.stations[nav["target"]]
+        p = nav["progress"]
+        self._pose = (x0 + (x1 - x0) * p, y0 + (y1 - y0) * p, a0 + (a1 - a0) * p)
+        self._set_pose(*self._pose)
+        speed = math.hypot(x1 - x0, y1 - y0) / (nav["duration"] / self.time_scale) if nav["duration"] else 0.0
+        self._set_speeds(speed, 0.0, 0.0)
+
+    # ------------------------------------------------------------------
+    # Modbus TCP协议
+    # ------------------------------------------------------------------
+    def _serve_connection(self, sock):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        buffer = b""
+        while not self._stop_event.is_set():
+            try:
+                data = sock.recv(1024)
+            except OSError:
+                return
+            if not data:
+                return
+            buffer += data
+            while len(buffer) >= 7:
+                transaction_id, protocol_id, length, unit_id = struct.unpack(">HHHB", buffer[:7])
+                if len(buffer) < 6 + length:
+                    break
+                pdu, buffer = buffer[7:6 + length], buffer[6 + length:]
+                response = self._handle_pdu(pdu)
+                header = struct.pack(">HHHB", transaction_id, protocol_id, len(response) + 1, unit_id)
+                try:
+                    sock.sendall(header + response)
+                except OSError:
+                    return
+
+    @staticmethod
+    def _exception(function_code, code):
+        return struct.pack(">BB", function_code | 0x80, code)
+
+    def _handle_pdu(self, pdu):
+        if not pdu:
+            return self._exception(0, EXC_ILLEGAL_FUNCTION)
+        fc = pdu[0]
+        self.request_counts[fc] = self.request_counts.get(fc, 0) + 1
+        try:
+            with self._lock:
+                return self._dispatch(fc, pdu[1:])
+        except (struct.error, IndexError):
+            return self._exception(fc, EXC_ILLEGAL_VALUE)
+
+    def _dispatch(self, fc, body):
+        if fc in (FC_READ_COILS, FC_READ_DISCRETE_INPUTS):
+            address, count = struct.unpack(">HH", body[:4])
+            bank = self.coils if fc == FC_READ_COILS else self.discrete_inputs
+            if count < 1 or address + count > BANK_SIZE:
+                return self._exception(fc, EXC_ILLEGAL_ADDRESS)
+            packed = bytearray((count + 7) // 8)
+            for i, bit in enumerate(bank[address:address + count]):
+                if bit:
+                    packed[i // 8] |= 1 << (i % 8)
+            return struct.pack(">BB", fc, len(packed)) + bytes(packed)
+
+        if fc in (FC_READ_HOLDING_REGISTERS, FC_READ_INPUT_REGISTERS):
+            address, count = struct.unpack(">HH", body[:4])
+            bank = self.holding_registers if fc == FC_READ_HOLDING_REGISTERS else self.input_registers
+            if count < 1 or count > 125 or address + count > BANK_SIZE:
+                return self._exception(fc, EXC_ILLEGAL_ADDRESS)
+            values = bank[address:address + count]
+            return struct.pack(f">BB{count}H", fc, count * 2, *values)
+
+        if fc == FC_WRITE_SINGLE_COIL:
+            address, value = struct.unpack(">HH", body[:4])
+            if address >= BANK_SIZE or value not in (0x0000, 0xFF00):
+                return self._exception(fc, EXC_ILLEGAL_ADDRESS if address >= BANK_SIZE else EXC_ILLEGAL_VALUE)
+            self.coils[address] = int(value == 0xFF00)
+            self._on_coil_written(address, self.coils[address])
+            return struct.pack(">BHH", fc, address, value)
+
+        if fc == FC_WRITE_SINGLE_REGISTER:
+            address, value = struct.unpack(">HH", body[:4])
+            if address >= BANK_SIZE:
+                return self._exception(fc, EXC_ILLEGAL_ADDRESS)
+            self.holding_registers[address] = value
+            self._on_holding_written(address, 1)
+            return struct.pack(">BHH", fc, address, value)
+
+        if fc == FC_WRITE_MULTIPLE_COILS:
+            address, count, _ = struct.unpack(">HHB", body[:5])
+            if address + count > BANK_SIZE:
+                return self._exception(fc, EXC_ILLEGAL_ADDRESS)
+            for i in range(count):
+                self.coils[address + i] = (body[5 + i // 8] >> (i % 8)) & 1
+            for i in range(count):
+                self._on_coil_written(address + i, self.coils[address + i])
+            return struct.pack(">BHH", fc, address, count)
+
+        if fc == FC_WRITE_MULTIPLE_REGISTERS:
+            address, count, _ = struct.unpack(">HHB", body[:5])
+            if address + count > BANK_SIZE:
+                return self._exception(fc, EXC_ILLEGAL_ADDRESS)
+            self.holding_registers[address:address + count] = struct.unpack(f">{count}H", body[5:5 + count * 2])
+            self._on_holding_written(address, count)
+            return struct.pack(">BHH", fc, address, count)
+
+        return self._exception(fc, EXC_ILLEGAL_FUNCTION)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AGV Modbus TCP模拟器")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=1502, help="监听端口")
+    parser.add_argument("--station", type=int, default=HOME_STATION, help="初始站点，0表示不在站点")
+    parser.add_argument("--travel-time", type=float, default=5.0, help="站点间行驶时间(秒)")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="时长缩放系数")
+    parser.add_argument("--localization", type=int, default=LOC_OK, help="初始定位状态 (0失败/1正确/2重定位中/3完成)")
+    parser.add_argument("--block-probability", type=float, default=0.0, help="每次导航随机阻挡的概率")
+    parser.add_argument("--block-duration", type=float, default=3.0, help="随机阻挡持续时间(秒)")
+    parser.add_argument("--seed", type=int, default=None, help="随机数种子")
+    parser.add_argument("--quiet", action="store_true", help="不打印命令日志")
+    args = parser.parse_args()
+
+    simulator = AGVSimulator(host=args.host, port=args.port, initial_station=args.station or None,
+                             travel_time=args.travel_time, localization_state=args.localization,
+                             block_probability=args.block_probability, block_duration=args.block_duration,
+                             seed=args.seed, time_scale=args.time_scale, verbose=not args.quiet)
+    simulator.start()
+    print(f"[INFO] AGV模拟器运行中 {args.host}:{simulator.port}，按Ctrl+C停止")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("[INFO] 停止AGV模拟器")
+    finally:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""
+站点行驶时间模型 - 从实测的AGV移动耗时学习站点间行驶时间，用于多站点作业排序和到达时间预估
+
+站点为图的节点，边的代价是 起点->终点 最近若干次实测耗时的中位数（阻挡等待等偶发的长耗时不会拉高估计）。
+未实测过的边依次使用：反向边的实测值、经已实测边的最短路径、全部实测边的平均值、默认值。
+
+AGV.move_agv_to_station 在连接会话设置了模型时（AGVConnection.set_travel_model）自动记录
+每次成功移动的起点、终点和耗时；指定了文件路径时每次记录后保存，重启后继续使用。
+
+用法:
+    model = StationTravelModel.load("agv_travel_times.json")
+    get_agv_connection().set_travel_model(model)
+    model.estimate(4, 5)                          # TravelEstimate(seconds, source)
+    plan = model.plan_route(4, [8, 5, 10], end=4) # 行驶时间最短的访问顺序及各站预计到达时间
+
+    python agv_travel.py --model agv_travel_times.json --show
+    python agv_travel.py --model agv_travel_times.json --plan 8 5 10 --from 4 --end 4
+    python agv_travel.py --simulate --plan 8 5 10 9 --from 4   # 在本地模拟器上实测各站点间耗时后排序
+"""
+import argparse
+import heapq
+import itertools
+import json
+import os
+import statistics
+import threading
+import time
+from collections import namedtuple
+
+# 未实测过任何边时的默认行驶时间(秒)
+DEFAULT_TRAVEL_SECONDS = 30.0
+# 每条边保留的最近实测次数
+SAMPLE_WINDOW = 20
+# 不超过该站点数时精确求解访问顺序，超过时使用最近邻+2-opt
+MAX_EXACT_STATIONS = 10
+
+# 估计来源
+SOURCE_SAME = "same"            # 起点即终点
+SOURCE_MEASURED = "measured"    # 该边的实测值
+SOURCE_REVERSE = "reverse"      # 反向边的实测值
+SOURCE_PATH = "path"            # 经已实测边的最短路径
+SOURCE_DEFAULT = "default"      # 实测边的平均值或默认值
+
+TravelEstimate = namedtuple('TravelEstimate', ['seconds', 'source'])
+TravelEstimate.__doc__ = """
+行驶时间估计
+
+seconds: 预计行驶时间(秒)
+source: 估计来源 same/measured/reverse/path/default
+"""
+
+RoutePlan = namedtuple('RoutePlan', ['stations', 'etas', 'total'])
+RoutePlan.__doc__ = """
+路线规划结果
+
+stations: 访问顺序（不含起点）
+etas: 到达各站点的预计时间(秒，从出发起累计，含之前各站的停留时间)
+total: 到达最后一个站点（指定 end 时为回到 end）的预计时间(秒)
+"""
+
+
+class StationTravelModel:
+    """
+    站点行驶时间模型（线程安全）
+
+    Args:
+        path: JSON文件路径，指定时每次记录后保存
+        default_seconds: 未实测过任何边时的默认行驶时间(秒)
+        window: 每条边保留的最近实测次数
+        symmetric: 未实测的边是否使用反向边的实测值
+    """
+
+    def __init__(self, path=None, default_seconds=DEFAULT_TRAVEL_SECONDS, window=SAMPLE_WINDOW, symmetric=True):
+        self.path = path
+        self.default_seconds = default_seconds
+        self.window = window
+        self.symmetric = symmetric
+        self._samples = {}          # (起点, 终点) -> [秒]
+        self._updated = {}          # (起点, 终点) -> 最近记录时间戳
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # 记录与持久化
+    # ------------------------------------------------------------------
+    def record(self, origin, target, seconds):
+        """
+        记录一次实测移动耗时
+
+        Returns:
+            bool: 是否记录（起点未知、起点等于终点或耗时无效时忽略）
+        """
+        if origin is None or target is None or origin == target or not seconds or seconds <= 0:
+            return False
+        with self._lock:
+            samples = self._samples.setdefault((origin, target), [])
+            samples.append(round(float(seconds), 3))
+            del samples[:-self.window]
+            self._updated[(origin, target)] = time.time()
+            data = self._to_dict() if self.path else None
+        if data is not None:
+            self._write(data)
+        return True
+
+    def _to_dict(self):
+        return {
+            "default_seconds": self.default_seconds,
+            "edges": [{"from": origin, "to": target, "samples": list(samples), "updated": self._updated.get((origin, target))}
+                      for (origin, target), samples in sorted(self._samples.items())],
+        }
+
+    def to_dict(self):
+        """模型 -> 可JSON序列化的字典"""
+        with self._lock:
+            return self._to_dict()
+
+    def _write(self, data, path=None):
+        path = path or self.path
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, path)  # 原子替换，写入中断时保留旧文件
+        except OSError as e:
+            print(f"[WARNING] 保存站点行驶时间模型失败 {path}: {e}")
+
+    def save(self, path=None):
+        """保存到 path（默认为模型的文件路径）"""
+        self._write(self.to_dict(), path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """从文件加载，文件不存在时返回空模型；之后的记录保存到该文件"""
+        model = cls(path=path, **kwargs)
+        if not os.path.exists(path):
+            return model
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        model.default_seconds = data.get("default_seconds", model.default_seconds)
+        for edge in data.get("edges", []):
+            key = (edge["from"], edge["to"])
+            model._samples[key] = list(edge["samples"])[-model.window:]
+            model._updated[key] = edge.get("updated")
+        return model
+
+    # ------------------------------------------------------------------
+    # 估计
+    # ------------------------------------------------------------------
+    def _measured(self):
+        """(起点, 终点) -> 实测中位数"""
+        return {edge: statistics.median(samples) for edge, samples in self._samples.items() if samples}
+
+    def edges(self):
+        """已实测的边: [(起点, 终点, 次数, 中位数, 最近一次)]"""
+        with self._lock:
+            return [(origin, target, len(samples), statistics.median(samples), samples[-1])
+                    for (origin, target), samples in sorted(self._samples.items()) if samples]
+
+    def stations(self):
+        """出现在实测边中的站点"""
+        with self._lock:
+            return sorted({station for edge in self._samples for station in edge})
+
+    def estimate(self, origin, target):
+        """
+        预计从 origin 行驶到 target 的时间
+
+        Returns:
+            TravelEstimate: 起点未知（None）时为 default 估计
+        """
+        if origin is not None and origin == target:
+            return TravelEstimate(0.0, SOURCE_SAME)
+        with self._lock:
+            measured = self._measured()
+        if (origin, target) in measured:
+            return TravelEstimate(measured[(origin, target)], SOURCE_MEASURED)
+        if self.symmetric and (target, origin) in measured:
+            return TravelEstimate(measured[(target, origin)], SOURCE_REVERSE)
+        if origin is not None:
+            seconds = self._shortest_path(measured, origin, target)
+            if seconds is not None:
+                return TravelEstimate(seconds, SOURCE_PATH)
+        seconds = statistics.mean(measured.values()) if measured else self.default_seconds
+        return TravelEstimate(seconds, SOURCE_DEFAULT)
+
+    def _shortest_path(self, measured, origin, target):
+        """经已实测边（symmetric时含反向边）的最短行驶时间，不可达时返回None"""
+        graph = {}
+        for (a, b), seconds in measured.items():
+            graph.setdefault(a, {})[b] = seconds
+            if self.symmetric:
+                graph.setdefault(b, {}).setdefault(a, seconds)
+        distances = {origin: 0.0}
+        heap = [(0.0, origin)]
+        while heap:
+            distance, station = heapq.heappop(heap)
+            if station == target:
+                return distance
+            if distance > distances.get(station, float("inf")):
+                continue
+            for neighbor, seconds in graph.get(station, {}).items():
+                candidate = distance + seconds
+                if candidate < distances.get(neighbor, float("inf")):
+                    distances[neighbor] = candidate
+                    heapq.heappush(heap, (candidate, neighbor))
+        return None
+
+    def travel_time(self, origin, target):
+        """预计行驶时间(秒)；可直接作为 agv_fleet.AGVFleet 的 cost"""
+        return self.estimate(origin, target).seconds
+
+    def eta(self, origin, stations, dwell=0.0):
+        """
+        按给定顺序访问各站点的预计到达时间
+
+        Args:
+            origin: 出发站点（None表示未知）
+            stations: 访问顺序
+            dwell: 每个站点的停留时间(秒)，或 站点 -> 秒 的字典
+
+        Returns:
+            list: 到达各站点的预计时间(秒，从出发起累计)
+        """
+        etas, elapsed, current = [], 0.0, origin
+        for index, station in enumerate(stations):
+            if index:
+                elapsed += _dwell(dwell, current)
+            elapsed += self.travel_time(current, station)
+            etas.append(elapsed)
+            current = station
+        return etas
+
+    # ------------------------------------------------------------------
+    # 路线规划
+    # ------------------------------------------------------------------
+    def plan_route(self, origin, stations, end=None, dwell=0.0):
+        """
+        多站点作业的访问顺序：使总行驶时间（含返回 end）最短
+
+        Args:
+            origin: 出发站点
+            stations: 需要访问的站点（重复和等于起点的站点忽略）
+            end: 作业结束后返回的站点（如工作站点4），None表示停在最后一个站点
+            dwell: 每个站点的停留时间，只影响 etas，不影响顺序
+
+        Returns:
+            RoutePlan: stations 不含 end；end 不为None时 total 为回到 end 的预计时间
+        """
+        targets = list(dict.fromkeys(station for station in stations if station != origin))
+        cost = {(a, b): self.travel_time(a, b) for a in [origin] + targets for b in targets + [end] if a != b}
+        cost_of = lambda a, b: 0.0 if a == b or b is None else cost[(a, b)]
+        if len(targets) <= MAX_EXACT_STATIONS:
+            order = _exact_order(origin, targets, end, cost_of)
+        else:
+            order = _two_opt(origin, _nearest_neighbor_order(origin, targets, cost_of), end, cost_of)
+
+        etas = self.eta(origin, order, dwell)
+        total = etas[-1] if etas else 0.0
+        if end is not None:
+            last = order[-1] if order else origin
+            total += (_dwell(dwell, last) if order else 0.0) + cost_of(last, end)
+        return RoutePlan(order, etas, total)
+
+    def route_time(self, origin, stations, end=None):
+        """按给定顺序访问（并返回 end）的总行驶时间(秒)"""
+        path = [origin] + list(stations) + ([end] if end is not None else [])
+        return sum(self.travel_time(a, b) for a, b in zip(path, path[1:]))
+
+
+def _dwell(dwell, station):
+    return dwell.get(station, 0.0) if isinstance(dwell, dict) else dwell
+
+
+def _route_cost(origin, order, end, cost_of):
+    path = [origin] + list(order) + [end]
+    return sum(cost_of(a, b) for a, b in zip(path, path[1:]))
+
+
+def _exact_order(origin, targets, end, cost_of):
+    """Held-Karp 动态规划：O(2^n * n^2)"""
+    if not targets:
+        return []
+    n = len(targets)
+    # best[(子集, 最后站点)] = (代价, 上一站点)
+    best = {(1 << i, i): (cost_of(origin, targets[i]), None) for i in range(n)}
+    for size in range(2, n + 1):
+        for subset in itertools.combinations(range(n), size):
+            mask = sum(1 << i for i in subset)
+            for last in subset:
+                previous_mask = mask & ~(1 << last)
+                best[(mask, last)] = min(
+                    (best[(previous_mask, prev)][0] + cost_of(targets[prev], targets[last]), prev)
+                    for prev in subset if prev != last)
+    full = (1 << n) - 1
+    last = min(range(n), key=lambda i: best[(full, i)][0] + cost_of(targets[i], end))
+    order, mask = [], full
+    while last is not None:
+        order.append(targets[last])
+        mask, last = mask & ~(1 << last), best[(mask, last)][1]
+    return order[::-1]
+
+
+def _nearest_neighbor_order(origin, targets, cost_of):
+    order, remaining, current = [], list(targets), origin
+    while remaining:
+        current = min(remaining, key=lambda station: cost_of(current, station))
+        remaining.remove(current)
+        order.append(current)
+    return order
+
+
+def _two_opt(origin, order, end, cost_of):
+    """反转子路径直到不再缩短总行驶时间"""
+    best, best_cost = list(order), _route_cost(origin, order, end, cost_of)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(best) - 1):
+            for j in range(i + 1, len(best)):
+                candidate = best[:i] + best[i:j + 1][::-1] + best[j + 1:]
+                candidate_cost = _route_cost(origin, candidate, end, cost_of)
+                if candidate_cost < best_cost - 1e-9:
+                    best, best_cost, improved = candidate, candidate_cost, True
+    return best
+
+
+def format_edges(model):
+    """已实测的边 -> 文本表格"""
+    rows = model.edges()
+    if not rows:
+        return "（尚无实测数据）"
+    lines = ["起点  终点  次数  中位数(s)  最近(s)"]
+    lines += [f"{origin:>4}  {target:>4}  {count:>4}  {median:>9.2f}  {last:>7.2f}"
+              for origin, target, count, median, last in rows]
+    return "\n".join(lines)
+
+
+def _learn_on_simulator(model, time_scale, rounds=1):
+    """在本地模拟器（行驶时间按站点间距离计算）上依次实测各站点之间的移动耗时"""
+    from agv_simulator import AGVSimulator, DEFAULT_STATIONS, HOME_STATION
+    from AGV import AGVConnection, move_agv_to_station
+
+    def travel_seconds(origin, target, vx):
+        (x0, y0, _), (x1, y1, _) = DEFAULT_STATIONS.get(origin, (0.0, 0.0, 0.0)), DEFAULT_STATIONS[target]
+        return 2.0 + ((x1 - x0) ** 2 + (y1 - y0) ** 2) ** 0.5 / max(vx, 0.1)
+
+    simulator = AGVSimulator(port=0, initial_station=HOME_STATION, travel_time=travel_seconds,
+                             time_scale=time_scale, verbose=False)
+    simulator.start()
+    connection = AGVConnection("127.0.0.1", simulator.port, name="sim")
+    connection.set_travel_model(model)
+    try:
+        for _ in range(rounds):
+            for origin, target in itertools.permutations(sorted(DEFAULT_STATIONS), 2):
+                if simulator.current_station != origin:
+                    move_agv_to_station(origin, connection=connection)
+                move_agv_to_station(target, connection=connection)
+    finally:
+        connection.close()
+        simulator.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="站点行驶时间模型")
+    parser.add_argument("--model", help="模型文件路径（JSON）")
+    parser.add_argument("--show", action="store_true", help="显示已实测的站点间行驶时间")
+    parser.add_argument("--plan", type=int, nargs="+", help="需要访问的站点，输出行驶时间最短的访问顺序")
+    parser.add_argument("--from", dest="origin", type=int, default=4, help="出发站点")
+    parser.add_argument("--end", type=int, help="作业结束后返回的站点")
+    parser.add_argument("--dwell", type=float, default=0.0, help="每个站点的停留时间(秒)，用于预计到达时间")
+    parser.add_argument("--simulate", action="store_true", help="先在本地AGV模拟器上实测各站点之间的行驶时间")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="模拟器行驶时间缩放系数")
+    args = parser.parse_args()
+
+    model = StationTravelModel.load(args.model) if args.model else StationTravelModel()
+    if args.simulate:
+        _learn_on_simulator(model, args.time_scale)
+    if args.show or args.simulate:
+        print(format_edges(model))
+    if args.plan:
+        plan = model.plan_route(args.origin, args.plan, end=args.end, dwell=args.dwell)
+        given = model.route_time(args.origin, [s for s in dict.fromkeys(args.plan) if s != args.origin], args.end)
+        planned = model.route_time(args.origin, plan.stations, args.end)
+        print(f"[INFO] 访问顺序: {args.origin} -> " + " -> ".join(str(station) for station in plan.stations) +
+              (f" -> {args.end}" if args.end is not None else ""))
+        for station, eta in zip(plan.stations, plan.etas):
+            print(f"  站点 {station}: 预计 {eta:.1f}s 到达")
+        print(f"[INFO] 预计总时间 {plan.total:.1f}s；行驶 {planned:.1f}s，按请求顺序行驶 {given:.1f}s，"
+              f"节省 {max(0.0, given - planned):.1f}s")
+
+
+if __name__ == "__main__":
+    main()
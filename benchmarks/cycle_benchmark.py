@@ -0,0 +1,341 @@
+"""
+内存条工作流程端到端节拍基准测试
+
+在模拟机器人（FakeRobot）和本地AGV模拟器（agv_simulator）上连续执行N个工作循环，统计:
+    - 每个工作步骤的耗时分位数 (p50/p95/p99)
+    - 每种RDK接口调用和Modbus请求的耗时分位数
+    - 整个循环的耗时与每小时循环数
+结果输出为文本表格和JSON，并可与保存的基线比较，超出容差时返回码为1，用作延迟回归门禁。
+
+每个循环与 main.py 一次运行相同：AGV归位到站点4（initialize_agv_to_station4），然后执行工作流程。
+
+用法:
+    python -m benchmarks.cycle_benchmark --cycles 20 --time-scale 0.05
+    python -m benchmarks.cycle_benchmark --json result.json --save-baseline benchmarks/baseline.json
+    python -m benchmarks.cycle_benchmark --baseline benchmarks/baseline.json --tolerance 0.15
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import AGV
+from agv_simulator import AGVSimulator
+from benchmarks.report_format import display_width, pad, summarize
+from core.fake_robot import FakeRobot
+from core.modbus_scheduler import UNTRACKED_METHODS
+from core.plan_catalog import load_plan_catalog
+from core.step_runner import STEP_SKIPPED
+from core.workflow_engine import WorkflowEngine, load_workflow
+from utils.tracing import configure_tracing, trace_span
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# 基线比较：相对容差，以及忽略的绝对差值(秒)，避免毫秒级抖动被判为回归
+DEFAULT_TOLERANCE = 0.20
+DEFAULT_MIN_DELTA = 0.005
+
+# 参与基线比较的分位数
+COMPARED_PERCENTILES = ("p50", "p95")
+
+# 归位步骤名称（不属于工作流程定义）
+HOMING_STEP = "AGV归位"
+
+
+class LatencyRecorder:
+    """线程安全的耗时样本收集器：分类 -> 名称 -> [秒]"""
+
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, category, name, seconds):
+        with self._lock:
+            self.samples.setdefault(category, {}).setdefault(name, []).append(seconds)
+
+    def summary(self, category):
+        with self._lock:
+            return {name: summarize(values) for name, values in sorted(self.samples.get(category, {}).items())}
+
+
+class TimedProxy:
+    """
+    方法调用计时代理，把对目标对象的每次方法调用耗时记录到 recorder
+
+    用于包装机器人对象（RDK调用）和调度器底层的Modbus客户端（每个Modbus请求）。
+    """
+
+    def __init__(self, target, recorder, category, untracked=()):
+        self._target = target
+        self._recorder = recorder
+        self._category = category
+        self._untracked = frozenset(untracked)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr) or isinstance(attr, type) or name in self._untracked:
+            return attr
+
+        def timed_call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self._recorder.record(self._category, name, time.perf_counter() - start)
+
+        timed_call.__name__ = name
+        return timed_call
+
+
+class BenchmarkLogger:
+    """与spdlog日志记录器接口一致的轻量日志，默认丢弃输出，记录错误数量"""
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.error_count = 0
+
+    def _emit(self, level, message):
+        if self.verbose:
+            print(f"[{level}] {message}")
+
+    def debug(self, message):
+        self._emit("DEBUG", message)
+
+    def info(self, message):
+        self._emit("INFO", message)
+
+    def warn(self, message):
+        self._emit("WARN", message)
+
+    warning = warn
+
+    def error(self, message):
+        self.error_count += 1
+        self._emit("ERROR", message)
+
+
+def build_workflow_params(tool_num=1, check_mestick=True, agv_enabled=True, work_station=4):
+    """与 main.memory_stick_workflow 相同的工作流程参数"""
+    return {
+        "tool_num": tool_num,
+        "check_mestick": check_mestick,
+        "agv_enabled": agv_enabled,
+        "work_station": work_station,
+    }
+
+
+def run_benchmark(cycles=10, time_scale=0.05, travel_time=5.0, workflow="memory_stick", overlap_steps=False,
+                  check_mestick=True, agv_enabled=True, block_probability=0.0, seed=0, verbose=False):
+    """
+    执行基准测试并返回报告字典
+
+    Args:
+        cycles: 工作循环次数
+        time_scale: 模拟机器人计划时长和AGV行驶时间的缩放系数
+        travel_time: AGV站点间行驶时间(秒，缩放前)
+        workflow: 工作流程名称或定义文件路径
+        overlap_steps: 是否并行执行互不冲突的步骤
+        check_mestick, agv_enabled: 工作流程参数
+        block_probability: 每次AGV导航随机阻挡的概率
+        seed: 随机数种子
+        verbose: 是否输出流程日志
+    """
+    recorder = LatencyRecorder()
+    logger = BenchmarkLogger(verbose)
+    simulator = AGVSimulator(port=0, initial_station=4, travel_time=travel_time, time_scale=time_scale,
+                             block_probability=block_probability, seed=seed)
+    simulator.start()
+    AGV.configure_agv_endpoint("127.0.0.1", simulator.port)
+
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    cycle_results = []
+    try:
+        with output:
+            connection = AGV.get_agv_connection()
+            scheduler = connection.get_scheduler()
+            scheduler.client = TimedProxy(scheduler.client, recorder, "modbus", UNTRACKED_METHODS)
+
+            robot = TimedProxy(FakeRobot(time_scale=time_scale), recorder, "rdk")
+            load_plan_catalog(robot, "Rizon-Fake")
+            robot.Enable()
+            robot.SwitchMode(robot.Mode.NRT_PLAN_EXECUTION)
+            definition = load_workflow(workflow)
+            params = build_workflow_params(check_mestick=check_mestick, agv_enabled=agv_enabled)
+
+            for cycle in range(cycles):
+                cycle_start = time.perf_counter()
+                exit_code = 0
+                with trace_span("cycle", category="benchmark", cycle=cycle) as span:
+                    if agv_enabled:
+                        homing_start = time.perf_counter()
+                        if not AGV.simple_initialize_agv(logger):
+                            exit_code = -1
+                        recorder.record("step", HOMING_STEP, time.perf_counter() - homing_start)
+
+                    if exit_code == 0:
+                        engine = WorkflowEngine(definition, robot, logger, params, parallel=overlap_steps)
+                        exit_code = engine.run()
+                        for name, result in engine.results.items():
+                            if result.status != STEP_SKIPPED and result.end_time is not None:
+                                recorder.record("step", name, result.end_time - result.start_time)
+                    span.set_attribute("exit_code", exit_code)
+                    span.set_status(exit_code == 0)
+
+                cycle_time = time.perf_counter() - cycle_start
+                recorder.record("cycle", "cycle", cycle_time)
+                cycle_results.append({"exit_code": exit_code, "seconds": cycle_time})
+            connection.close()
+    finally:
+        simulator.stop()
+
+    cycle_stats = recorder.summary("cycle").get("cycle", summarize([]))
+    total = sum(item["seconds"] for item in cycle_results)
+    return {
+        "config": {
+            "cycles": cycles,
+            "time_scale": time_scale,
+            "travel_time": travel_time,
+            "workflow": workflow,
+            "overlap_steps": overlap_steps,
+            "check_mestick": check_mestick,
+            "agv_enabled": agv_enabled,
+            "block_probability": block_probability,
+            "seed": seed,
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "cycles": {
+            "completed": cycles,
+            "failed": sum(1 for item in cycle_results if item["exit_code"] != 0),
+            "exit_codes": [item["exit_code"] for item in cycle_results],
+            "total_seconds": total,
+            "cycles_per_hour": 3600.0 * cycles / total if total else None,
+            "latency": cycle_stats,
+        },
+        "steps": recorder.summary("step"),
+        "rdk_calls": recorder.summary("rdk"),
+        "modbus_calls": recorder.summary("modbus"),
+        "modbus_request_counts": {str(fc): count for fc, count in sorted(simulator.request_counts.items())},
+        "agv_navigations": len(simulator.navigations),
+    }
+
+
+def _ms(value):
+    return "-" if value is None else f"{value * 1000:.1f}"
+
+
+def format_report(report):
+    """报告 -> 文本表格"""
+    config, cycles = report["config"], report["cycles"]
+    lines = [
+        f"工作流程 {config['workflow']}: {cycles['completed']} 个循环，失败 {cycles['failed']}，"
+        f"time_scale={config['time_scale']}，overlap_steps={config['overlap_steps']}",
+        f"循环耗时 p50={_ms(cycles['latency']['p50'])}ms p95={_ms(cycles['latency']['p95'])}ms "
+        f"p99={_ms(cycles['latency']['p99'])}ms，每小时 {cycles['cycles_per_hour'] or 0:.1f} 个循环",
+    ]
+    for title, key in (("工作步骤", "steps"), ("RDK调用", "rdk_calls"), ("Modbus请求", "modbus_calls")):
+        rows = report[key]
+        if not rows:
+            continue
+        width = max(display_width(name) for name in list(rows) + [title]) + 2
+        lines.append("")
+        lines.append(pad(title, width) + pad("次数", 8, ">") +
+                     "".join(pad(column, 12, ">") for column in ("p50(ms)", "p95(ms)", "p99(ms)", "max(ms)")))
+        for name, stats in rows.items():
+            lines.append(pad(name, width) + pad(stats["count"], 8, ">") +
+                         "".join(pad(_ms(stats[q]), 12, ">") for q in ("p50", "p95", "p99", "max")))
+    return "\n".join(lines)
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE, min_delta=DEFAULT_MIN_DELTA):
+    """
+    与基线比较
+
+    Returns:
+        list: 回归项描述；循环p50/p95、各步骤和各调用的p50/p95超过 基线*(1+tolerance) 且差值大于 min_delta 时计入
+    """
+    regressions = []
+
+    def check(label, current, previous):
+        if current is None or previous is None:
+            return
+        if current > previous * (1 + tolerance) and current - previous > min_delta:
+            regressions.append(f"{label}: {_ms(previous)}ms -> {_ms(current)}ms (+{(current / previous - 1) * 100:.0f}%)"
+                               if previous else f"{label}: {_ms(previous)}ms -> {_ms(current)}ms")
+
+    for q in COMPARED_PERCENTILES:
+        check(f"循环 {q}", report["cycles"]["latency"][q], baseline["cycles"]["latency"][q])
+    for key in ("steps", "rdk_calls", "modbus_calls"):
+        for name, stats in report[key].items():
+            previous = baseline.get(key, {}).get(name)
+            if previous is None:
+                continue
+            for q in COMPARED_PERCENTILES:
+                check(f"{key}.{name} {q}", stats[q], previous[q])
+
+    previous_rate, current_rate = baseline["cycles"]["cycles_per_hour"], report["cycles"]["cycles_per_hour"]
+    if previous_rate and current_rate and current_rate < previous_rate / (1 + tolerance):
+        regressions.append(f"每小时循环数: {previous_rate:.1f} -> {current_rate:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="内存条工作流程节拍基准测试")
+    parser.add_argument("--cycles", type=int, default=10, help="工作循环次数")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="计划时长和AGV行驶时间缩放系数")
+    parser.add_argument("--travel-time", type=float, default=5.0, help="AGV站点间行驶时间(秒，缩放前)")
+    parser.add_argument("--workflow", default="memory_stick", help="工作流程名称或定义文件路径")
+    parser.add_argument("--overlap-steps", action="store_true", help="重叠执行互不冲突的工作步骤")
+    parser.add_argument("--no-check-mestick", action="store_true", help="不执行内存条检查步骤")
+    parser.add_argument("--disable-agv", action="store_true", help="不执行AGV归位和移动")
+    parser.add_argument("--block-probability", type=float, default=0.0, help="每次AGV导航随机阻挡的概率")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--json", help="JSON报告输出路径")
+    parser.add_argument("--baseline", help=f"与基线比较，如 {DEFAULT_BASELINE}")
+    parser.add_argument("--save-baseline", help="将本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="基线比较的相对容差")
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA, help="基线比较忽略的绝对差值(秒)")
+    parser.add_argument("--trace-file", help="追踪span输出文件(JSON-lines)")
+    parser.add_argument("--verbose", action="store_true", help="输出流程日志")
+    args = parser.parse_args()
+
+    if args.trace_file:
+        configure_tracing(args.trace_file)
+
+    report = run_benchmark(cycles=args.cycles, time_scale=args.time_scale, travel_time=args.travel_time,
+                           workflow=args.workflow, overlap_steps=args.overlap_steps,
+                           check_mestick=not args.no_check_mestick, agv_enabled=not args.disable_agv,
+                           block_probability=args.block_probability, seed=args.seed, verbose=args.verbose)
+    print(format_report(report))
+
+    for path in filter(None, (args.json, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[INFO] 报告已保存: {path}")
+
+    exit_code = 1 if report["cycles"]["failed"] else 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print(f"[WARNING] 基线配置与本次不同: {baseline.get('config')}")
+        regressions = compare_to_baseline(report, baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print(f"[ERROR] 相对基线 {args.baseline} 出现 {len(regressions)} 项回归:")
+            for item in regressions:
+                print(f"  - {item}")
+            exit_code = 1
+        else:
+            print(f"✅ 未超出基线 {args.baseline} (容差 {args.tolerance:.0%})")
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+生产历史瓶颈报告 - 查询 core.cycle_history 记录的SQLite数据库
+
+报告内容:
+    steps      各工作步骤和机器人计划的耗时分位数、失败次数
+    retries    各计划按反馈值统计的次数与占比（101/102 拍照/取料失败，201/202 拍照/放料失败），工作步骤重试次数
+    blockages  AGV阻挡热点：按行驶路线（起点->目标站点）统计阻挡次数、时长、未解除次数和位置
+    trend      循环耗时趋势：按天/小时/运行分组的循环数、失败数和耗时分位数
+    alarms     各报警的触发次数
+    runs       运行记录
+默认输出全部报告。优化前后用 --since/--until 或 --run 分别查询，比较循环耗时和步骤耗时是否缩短。
+
+用法:
+    python -m benchmarks.history_report cycle_history.db
+    python -m benchmarks.history_report cycle_history.db steps retries --since 2026-10-01
+    python -m benchmarks.history_report cycle_history.db trend --bucket hour --robot Rizon10-062283
+    python -m benchmarks.history_report cycle_history.db --run 12 --json report.json
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.report_format import display_width, pad, summarize
+
+REPORTS = ("steps", "retries", "blockages", "trend", "alarms", "runs")
+
+# 计划失败反馈值
+FAILURE_FEEDBACK = {
+    101: "取料拍照失败",
+    102: "取料失败",
+    201: "放料拍照失败",
+    202: "放料失败",
+}
+
+BUCKET_FORMATS = {
+    "day": "%Y-%m-%d",
+    "hour": "%Y-%m-%d %H:00",
+}
+
+
+def _parse_time(text):
+    """'YYYY-MM-DD' / 'YYYY-MM-DD HH:MM' -> 时间戳"""
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"时间格式应为 YYYY-MM-DD 或 'YYYY-MM-DD HH:MM': {text}")
+
+
+class HistoryQuery:
+    """
+    历史数据库查询，所有报告共用同一组过滤条件
+
+    Args:
+        connection: sqlite3.Connection
+        since, until: 时间戳范围（span开始时间）
+        run: 只查询指定运行id
+        robot: 只查询指定机器人序列号
+    """
+
+    def __init__(self, connection, since=None, until=None, run=None, robot=None):
+        self.connection = connection
+        self._filters = ((since, "s.start >= ?", "r.started >= ?"), (until, "s.start < ?", "r.started < ?"),
+                         (run, "s.run_id = ?", "r.id = ?"), (robot, "r.robot = ?", "r.robot = ?"))
+        self._where, self._params = self._condition(1)
+
+    def _condition(self, column):
+        """过滤条件 -> (WHERE子句, 参数)；column 1 用于spans查询，2 用于runs查询"""
+        active = [(value, clauses[column - 1]) for value, *clauses in self._filters if value is not None]
+        return " AND ".join(clause for _, clause in active) or "1", [value for value, _ in active]
+
+    def spans(self, name_pattern):
+        """名称匹配 LIKE 模式的span: [(run_id, span_id, parent_id, name, start, duration, status, attributes)]"""
+        rows = self.connection.execute(
+            f"SELECT s.run_id, s.span_id, s.parent_id, s.name, s.start, s.duration, s.status, s.attributes "
+            f"FROM spans s JOIN runs r ON r.id = s.run_id WHERE s.name LIKE ? AND {self._where} ORDER BY s.start",
+            [name_pattern] + self._params).fetchall()
+        return [row[:7] + (json.loads(row[7]) if row[7] else {},) for row in rows]
+
+    def span_lookup(self, name):
+        """(run_id, span_id) -> 属性，用于关联父span"""
+        rows = self.connection.execute(
+            "SELECT run_id, span_id, attributes FROM spans WHERE name = ?", (name,)).fetchall()
+        return {(run_id, span_id): json.loads(attributes) if attributes else {} for run_id, span_id, attributes in rows}
+
+    def runs(self):
+        """[(id, started, ended, program, robot, host, exit_code, 循环数)]"""
+        where, params = self._condition(2)
+        return self.connection.execute(
+            f"SELECT r.id, r.started, r.ended, r.program, r.robot, r.host, r.exit_code, "
+            f"(SELECT COUNT(*) FROM spans c WHERE c.run_id = r.id AND c.name = 'cycle') "
+            f"FROM runs r WHERE {where} ORDER BY r.id", params).fetchall()
+
+
+def _latency_rows(spans, prefix):
+    groups = {}
+    for _, _, _, name, _, duration, status, _ in spans:
+        groups.setdefault(name[len(prefix):], []).append((duration, status))
+    rows = []
+    for name, samples in groups.items():
+        row = summarize([duration for duration, _ in samples])
+        row.update(name=name, failed=sum(1 for _, status in samples if status != "ok"))
+        rows.append(row)
+    return sorted(rows, key=lambda row: row["p50"] or 0.0, reverse=True)
+
+
+def step_report(query):
+    """各工作步骤和机器人计划的耗时分布（按p50从大到小）"""
+    return {"steps": _latency_rows(query.spans("step:%"), "step:"),
+            "plans": _latency_rows(query.spans("plan:%"), "plan:")}
+
+
+def retry_report(query):
+    """各计划按反馈值的次数与占比，以及工作步骤的重试次数"""
+    plans = {}
+    for _, _, _, name, _, _, status, attributes in query.spans("plan:%"):
+        plan = plans.setdefault(name[len("plan:"):], {"attempts": 0, "timed_out": 0, "feedback": {}})
+        plan["attempts"] += 1
+        if attributes.get("timed_out"):
+            plan["timed_out"] += 1
+        feedback = attributes.get("feedback")
+        plan["feedback"][feedback] = plan["feedback"].get(feedback, 0) + 1
+    for plan in plans.values():
+        failures = sum(count for code, count in plan["feedback"].items() if code in FAILURE_FEEDBACK)
+        plan["retry_rate"] = failures / plan["attempts"] if plan["attempts"] else 0.0
+
+    steps = {}
+    for _, _, _, name, _, _, _, attributes in query.spans("step:%"):
+        step = steps.setdefault(name[len("step:"):], {"runs": 0, "retries": 0})
+        step["runs"] += 1
+        if attributes.get("attempt", 1) > 1:
+            step["retries"] += 1
+    return {"plans": plans, "steps": {name: step for name, step in steps.items() if step["retries"]}}
+
+
+def blockage_report(query):
+    """按行驶路线（起点->目标站点）统计阻挡"""
+    navigations = query.span_lookup("agv:navigation")
+    routes = {}
+    for run_id, _, parent_id, _, _, _, _, attributes in query.spans("agv:blockage"):
+        navigation = navigations.get((run_id, parent_id), {})
+        key = (navigation.get("origin"), navigation.get("station"))
+        route = routes.setdefault(key, {"origin": key[0], "station": key[1], "seconds": [], "unresolved": 0,
+                                        "reasons": {}, "positions": []})
+        route["seconds"].append(attributes.get("seconds", 0.0))
+        route["unresolved"] += 0 if attributes.get("resolved", True) else 1
+        reason = attributes.get("reason") or "未知"
+        route["reasons"][reason] = route["reasons"].get(reason, 0) + 1
+        if "x" in attributes:
+            route["positions"].append((attributes["x"], attributes["y"]))
+
+    moves = {}
+    for _, _, _, _, _, _, _, attributes in query.spans("agv:navigation"):
+        key = (attributes.get("origin"), attributes.get("station"))
+        moves[key] = moves.get(key, 0) + 1
+
+    rows = []
+    for key, route in routes.items():
+        seconds = route.pop("seconds")
+        positions = route.pop("positions")
+        route.update(count=len(seconds), moves=moves.get(key, 0), total=sum(seconds), latency=summarize(seconds),
+                     position=(round(sum(x for x, _ in positions) / len(positions), 2),
+                               round(sum(y for _, y in positions) / len(positions), 2)) if positions else None)
+        rows.append(route)
+    return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+
+def trend_report(query, bucket="day"):
+    """循环耗时趋势"""
+    groups = {}
+    for run_id, _, _, _, start, duration, status, _ in query.spans("cycle"):
+        key = f"运行 {run_id}" if bucket == "run" else time.strftime(BUCKET_FORMATS[bucket], time.localtime(start))
+        groups.setdefault(key, []).append((duration, status))
+    rows = []
+    for key, samples in groups.items():
+        row = summarize([duration for duration, status in samples if status == "ok"])
+        row.update(bucket=key, cycles=len(samples), failed=sum(1 for _, status in samples if status != "ok"))
+        rows.append(row)
+    return rows
+
+
+def alarm_report(query):
+    alarms = {}
+    for _, _, _, _, start, _, _, attributes in query.spans("alarm:start"):
+        alarm = alarms.setdefault(attributes.get("alarm_id"), {"count": 0, "audio_id": attributes.get("audio_id"),
+                                                               "last": None})
+        alarm["count"] += 1
+        alarm["last"] = start
+    return alarms
+
+
+def build_report(query, reports=REPORTS, bucket="day"):
+    builders = {
+        "steps": lambda: step_report(query),
+        "retries": lambda: retry_report(query),
+        "blockages": lambda: blockage_report(query),
+        "trend": lambda: trend_report(query, bucket),
+        "alarms": lambda: alarm_report(query),
+        "runs": lambda: [dict(zip(("id", "started", "ended", "program", "robot", "host", "exit_code", "cycles"), row))
+                         for row in query.runs()],
+    }
+    return {name: builders[name]() for name in reports}
+
+
+def _s(value):
+    return "-" if value is None else f"{value:.2f}"
+
+
+def _table(headers, rows, aligns=None):
+    aligns = aligns or ["<"] + [">"] * (len(headers) - 1)
+    widths = [max(display_width(cell) for cell in [header] + [row[i] for row in rows])
+              for i, header in enumerate(headers)]
+    lines = ["  ".join(pad(header, width, align) for header, width, align in zip(headers, widths, aligns))]
+    lines += ["  ".join(pad(cell, width, align) for cell, width, align in zip(row, widths, aligns)) for row in rows]
+    return [line.rstrip() for line in lines]
+
+
+def _time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp)) if timestamp else "-"
+
+
+def format_report(report):
+    """报告 -> 文本"""
+    lines = []
+    if "steps" in report:
+        for title, key in (("工作步骤耗时(s)", "steps"), ("机器人计划耗时(s)", "plans")):
+            rows = report["steps"][key]
+            lines.append(f"== {title} ==")
+            lines += _table(["名称", "次数", "失败", "p50", "p95", "max"],
+                            [[row["name"], row["count"], row["failed"], _s(row["p50"]), _s(row["p95"]), _s(row["max"])]
+                             for row in rows]) if rows else ["（无记录）"]
+            lines.append("")
+    if "retries" in report:
+        lines.append("== 计划反馈值 ==")
+        rows = []
+        for plan, data in report["retries"]["plans"].items():
+            for code, count in sorted(data["feedback"].items(), key=lambda item: -item[1]):
+                rows.append([plan, "超时" if code is None else code, FAILURE_FEEDBACK.get(code, ""), count,
+                             f"{count / data['attempts']:.1%}"])
+        lines += _table(["计划", "反馈值", "含义", "次数", "占比"], rows,
+                        ["<", ">", "<", ">", ">"]) if rows else ["（无记录）"]
+        for plan, data in report["retries"]["plans"].items():
+            lines.append(f"  {plan}: 执行 {data['attempts']} 次，失败反馈占 {data['retry_rate']:.1%}")
+        for step, data in report["retries"]["steps"].items():
+            lines.append(f"  步骤 {step}: 执行 {data['runs']} 次，其中重试 {data['retries']} 次")
+        lines.append("")
+    if "blockages" in report:
+        lines.append("== AGV阻挡热点 ==")
+        rows = [[f"{row['origin'] or '?'} -> {row['station'] or '?'}", row["count"], row["moves"], _s(row["total"]),
+                 _s(row["latency"]["p50"]), _s(row["latency"]["max"]), row["unresolved"],
+                 "-" if row["position"] is None else f"({row['position'][0]}, {row['position'][1]})",
+                 max(row["reasons"], key=row["reasons"].get)]
+                for row in report["blockages"]]
+        lines += _table(["路线", "阻挡", "移动", "总时长", "p50", "max", "未解除", "平均位置", "主要原因"], rows,
+                        ["<", ">", ">", ">", ">", ">", ">", ">", "<"]) if rows else ["（无阻挡记录）"]
+        lines.append("")
+    if "trend" in report:
+        lines.append("== 循环耗时趋势(s) ==")
+        rows = [[row["bucket"], row["cycles"], row["failed"], _s(row["p50"]), _s(row["p95"]), _s(row["mean"]),
+                 f"{3600 / row['p50']:.0f}" if row["p50"] else "-"] for row in report["trend"]]
+        lines += _table(["分组", "循环", "失败", "p50", "p95", "平均", "每小时"], rows) if rows else ["（无循环记录）"]
+        lines.append("")
+    if "alarms" in report:
+        lines.append("== 报警 ==")
+        rows = [[alarm_id, data["audio_id"], data["count"], _time(data["last"])]
+                for alarm_id, data in sorted(report["alarms"].items(), key=lambda item: -item[1]["count"])]
+        lines += _table(["报警", "音频", "次数", "最近一次"], rows) if rows else ["（无报警记录）"]
+        lines.append("")
+    if "runs" in report:
+        lines.append("== 运行记录 ==")
+        rows = [[run["id"], _time(run["started"]), _s(run["ended"] - run["started"]) if run["ended"] else "未结束",
+                 run["program"] or "-", run["robot"] or "-", run["cycles"], "-" if run["exit_code"] is None else run["exit_code"]]
+                for run in report["runs"]]
+        lines += _table(["运行", "开始", "时长(s)", "程序", "机器人", "循环", "返回码"], rows) if rows else ["（无运行记录）"]
+        lines.append("")
+    return "\n".join(lines).rstrip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生产历史瓶颈报告")
+    parser.add_argument("database", help="历史数据库路径（main.py --history-db）")
+    parser.add_argument("reports", nargs="*", metavar="report", help=f"报告，可多个：{' / '.join(REPORTS)}，默认全部")
+    parser.add_argument("--since", type=_parse_time, help="起始时间 YYYY-MM-DD 或 'YYYY-MM-DD HH:MM'")
+    parser.add_argument("--until", type=_parse_time, help="结束时间（不含）")
+    parser.add_argument("--run", type=int, help="只统计指定运行")
+    parser.add_argument("--robot", help="只统计指定机器人序列号")
+    parser.add_argument("--bucket", choices=["day", "hour", "run"], default="day", help="循环耗时趋势的分组方式")
+    parser.add_argument("--json", help="JSON报告输出路径")
+    args = parser.parse_args()
+    unknown = [name for name in args.reports if name not in REPORTS]
+    if unknown:
+        parser.error(f"未知的报告 {unknown}，可选 {list(REPORTS)}")
+
+    if not os.path.exists(args.database):
+        print(f"[ERROR] 历史数据库不存在: {args.database}")
+        sys.exit(1)
+    connection = sqlite3.connect(f"file:{args.database}?mode=ro", uri=True)
+    try:
+        query = HistoryQuery(connection, since=args.since, until=args.until, run=args.run, robot=args.robot)
+        report = build_report(query, args.reports or REPORTS, args.bucket)
+    finally:
+        connection.close()
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        print(f"[INFO] 报告已保存: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
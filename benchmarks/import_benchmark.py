@@ -0,0 +1,262 @@
+"""
+命令行入口导入耗时基准测试
+
+在新的Python进程中导入各入口模块（与命令行启动相同，含解释器启动），统计:
+    - 导入耗时与进程总耗时的分位数
+    - 不应被加载的模块（如禁用AGV时的pymodbus、未使用的flexivrdk/spdlog）是否被加载
+    - main_startup 入口按命令行实际路径执行到创建日志记录器（第一条日志之前），spdlog 计入耗时
+    - 导入最慢的模块（-X importtime 的累计耗时）
+超出进程耗时预算、加载了禁止的模块或相对基线变慢时返回码为1，用作启动开销的回归门禁。
+
+用法:
+    python -m benchmarks.import_benchmark
+    python -m benchmarks.import_benchmark --runs 10 --save-baseline benchmarks/import_baseline.json
+    python -m benchmarks.import_benchmark --baseline benchmarks/import_baseline.json --budget-scale 3
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.report_format import display_width, pad, summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_baseline.json")
+
+# 基线比较：相对容差，以及忽略的绝对差值(秒)
+DEFAULT_TOLERANCE = 0.30
+DEFAULT_MIN_DELTA = 0.010
+
+# 硬件与AGV栈：只在对应功能被使用时才允许加载
+HARDWARE_MODULES = ["flexivrdk", "spdlog"]
+AGV_MODULES = ["AGV", "pymodbus"]
+
+# main() 启动即创建日志记录器，spdlog 只在 import main 时不加载，命令行启动仍需加载
+MAIN_FORBIDDEN = AGV_MODULES + ["asyncio", "http.server", "core.cell_daemon", "sqlite3"]
+
+# 入口名称 -> 导入的模块、导入后执行的语句（可选，计入导入耗时）、不应加载的模块、进程总耗时预算(秒，含解释器启动)
+ENTRY_POINTS = {
+    "main": {
+        "modules": ["main"],
+        "forbidden": ["flexivrdk"] + MAIN_FORBIDDEN,
+        "budget": 0.5,
+    },
+    "main_startup": {
+        "modules": ["main"],
+        "statements": ["main.get_logger('RobotLogger')"],
+        "forbidden": ["flexivrdk"] + MAIN_FORBIDDEN,
+        "budget": 0.5,
+    },
+    "workflow_engine": {
+        "modules": ["core.workflow_engine"],
+        "forbidden": HARDWARE_MODULES + AGV_MODULES + ["asyncio"],
+        "budget": 0.5,
+    },
+    "plans": {
+        "modules": ["plans.change_tool", "plans.pick_mestick", "plans.Put_mestick"],
+        "forbidden": HARDWARE_MODULES + AGV_MODULES + ["asyncio"],
+        "budget": 0.5,
+    },
+    "fake_robot": {
+        "modules": ["core.fake_robot", "core.rdk_init"],
+        "forbidden": HARDWARE_MODULES + AGV_MODULES,
+        "budget": 0.5,
+    },
+    "history_report": {
+        "modules": ["benchmarks.history_report"],
+        "forbidden": HARDWARE_MODULES + AGV_MODULES + ["agv_simulator", "asyncio"],
+        "budget": 0.5,
+    },
+    "agv_diagnostics": {
+        "modules": ["AGV"],
+        "forbidden": HARDWARE_MODULES,
+        "budget": 1.0,
+    },
+}
+
+# 子进程中执行：计时导入，输出耗时和已加载的禁止模块
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+forbidden = {forbidden!r}
+loaded = sorted({{f for m in sys.modules for f in forbidden if m == f or m.startswith(f + ".")}})
+print(json.dumps({{"import_seconds": elapsed, "forbidden_loaded": loaded}}))
+"""
+
+
+def _parse_importtime(stderr):
+    """-X importtime 输出 -> [(模块, 累计秒)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        rows.append((name.strip(), int(cumulative_us) / 1e6))
+    return rows
+
+
+def measure_entry(modules, forbidden, runs=5, statements=()):
+    """
+    在新进程中重复导入一组模块（并执行 statements）
+
+    Returns:
+        dict: import/process 耗时统计、加载的禁止模块、最慢的模块；导入失败时包含 error
+    """
+    lines = [f"import {module}" for module in modules] + list(statements)
+    code = _PROBE.format(imports="\n".join(lines), forbidden=forbidden)
+    command = [sys.executable, "-X", "importtime", "-c", code]
+    import_samples, process_samples = [], []
+    forbidden_loaded, slowest = [], []
+
+    subprocess.run(command, cwd=ROOT, capture_output=True)  # 预热：生成字节码缓存
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+        process_samples.append(time.perf_counter() - start)
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "导入失败"
+            return {"modules": modules, "error": error}
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        import_samples.append(result["import_seconds"])
+        forbidden_loaded = result["forbidden_loaded"]
+        imported = [row for row in _parse_importtime(completed.stderr) if row[0] not in modules]
+        slowest = sorted(imported, key=lambda row: row[1], reverse=True)[:5]
+
+    return {
+        "modules": modules,
+        "import": summarize(import_samples),
+        "process": summarize(process_samples),
+        "forbidden_loaded": forbidden_loaded,
+        "slowest": [[name, seconds] for name, seconds in slowest],
+    }
+
+
+def run_benchmark(runs=5, entries=None):
+    """测量各入口的导入耗时，返回报告字典"""
+    selected = {name: spec for name, spec in ENTRY_POINTS.items() if not entries or name in entries}
+    results = {}
+    for name, spec in selected.items():
+        results[name] = measure_entry(spec["modules"], spec["forbidden"], runs, spec.get("statements", ()))
+        results[name]["budget"] = spec["budget"]
+    return {
+        "config": {"runs": runs},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "machine": platform.machine()},
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "entries": results,
+    }
+
+
+def _ms(value):
+    return "-" if value is None else f"{value * 1000:.1f}"
+
+
+def format_report(report):
+    """报告 -> 文本表格"""
+    width = max(display_width(name) for name in list(report["entries"]) + ["入口"]) + 2
+    lines = [pad("入口", width) + "".join(pad(column, 14, ">") for column in
+                                           ("导入p50(ms)", "进程p50(ms)", "进程p95(ms)", "预算(ms)")) + "  最慢的模块"]
+    for name, entry in report["entries"].items():
+        if "error" in entry:
+            lines.append(pad(name, width) + f"[ERROR] {entry['error']}")
+            continue
+        slowest = "，".join(f"{module} {_ms(seconds)}" for module, seconds in entry["slowest"][:3])
+        columns = (entry["import"]["p50"], entry["process"]["p50"], entry["process"]["p95"], entry["budget"])
+        lines.append(pad(name, width) + "".join(pad(_ms(value), 14, ">") for value in columns) + "  " + slowest)
+    return "\n".join(lines)
+
+
+def check_report(report, budget_scale=1.0):
+    """
+    检查导入错误、禁止的模块和进程耗时预算
+
+    Args:
+        budget_scale: 预算放大倍数（在比目标工控机更慢或更快的机器上运行时调整）
+
+    Returns:
+        list: 问题描述
+    """
+    problems = []
+    for name, entry in report["entries"].items():
+        if "error" in entry:
+            problems.append(f"{name}: 导入失败 {entry['error']}")
+            continue
+        if entry["forbidden_loaded"]:
+            problems.append(f"{name}: 加载了不应加载的模块 {entry['forbidden_loaded']}")
+        budget = entry["budget"] * budget_scale
+        if entry["process"]["p50"] > budget:
+            problems.append(f"{name}: 进程耗时 p50 {_ms(entry['process']['p50'])}ms 超出预算 {_ms(budget)}ms")
+    return problems
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE, min_delta=DEFAULT_MIN_DELTA):
+    """
+    与基线比较
+
+    Returns:
+        list: 回归项描述；各入口导入耗时p50超过 基线*(1+tolerance) 且差值大于 min_delta 时计入
+    """
+    regressions = []
+    for name, entry in report["entries"].items():
+        previous = baseline.get("entries", {}).get(name)
+        if "error" in entry or not previous or "error" in previous:
+            continue
+        current_p50, previous_p50 = entry["import"]["p50"], previous["import"]["p50"]
+        if current_p50 > previous_p50 * (1 + tolerance) and current_p50 - previous_p50 > min_delta:
+            regressions.append(f"{name} 导入p50: {_ms(previous_p50)}ms -> {_ms(current_p50)}ms "
+                               f"(+{(current_p50 / previous_p50 - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="命令行入口导入耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="每个入口的测量次数")
+    parser.add_argument("--entry", action="append", choices=sorted(ENTRY_POINTS), help="只测量指定入口，可重复")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="进程耗时预算放大倍数")
+    parser.add_argument("--json", help="JSON报告输出路径")
+    parser.add_argument("--baseline", help=f"与基线比较，如 {DEFAULT_BASELINE}")
+    parser.add_argument("--save-baseline", help="将本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="基线比较的相对容差")
+    parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA, help="基线比较忽略的绝对差值(秒)")
+    args = parser.parse_args()
+
+    report = run_benchmark(runs=args.runs, entries=args.entry)
+    print(format_report(report))
+
+    for path in filter(None, (args.json, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[INFO] 报告已保存: {path}")
+
+    exit_code = 0
+    problems = check_report(report, args.budget_scale)
+    if problems:
+        print(f"[ERROR] {len(problems)} 项启动开销问题:")
+        for item in problems:
+            print(f"  - {item}")
+        exit_code = 1
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print(f"[ERROR] 相对基线 {args.baseline} 出现 {len(regressions)} 项回归:")
+            for item in regressions:
+                print(f"  - {item}")
+            exit_code = 1
+        else:
+            print(f"✅ 未超出基线 {args.baseline} (容差 {args.tolerance:.0%})")
+    elif not problems:
+        print("✅ 全部入口满足启动开销要求")
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
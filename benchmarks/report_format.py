@@ -0,0 +1,39 @@
+"""
+基准测试与报告共用的统计和表格格式化工具（只依赖标准库，报告工具导入时不加载AGV/模拟器）
+"""
+import math
+import unicodedata
+
+
+def percentile(samples, q):
+    """线性插值分位数，q取0-100"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * q / 100.0
+    low, high = int(math.floor(rank)), int(math.ceil(rank))
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples):
+    """耗时样本 -> 统计字典(秒)"""
+    return {
+        "count": len(samples),
+        "mean": sum(samples) / len(samples) if samples else None,
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples) if samples else None,
+    }
+
+
+def display_width(text):
+    """文本显示宽度（中文字符占两列）"""
+    return sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in str(text))
+
+
+def pad(text, width, align="<"):
+    """按显示宽度填充"""
+    text = str(text)
+    fill = " " * max(0, width - display_width(text))
+    return text + fill if align == "<" else fill + text
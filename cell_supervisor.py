@@ -0,0 +1,595 @@
+"""
+多机械臂工作单元监管 - 一个监管进程同时驱动多台Rizon机械臂
+
+每台机械臂在独立的工作进程中运行（init_robot + 连续生产循环），RDK的阻塞调用互不影响。
+机械臂安装在各自的AGV上：工作进程不直接连接AGV，流程中的 agv_prepare/agv_move 动作经队列
+发给监管进程中的站点仲裁器（StationArbiter），由它通过 agv_fleet.AGVFleet 驱动该机械臂的AGV，
+并保证同一站点同时只有一台AGV（目标站点被占用时等待对方离开）。
+各工作进程每个循环结束后上报结果，监管进程汇总每台机械臂的节拍和产能。
+
+用法:
+    python cell_supervisor.py --robot Rizon10-062283:4 --robot Rizon10-062284:8 \\
+        --agv Rizon10-062283=192.168.2.112 --agv Rizon10-062284=192.168.2.113 --continuous
+
+    # 模拟机器人 + 本地AGV模拟器
+    python cell_supervisor.py --robot arm1 --robot arm2 --robot-backend fake --fake-time-scale 0.05 --simulate --cycles 5
+
+机械臂格式为 序列号[:工作站点]，未指定工作站点时依次使用 4、8、9、10；各机械臂的工作站点必须不同，
+放料站点（--put-station，默认5）共用，由仲裁器按请求顺序轮流使用。
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.production_loop import stop_on_signals
+
+# 未指定工作站点时依次分配的站点
+DEFAULT_WORK_STATIONS = (4, 8, 9, 10)
+DEFAULT_PUT_STATION = 5
+
+# 等待目标站点空出的最长时间(秒)，超时视为移动失败
+STATION_WAIT_TIMEOUT = 600.0
+
+# 工作进程等待仲裁回复时检查监管进程是否存活的间隔(秒)
+REPLY_POLL_INTERVAL = 1.0
+
+# 工作进程上报的事件类型
+EVENT_READY = "ready"
+EVENT_CYCLE = "cycle"
+EVENT_EXIT = "exit"
+
+
+# ----------------------------------------------------------------------
+# 监管进程：站点仲裁
+# ----------------------------------------------------------------------
+class StationArbiter:
+    """
+    站点仲裁器 - 在监管进程中代各机械臂执行AGV操作
+
+    站点占用表记录每个站点当前属于哪台机械臂的AGV；移动前等待目标站点空出并预占，
+    到达后释放原站点，失败时释放预占。
+
+    Args:
+        fleet: agv_fleet.AGVFleet
+        agv_of: 机械臂 -> 车队中的AGV id
+        logger: 日志记录器（可选）
+        wait_timeout: 等待站点空出的超时时间(秒)
+    """
+
+    def __init__(self, fleet, agv_of, logger=None, wait_timeout=STATION_WAIT_TIMEOUT):
+        self.fleet = fleet
+        self.agv_of = dict(agv_of)
+        self.logger = logger
+        self.wait_timeout = wait_timeout
+        self.wait_seconds = {arm: 0.0 for arm in self.agv_of}
+        self._occupied = {}
+        self._condition = threading.Condition()
+
+    def _log(self, msg, level="info"):
+        if self.logger:
+            getattr(self.logger, level)(msg)
+        else:
+            print(f"[ARBITER] {msg}")
+
+    def register_positions(self):
+        """按各AGV当前遥测站点初始化占用表"""
+        with self._condition:
+            for arm, agv_id in self.agv_of.items():
+                station = self.fleet.sessions[agv_id].current_station
+                if station is not None:
+                    self._occupied[station] = arm
+
+    def occupancy(self):
+        with self._condition:
+            return dict(self._occupied)
+
+    def current_station(self, arm):
+        """机械臂所在AGV的当前站点（遥测，无网络I/O）"""
+        return self.fleet.sessions[self.agv_of[arm]].current_station
+
+    def move(self, arm, station):
+        """
+        将机械臂的AGV移动到站点，目标站点被其他AGV占用时等待
+
+        Returns:
+            bool: 是否到达
+        """
+        start = time.monotonic()
+        with self._condition:
+            free = self._condition.wait_for(lambda: self._occupied.get(station, arm) == arm, self.wait_timeout)
+            waited = time.monotonic() - start
+            self.wait_seconds[arm] += waited
+            if not free:
+                self._log(f"{arm} 等待站点 {station} 超过 {self.wait_timeout:.0f}s（被 {self._occupied[station]} 占用）",
+                          "error")
+                return False
+            self._occupied[station] = arm
+        if waited > 0.01:
+            self._log(f"{arm} 等待站点 {station} 空出 {waited:.2f}s")
+
+        try:
+            if self.current_station(arm) == station:
+                success = True
+            else:
+                success = self.fleet.move_agv_to_station(station, agv_id=self.agv_of[arm]).success
+        except Exception as e:
+            self._log(f"{arm} 的AGV移动到站点 {station} 异常: {e}", "error")
+            success = False
+
+        with self._condition:
+            for occupied, owner in list(self._occupied.items()):
+                if owner != arm:
+                    continue
+                if (success and occupied != station) or (not success and occupied == station
+                                                          and self.current_station(arm) != station):
+                    del self._occupied[occupied]
+            self._condition.notify_all()
+        return success
+
+    def release(self, arm):
+        """机械臂退出时释放预占（保留AGV实际所在的站点）"""
+        with self._condition:
+            actual = self.current_station(arm)
+            for occupied, owner in list(self._occupied.items()):
+                if owner == arm and occupied != actual:
+                    del self._occupied[occupied]
+            self._condition.notify_all()
+
+    def handle(self, arm, op, kwargs):
+        """执行工作进程的请求"""
+        if op == "station":
+            return self.current_station(arm)
+        if op == "move":
+            return self.move(arm, kwargs["station"])
+        raise ValueError(f"未知的仲裁请求: {op}")
+
+
+# ----------------------------------------------------------------------
+# 工作进程：机械臂侧
+# ----------------------------------------------------------------------
+class ArbiterUnavailable(RuntimeError):
+    """监管进程已停止或已退出，仲裁请求无法完成"""
+
+
+class ArbiterClient:
+    """
+    工作进程中的仲裁器代理，请求经队列发给监管进程并等待回复
+
+    等待回复时定期检查监管进程是否存活；监管进程退出或发出停止标记（序号为None的回复）后，
+    当前及之后的请求抛出 ArbiterUnavailable，工作进程不会无限等待。
+    """
+
+    def __init__(self, arm, requests, replies):
+        self.arm = arm
+        self._requests = requests
+        self._replies = replies
+        self._sequence = 0
+        self._closed = None
+        self._lock = threading.Lock()
+
+    def _close(self, reason):
+        self._closed = reason
+        self._requests.cancel_join_thread()  # 监管进程可能已不再读取，退出时不等待请求队列写完
+        raise ArbiterUnavailable(reason)
+
+    def call(self, op, **kwargs):
+        with self._lock:
+            if self._closed is not None:
+                raise ArbiterUnavailable(self._closed)
+            self._sequence += 1
+            self._requests.put((self.arm, self._sequence, op, kwargs))
+            while True:
+                try:
+                    sequence, ok, value = self._replies.get(timeout=REPLY_POLL_INTERVAL)
+                except queue.Empty:
+                    parent = multiprocessing.parent_process()
+                    if parent is not None and not parent.is_alive():
+                        self._close("监管进程已退出")
+                    continue
+                if sequence is None:
+                    self._close(value)
+                if sequence == self._sequence:
+                    break
+        if not ok:
+            raise RuntimeError(value)
+        return value
+
+
+_arbiter_client = None
+
+
+def _arbiter_agv_prepare(robot, logger, context, station):
+    """agv_prepare 的工作进程版本：经仲裁器读取AGV当前站点"""
+    state = context.setdefault('agv', {'station': None, 'control': False})
+    state['station'] = _arbiter_client.call("station")
+    logger.info(f"AGV当前站点: {state['station']}")
+    return True
+
+
+def _arbiter_agv_move(robot, logger, context, station):
+    """agv_move 的工作进程版本：经仲裁器移动（目标站点被占用时等待）"""
+    state = context.setdefault('agv', {'station': None, 'control': False})
+    if state['station'] == station:
+        logger.info(f"✅ AGV已在站点{station}，无需移动")
+        return True
+    logger.info(f"AGV需要从站点 {state['station']} 移动到站点{station}（经仲裁器）")
+    success = _arbiter_client.call("move", station=station)
+    if success:
+        state['station'] = station
+    else:
+        logger.warn(f"AGV移动到站点{station}失败")
+    return success
+
+
+def _worker_main(arm, options, requests, replies, events):
+    """工作进程入口：初始化机械臂并执行生产循环，每个循环结束后上报；收到SIGTERM后当前循环结束再退出"""
+    global _arbiter_client
+    stop_requested = threading.Event()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # 由监管进程统一处理中断，经SIGTERM通知
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_requested.set())
+
+    from core.production_loop import ProductionLoop
+    from core.rdk_init import ensure_robot_ready, init_robot
+    from core.workflow_actions import WORKFLOW_ACTIONS
+    from core.workflow_engine import run_workflow
+    from utils.logger import get_logger
+
+    logger = get_logger(f"Arm-{arm}")
+    history = _open_history(options["history_db"], arm, logger)
+    agv_enabled = options["agv_enabled"]
+
+    def finish(exit_code, **data):
+        if history is not None:
+            history.close(exit_code)
+        events.put((EVENT_EXIT, arm, dict(data, exit_code=exit_code)))
+    if agv_enabled:
+        _arbiter_client = ArbiterClient(arm, requests, replies)
+        WORKFLOW_ACTIONS.update(agv_prepare=_arbiter_agv_prepare, agv_move=_arbiter_agv_move)
+
+    try:
+        robot = init_robot(arm, logger, backend=options["robot_backend"], **options["backend_options"])
+    except Exception as e:
+        finish(3, error=str(e))
+        return
+
+    def home():
+        if not agv_enabled:
+            return 0
+        try:
+            arrived = _arbiter_client.call("move", station=options["work_station"])
+        except ArbiterUnavailable as e:
+            logger.error(f"AGV无法回到工作站点 {options['work_station']}: {e}")
+            return 5
+        if not arrived:
+            logger.error(f"AGV未能回到工作站点 {options['work_station']}")
+            return 5
+        return 0
+
+    def verify(cycle):
+        if not ensure_robot_ready(robot, logger):
+            return 3
+        return home()
+
+    params = {
+        "tool_num": options["tool_num"],
+        "check_mestick": options["check_mestick"],
+        "agv_enabled": agv_enabled,
+        "work_station": options["work_station"],
+        "put_station": options["put_station"],
+    }
+
+    def run_cycle(cycle):
+        start = time.monotonic()
+        exit_code = run_workflow(options["workflow"], robot, logger, params, parallel=options["overlap_steps"])
+        events.put((EVENT_CYCLE, arm, {"cycle": cycle, "exit_code": exit_code, "elapsed": time.monotonic() - start}))
+        return exit_code
+
+    exit_code = home()
+    events.put((EVENT_READY, arm, {"exit_code": exit_code}))
+    if exit_code == 0:
+        loop = ProductionLoop(run_cycle, logger, cycles=options["cycles"], verify=verify,
+                              stop_on_failure=options["stop_on_failure"])
+        threading.Thread(target=lambda: stop_requested.wait() and loop.request_stop("监管进程停止请求"),
+                         daemon=True).start()
+        exit_code = loop.run()
+        # 停在共用的放料站点会阻塞其他机械臂，退出前回到自己的工作站点
+        park_code = home()
+        exit_code = exit_code or park_code
+    finish(exit_code)
+
+
+def _open_history(path, robot, logger):
+    """打开生产历史记录（未指定或打开失败时返回None）"""
+    if not path:
+        return None
+    from core.cycle_history import CycleHistory
+    try:
+        return CycleHistory(path, program="cell_supervisor", robot=robot)
+    except Exception as e:
+        logger.warn(f"无法打开历史数据库 {path}: {e}，不记录历史")
+        return None
+
+
+# ----------------------------------------------------------------------
+# 监管进程
+# ----------------------------------------------------------------------
+class ArmStats:
+    """一台机械臂的循环统计"""
+
+    def __init__(self, arm, work_station):
+        self.arm = arm
+        self.work_station = work_station
+        self.cycle_times = []
+        self.failed = 0
+        self.exit_code = None
+        self.error = None
+        self.started = None
+
+    @property
+    def completed(self):
+        return len(self.cycle_times) - self.failed
+
+    def summary(self, agv_wait=0.0):
+        times = sorted(self.cycle_times)
+        median = times[len(times) // 2] if times else None
+        elapsed = time.monotonic() - self.started if self.started else 0.0
+        return {
+            "arm": self.arm,
+            "work_station": self.work_station,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cycle_p50": median,
+            "cycles_per_hour": 3600.0 * self.completed / elapsed if elapsed and self.completed else 0.0,
+            "agv_wait": agv_wait,
+            "exit_code": self.exit_code,
+            "error": self.error,
+        }
+
+
+class CellSupervisor:
+    """
+    多机械臂监管器
+
+    Args:
+        arms: [(序列号, 工作站点)]
+        options: 各工作进程共用的运行参数（见 _worker_main）
+        fleet: agv_fleet.AGVFleet，禁用AGV时为None
+        agv_of: 序列号 -> 车队中的AGV id
+        logger: 日志记录器
+    """
+
+    def __init__(self, arms, options, fleet=None, agv_of=None, logger=None):
+        stations = [station for _, station in arms]
+        if len(set(stations)) != len(stations):
+            raise ValueError(f"各机械臂的工作站点必须不同: {stations}")
+        self.arms = arms
+        self.options = options
+        self.logger = logger
+        self.arbiter = StationArbiter(fleet, agv_of, logger) if fleet is not None else None
+        self.stats = {arm: ArmStats(arm, station) for arm, station in arms}
+        self._context = multiprocessing.get_context("spawn")  # RDK连接不能在fork后的子进程中复用
+        self._requests = self._context.Queue()
+        self._events = self._context.Queue()
+        self._replies = {arm: self._context.Queue() for arm, _ in arms}
+        self._processes = {}
+        self._stop_requested = False
+
+    def request_stop(self, reason="停止请求"):
+        """向各工作进程发送SIGTERM，各机械臂在当前循环结束后停止"""
+        if not self._stop_requested:
+            self.logger.warn(f"{reason}，各机械臂当前循环结束后停止")
+        self._stop_requested = True
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+
+    def _serve_requests(self):
+        """转发工作进程的AGV请求给仲裁器，每个请求一个线程（移动会阻塞到到达）"""
+        while True:
+            item = self._requests.get()
+            if item is None:
+                return
+            threading.Thread(target=self._handle_request, args=item, daemon=True).start()
+
+    def _handle_request(self, arm, sequence, op, kwargs):
+        try:
+            reply = (sequence, True, self.arbiter.handle(arm, op, kwargs))
+        except Exception as e:
+            reply = (sequence, False, f"{type(e).__name__}: {e}")
+        self._replies[arm].put(reply)
+
+    def _on_event(self, kind, arm, data):
+        stats = self.stats[arm]
+        if kind == EVENT_READY:
+            stats.started = time.monotonic()
+            self.logger.info(f"机械臂 {arm} 就绪" if data["exit_code"] == 0 else
+                             f"机械臂 {arm} 启动失败，返回码 {data['exit_code']}")
+        elif kind == EVENT_CYCLE:
+            stats.cycle_times.append(data["elapsed"])
+            if data["exit_code"] != 0:
+                stats.failed += 1
+            self.logger.info(f"机械臂 {arm} 第 {data['cycle']} 个循环"
+                             f"{'完成' if data['exit_code'] == 0 else '失败(返回码 ' + str(data['exit_code']) + ')'}，"
+                             f"用时 {data['elapsed']:.1f}s")
+        elif kind == EVENT_EXIT:
+            stats.exit_code = data["exit_code"]
+            stats.error = data.get("error")
+            if self.arbiter is not None:
+                self.arbiter.release(arm)
+            if stats.error:
+                self.logger.error(f"机械臂 {arm} 初始化失败: {stats.error}")
+
+    def run(self):
+        """
+        启动全部工作进程并等待结束
+
+        Returns:
+            int: 0-全部机械臂成功，否则为第一个非0的工作进程返回码
+        """
+        if self.arbiter is not None:
+            self.arbiter.register_positions()
+            threading.Thread(target=self._serve_requests, name="arbiter", daemon=True).start()
+
+        for arm, station in self.arms:
+            options = dict(self.options, work_station=station)
+            process = self._context.Process(target=_worker_main, name=f"arm-{arm}",
+                                            args=(arm, options, self._requests, self._replies[arm], self._events))
+            process.start()
+            self._processes[arm] = process
+            self.logger.info(f"机械臂 {arm} 工作进程已启动 (pid {process.pid}，工作站点 {station})")
+
+        try:
+            while any(stats.exit_code is None for stats in self.stats.values()):
+                try:
+                    self._on_event(*self._events.get(timeout=0.5))
+                except queue.Empty:
+                    for arm, process in self._processes.items():
+                        if not process.is_alive() and self.stats[arm].exit_code is None:
+                            self.stats[arm].exit_code = process.exitcode or 3
+                            self.logger.error(f"机械臂 {arm} 工作进程异常退出 (exitcode {process.exitcode})")
+        finally:
+            # 再次中断等异常退出时，正在等待站点的工作进程收到停止标记后结束，不会阻塞下面的join
+            for replies in self._replies.values():
+                replies.put((None, False, "监管进程已停止"))
+            for process in self._processes.values():
+                process.join()
+            self._requests.put(None)
+        self.log_report()
+        return next((stats.exit_code for stats in self.stats.values() if stats.exit_code), 0)
+
+    def report(self):
+        """各机械臂的统计"""
+        waits = self.arbiter.wait_seconds if self.arbiter is not None else {}
+        return [stats.summary(waits.get(arm, 0.0)) for arm, stats in self.stats.items()]
+
+    def log_report(self):
+        rows = self.report()
+        self.logger.info("各机械臂产能:")
+        for row in rows:
+            p50 = f"{row['cycle_p50']:.1f}s" if row["cycle_p50"] is not None else "-"
+            self.logger.info(f"  {row['arm']} (站点 {row['work_station']}): 完成 {row['completed']}，失败 {row['failed']}，"
+                             f"节拍p50 {p50}，约 {row['cycles_per_hour']:.0f} 个/小时，等待站点 {row['agv_wait']:.1f}s")
+        total = sum(row["cycles_per_hour"] for row in rows)
+        self.logger.info(f"  合计约 {total:.0f} 个/小时")
+
+
+def _parse_arm(text):
+    """"序列号[:工作站点]" -> (序列号, 工作站点或None)"""
+    serial, _, station = text.partition(":")
+    return serial, int(station) if station else None
+
+
+def _positive_int(text):
+    """argparse类型：大于0的整数"""
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"必须是大于0的整数: {text}")
+    return value
+
+
+def _parse_agv(text):
+    """"序列号=ip[:port]" -> (序列号, ip, port)"""
+    serial, _, endpoint = text.partition("=")
+    if not endpoint:
+        raise argparse.ArgumentTypeError(f"AGV格式应为 序列号=ip[:port]: {text}")
+    ip, _, port = endpoint.partition(":")
+    return serial, ip, int(port) if port else 502
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多机械臂工作单元监管")
+    parser.add_argument("--robot", action="append", type=_parse_arm, required=True,
+                        help="机械臂，格式 序列号[:工作站点]，可重复")
+    parser.add_argument("--agv", action="append", type=_parse_agv, default=[],
+                        help="机械臂所在的AGV，格式 序列号=ip[:port]，可重复")
+    parser.add_argument("--simulate", action="store_true", help="为每台机械臂启动本地AGV模拟器")
+    parser.add_argument("--disable-agv", action="store_true", help="禁用AGV移动功能")
+    parser.add_argument("--put-station", type=int, default=DEFAULT_PUT_STATION, help="放料站点")
+    parser.add_argument("--tool-num", type=int, default=1, help="工具编号")
+    parser.add_argument("--no-check-mestick", action="store_true", help="不执行内存条检查步骤")
+    parser.add_argument("--workflow", default="memory_stick", help="工作流程名称或定义文件路径")
+    parser.add_argument("--overlap-steps", action="store_true", help="重叠执行互不冲突的工作步骤")
+    parser.add_argument("--cycles", type=_positive_int, default=1, help="每台机械臂的循环次数")
+    parser.add_argument("--continuous", action="store_true", help="持续执行，直到收到SIGINT/SIGTERM")
+    parser.add_argument("--continue-on-failure", action="store_true", help="循环失败后继续执行下一个循环")
+    parser.add_argument("--robot-backend", choices=["rdk", "fake"], default="rdk", help="机器人后端")
+    parser.add_argument("--fake-time-scale", type=float, default=1.0, help="模拟机器人计划时长缩放系数")
+    parser.add_argument("--history-db", help="生产历史数据库(SQLite)，各机械臂与监管进程（AGV移动、阻挡）分别记录运行")
+    parser.add_argument("--agv-travel-model", help="站点行驶时间模型文件(JSON)，各AGV共用，记录每次移动的耗时")
+    parser.add_argument("--sim-time-scale", type=float, default=0.1, help="AGV模拟器行驶时间缩放系数")
+    parser.add_argument("--log-name", default="Supervisor", help="日志记录器名称")
+    args = parser.parse_args()
+
+    from utils.logger import get_logger
+    logger = get_logger(args.log_name)
+
+    spare = iter(station for station in DEFAULT_WORK_STATIONS if station not in {s for _, s in args.robot if s})
+    arms = [(serial, station if station is not None else next(spare)) for serial, station in args.robot]
+    options = {
+        "agv_enabled": not args.disable_agv,
+        "robot_backend": args.robot_backend,
+        "backend_options": {"time_scale": args.fake_time_scale} if args.robot_backend == "fake" else {},
+        "tool_num": args.tool_num,
+        "check_mestick": not args.no_check_mestick,
+        "put_station": args.put_station,
+        "workflow": args.workflow,
+        "overlap_steps": args.overlap_steps,
+        "cycles": None if args.continuous else args.cycles,
+        "stop_on_failure": not args.continue_on_failure,
+        "history_db": args.history_db,
+    }
+
+    simulators, fleet, agv_of = [], None, {}
+    history = _open_history(args.history_db, None, logger)  # 监管进程记录AGV移动、阻挡和报警
+    exit_code = None
+    try:
+        if options["agv_enabled"]:
+            from agv_fleet import AGVFleet
+            from utils.polling import poll_until
+            endpoints = {serial: (ip, port) for serial, ip, port in args.agv}
+            if args.simulate:
+                from agv_simulator import AGVSimulator
+                for serial, station in arms:
+                    simulator = AGVSimulator(port=0, initial_station=station, time_scale=args.sim_time_scale)
+                    simulator.start()
+                    simulators.append(simulator)
+                    endpoints[serial] = ("127.0.0.1", simulator.port)
+            missing = [serial for serial, _ in arms if serial not in endpoints]
+            if missing:
+                parser.error(f"以下机械臂未指定AGV（--agv 序列号=ip 或 --simulate）: {missing}")
+            travel_model = None
+            if args.agv_travel_model:
+                from agv_travel import StationTravelModel
+                travel_model = StationTravelModel.load(args.agv_travel_model)
+            fleet = AGVFleet(logger, travel_model=travel_model)
+            for serial, _ in arms:
+                fleet.add_agv(serial, *endpoints[serial])
+                agv_of[serial] = serial
+            if not poll_until(lambda: all(s.telemetry() for s in fleet.sessions.values()), bool, 10.0).ok:
+                logger.warn("部分AGV尚无遥测数据")
+
+        supervisor = CellSupervisor(arms, options, fleet, agv_of, logger)
+        with stop_on_signals(supervisor.request_stop):
+            exit_code = supervisor.run()
+    finally:
+        if fleet is not None:
+            fleet.close()
+        for simulator in simulators:
+            simulator.stop()
+        if history is not None:
+            history.close(exit_code)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
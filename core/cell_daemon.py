@@ -0,0 +1,450 @@
+import itertools
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from core.production_loop import verify_cell_ready
+from core.workflow_engine import WorkflowEngine, load_workflow
+from utils.tracing import trace_span
+
+# 作业状态
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_FINISHED = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+# 作业可指定的参数及类型（对应工作流程参数）
+JOB_PARAMS = {
+    "tool_num": int,
+    "pallet_num": int,
+    "photo_num": int,
+    "check_mestick": bool,
+}
+
+# 已结束作业在内存中保留的数量
+MAX_FINISHED_JOBS = 200
+
+# 事件流等待新事件的超时(秒)，超时后发送心跳行
+EVENT_HEARTBEAT_INTERVAL = 15.0
+
+
+class JobError(ValueError):
+    """作业请求错误"""
+
+
+class Job:
+    """一个排队执行的工作流程作业"""
+
+    def __init__(self, job_id, params, requester=None):
+        self.id = job_id
+        self.params = params
+        self.requester = requester
+        self.status = JOB_QUEUED
+        self.exit_code = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self.steps = {}
+
+    def to_dict(self, include_events=False):
+        data = {
+            "id": self.id,
+            "params": self.params,
+            "requester": self.requester,
+            "status": self.status,
+            "exit_code": self.exit_code,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "steps": self.steps,
+        }
+        if include_events:
+            data["events"] = self.events
+        return data
+
+
+class JobLogger:
+    """转发到单元日志记录器，并把每条日志记录为作业进度事件"""
+
+    def __init__(self, logger, daemon, job):
+        self._logger = logger
+        self._daemon = daemon
+        self._job = job
+
+    def _log(self, level, message):
+        getattr(self._logger, level)(f"[作业{self._job.id}] {message}")
+        self._daemon._add_event(self._job, "log", level=level, message=str(message))
+
+    def debug(self, message):
+        self._log("debug", message)
+
+    def info(self, message):
+        self._log("info", message)
+
+    def warn(self, message):
+        self._log("warn", message)
+
+    warning = warn
+
+    def error(self, message):
+        self._log("error", message)
+
+
+class CellDaemon:
+    """
+    工作单元守护进程 - 持有机器人会话和AGV连接，通过本地HTTP接口接收并排队执行作业
+
+    作业按提交顺序在单个工作线程中执行；作业之间调用 verify_cell_ready 做轻量状态检查。
+    多个请求方可同时提交和查询，进度以事件流返回。
+
+    HTTP接口（监听 host:port 或 Unix套接字）:
+        POST   /jobs               提交作业，JSON参数见 JOB_PARAMS，可选 requester；返回202和作业信息
+        GET    /jobs               作业列表
+        GET    /jobs/<id>          作业详情（含全部事件）
+        GET    /jobs/<id>/events   进度事件流（application/x-ndjson，每行一个事件，作业结束后关闭），
+                                   ?after=N 从第N个事件之后开始
+        DELETE /jobs/<id>          取消排队中的作业
+        GET    /health             单元状态与队列长度
+
+    Args:
+        robot: 已初始化的机器人对象
+        logger: 日志记录器
+        agv_enabled: 是否启用AGV
+        workflow: 工作流程名称或定义文件路径
+        overlap_steps: 是否并行执行互不冲突的步骤
+        defaults: 作业参数默认值
+    """
+
+    def __init__(self, robot, logger, agv_enabled=True, workflow="memory_stick", overlap_steps=False, defaults=None):
+        self.robot = robot
+        self.logger = logger
+        self.agv_enabled = agv_enabled
+        self.workflow = workflow
+        self.overlap_steps = overlap_steps
+        self.defaults = dict(defaults or {})
+        self.jobs = {}
+        self.current_job = None
+        self._ids = itertools.count(1)
+        self._queue = queue.Queue()
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._ran_job = False
+        self._server = None
+        self._threads = []
+
+    # ------------------------------------------------------------------
+    # 作业管理
+    # ------------------------------------------------------------------
+    def _validate(self, params):
+        unknown = sorted(set(params) - set(JOB_PARAMS))
+        if unknown:
+            raise JobError(f"未知的作业参数: {unknown}，可选: {sorted(JOB_PARAMS)}")
+        validated = dict(self.defaults)
+        for name, value in params.items():
+            expected = JOB_PARAMS[name]
+            if expected is int and (isinstance(value, bool) or not isinstance(value, int)):
+                raise JobError(f"参数 {name} 应为整数，实际为 {value!r}")
+            if expected is bool and not isinstance(value, bool):
+                raise JobError(f"参数 {name} 应为布尔值，实际为 {value!r}")
+            validated[name] = value
+        return validated
+
+    def submit(self, params, requester=None):
+        """提交作业，返回Job；参数不合法时抛出JobError，守护进程停止后抛出RuntimeError"""
+        if self._stop_event.is_set():
+            raise RuntimeError("工作单元正在停止，不再接收作业")
+        params = self._validate(params)
+        job = Job(next(self._ids), params, requester)
+        with self._condition:
+            self.jobs[job.id] = job
+            self._prune()
+            position = self._queue.qsize() + (1 if self.current_job else 0)
+        self._add_event(job, "status", status=JOB_QUEUED, position=position)
+        self.logger.info(f"收到作业 {job.id} (请求方: {requester or '-'})，参数: {job.params}，前方 {position} 个作业")
+        self._queue.put(job)
+        return job
+
+    def cancel(self, job_id):
+        """取消排队中的作业，返回是否已取消（运行中的作业不可取消）"""
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != JOB_QUEUED:
+                return False
+            job.status = JOB_CANCELLED
+            job.finished_at = time.time()
+            self._add_event(job, "status", status=JOB_CANCELLED)
+        self.logger.info(f"作业 {job_id} 已取消")
+        return True
+
+    def get(self, job_id):
+        with self._condition:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        with self._condition:
+            return [job.to_dict() for job in self.jobs.values()]
+
+    def _prune(self):
+        """只保留最近的已结束作业（需持有锁）"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in JOB_FINISHED]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def _add_event(self, job, event_type, **data):
+        with self._condition:
+            event = {"seq": len(job.events) + 1, "time": time.time(), "job": job.id, "type": event_type}
+            event.update(data)
+            job.events.append(event)
+            self._condition.notify_all()
+
+    def wait_events(self, job, after=0, timeout=None):
+        """
+        等待作业的新事件
+
+        Returns:
+            (list, bool): 第after个之后的事件，以及作业是否已结束
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: len(job.events) > after or job.status in JOB_FINISHED, timeout)
+            return list(job.events[after:]), job.status in JOB_FINISHED
+
+    # ------------------------------------------------------------------
+    # 作业执行
+    # ------------------------------------------------------------------
+    def _finish(self, job, status, exit_code):
+        with self._condition:
+            job.status = status
+            job.exit_code = exit_code
+            job.finished_at = time.time()
+            self.current_job = None
+            self._add_event(job, "result", status=status, exit_code=exit_code, steps=job.steps,
+                            duration=job.finished_at - job.started_at)
+
+    def _run_job(self, job):
+        with self._condition:
+            if job.status != JOB_QUEUED:
+                return
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+            self.current_job = job
+        wait = job.started_at - job.submitted_at
+        self._add_event(job, "status", status=JOB_RUNNING, queued_seconds=wait)
+        job_logger = JobLogger(self.logger, self, job)
+
+        with trace_span("job", category="daemon", job=job.id, requester=job.requester) as span:
+            try:
+                # 第一个作业前的状态已由启动流程检查
+                exit_code = verify_cell_ready(self.robot, job_logger, self.agv_enabled) if self._ran_job else 0
+                self._ran_job = True
+                if exit_code == 0:
+                    params = dict(job.params, agv_enabled=self.agv_enabled)
+                    engine = WorkflowEngine(load_workflow(self.workflow), self.robot, job_logger, params,
+                                            parallel=self.overlap_steps)
+                    try:
+                        exit_code = engine.run()
+                    finally:
+                        job.steps = {
+                            result.name: {"status": result.status, "duration": result.end_time - result.start_time}
+                            for result in engine.results.values()
+                        }
+            except Exception as e:
+                job_logger.error(f"作业执行异常: {e}")
+                exit_code = 3
+            span.set_attribute("exit_code", exit_code)
+            span.set_status(exit_code == 0)
+        self._finish(job, JOB_SUCCEEDED if exit_code == 0 else JOB_FAILED, exit_code)
+
+    def _worker_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                job = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._run_job(job)
+
+    # ------------------------------------------------------------------
+    # 服务
+    # ------------------------------------------------------------------
+    def start(self, listen="127.0.0.1:8765"):
+        """
+        启动工作线程和HTTP服务
+
+        Args:
+            listen: "host:port"，或 "unix:/path/to/socket" 使用Unix套接字（仅本机进程可访问）
+        """
+        self._server = _create_server(listen, self)
+        self._threads = [
+            threading.Thread(target=self._worker_loop, name="cell-worker", daemon=True),
+            threading.Thread(target=self._server.serve_forever, name="cell-http", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        self.logger.info(f"工作单元守护进程已启动，监听 {listen}")
+        return self
+
+    def request_stop(self, reason="停止请求"):
+        """停止接收作业；运行中的作业结束后退出，排队中的作业被取消"""
+        if not self._stop_event.is_set():
+            self.logger.warn(f"{reason}，运行中的作业结束后停止")
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+
+    def wait(self):
+        """阻塞直到收到停止请求且运行中的作业结束，然后关闭服务"""
+        while not self._stop_event.wait(0.5):
+            pass
+        for thread in self._threads[:1]:
+            thread.join()
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self.cancel(job.id)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            if isinstance(self._server, socketserver.UnixStreamServer):
+                try:
+                    os.unlink(self._server.server_address)
+                except OSError:
+                    pass
+        self.logger.info("工作单元守护进程已停止")
+
+    def health(self):
+        with self._condition:
+            current = self.current_job.id if self.current_job else None
+        return {
+            "status": "stopping" if self._stop_event.is_set() else "ready",
+            "current_job": current,
+            "queued": self._queue.qsize(),
+            "workflow": self.workflow,
+            "agv_enabled": self.agv_enabled,
+        }
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """作业接口的HTTP请求处理"""
+
+    daemon = None  # 由 _create_server 设置
+
+    def log_message(self, format, *args):
+        pass  # 作业日志已记录，不重复输出访问日志
+
+    def _send_json(self, code, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        """解析 /jobs/<id>[/子路径]，返回 (作业, 子路径)；路径无效或作业不存在时返回 (None, None) 并已响应404"""
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+        if len(parts) < 2 or parts[0] != "jobs":
+            self._send_json(404, {"error": "未知路径"})
+            return None, None
+        try:
+            job = self.daemon.get(int(parts[1]))
+        except ValueError:
+            job = None
+        if job is None:
+            self._send_json(404, {"error": f"作业不存在: {parts[1]}"})
+            return None, None
+        return job, "/".join(parts[2:])
+
+    def do_GET(self):
+        path = urlparse(self.path).path.rstrip("/")
+        if path == "/health":
+            return self._send_json(200, self.daemon.health())
+        if path == "/jobs":
+            return self._send_json(200, {"jobs": self.daemon.list_jobs()})
+        job, sub = self._route()
+        if job is None:
+            return
+        if sub == "":
+            return self._send_json(200, job.to_dict(include_events=True))
+        if sub == "events":
+            return self._stream_events(job)
+        self._send_json(404, {"error": "未知路径"})
+
+    def _stream_events(self, job):
+        query = parse_qs(urlparse(self.path).query)
+        text = query.get("after", ["0"])[0]
+        try:
+            after = int(text)
+        except ValueError:
+            after = -1
+        if after < 0:
+            return self._send_json(400, {"error": f"after 应为非负整数: {text}"})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            while True:
+                events, finished = self.daemon.wait_events(job, after, timeout=EVENT_HEARTBEAT_INTERVAL)
+                lines = [json.dumps(event, ensure_ascii=False) for event in events] or \
+                        [json.dumps({"type": "heartbeat", "time": time.time(), "job": job.id})]
+                self.wfile.write(("\n".join(lines) + "\n").encode("utf-8"))
+                self.wfile.flush()
+                after += len(events)
+                if finished and len(job.events) <= after:
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 请求方断开，不影响作业执行
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            return self._send_json(404, {"error": "未知路径"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise JobError("请求体应为JSON对象")
+            requester = body.pop("requester", None) or self.headers.get("X-Requester")
+            job = self.daemon.submit(body, requester)
+        except (JobError, ValueError) as e:
+            return self._send_json(400, {"error": str(e)})
+        except RuntimeError as e:
+            return self._send_json(503, {"error": str(e)})
+        self._send_json(202, job.to_dict())
+
+    def do_DELETE(self):
+        job, sub = self._route()
+        if job is None:
+            return
+        if sub != "":
+            return self._send_json(404, {"error": "未知路径"})
+        if self.daemon.cancel(job.id):
+            return self._send_json(200, job.to_dict())
+        self._send_json(409, {"error": f"作业 {job.id} 状态为 {job.status}，只能取消排队中的作业"})
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)  # BaseHTTPRequestHandler 需要 (host, port) 形式的客户端地址
+
+
+def _create_server(listen, daemon):
+    handler = type("CellRequestHandler", (_RequestHandler,), {"daemon": daemon})
+    if listen.startswith("unix:"):
+        path = listen[len("unix:"):]
+        if os.path.exists(path):
+            os.unlink(path)
+        return _UnixHTTPServer(path, handler)
+    host, _, port = listen.rpartition(":")
+    return ThreadingHTTPServer((host or "127.0.0.1", int(port)), handler)
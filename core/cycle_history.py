@@ -0,0 +1,170 @@
+"""
+生产历史记录 - 将每次运行的循环、工作步骤、计划执行（反馈值/重试）、AGV移动、阻挡和报警追加到本地SQLite数据库
+
+作为 utils.tracing 的span接收者工作：已有的 cycle / step:* / plan:* / agv:navigation / fleet:move span
+和 agv:blockage / alarm:* 事件直接写入，业务代码不需要额外埋点。写入在后台线程中批量提交，
+不阻塞机器人和AGV线程；多个进程（如 cell_supervisor 的各工作进程）可以写入同一个数据库（WAL模式）。
+
+表结构:
+    runs:  每次运行一行（开始/结束时间、程序、机器人序列号、主机、进程号、命令行、返回码）
+    spans: 每个span/事件一行（运行id、span_id/parent_id、名称、分类、开始时间、耗时、结果、属性JSON）；
+           事件的耗时为0，阻挡事件的 parent_id 指向所在的 agv:navigation span
+
+用法:
+    history = CycleHistory("cycle_history.db", program="main", robot="Rizon10-062283")
+    ...                                   # 运行期间结束的span自动写入
+    history.close(exit_code)
+
+    python -m benchmarks.history_report cycle_history.db
+"""
+import json
+import os
+import queue
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+from utils.tracing import add_span_sink, remove_span_sink
+
+SCHEMA_VERSION = 1
+
+# 写入的span分类（modbus事务数量大且已由追踪文件覆盖，不写入）
+RECORDED_CATEGORIES = frozenset({"production", "workflow", "plan", "agv", "alarm", "daemon", "startup"})
+
+# 后台线程的提交间隔(秒)
+FLUSH_INTERVAL = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    ended REAL,
+    program TEXT,
+    robot TEXT,
+    host TEXT,
+    pid INTEGER,
+    argv TEXT,
+    exit_code INTEGER
+);
+CREATE TABLE IF NOT EXISTS spans (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    span_id INTEGER NOT NULL,
+    parent_id INTEGER,
+    name TEXT NOT NULL,
+    category TEXT,
+    start REAL NOT NULL,
+    duration REAL NOT NULL,
+    status TEXT,
+    attributes TEXT
+);
+CREATE INDEX IF NOT EXISTS spans_by_name ON spans (name, start);
+CREATE INDEX IF NOT EXISTS spans_by_id ON spans (run_id, span_id);
+"""
+
+_STOP = object()
+
+
+def connect(path, timeout=30.0):
+    """打开历史数据库（不存在时创建表），返回 sqlite3.Connection"""
+    connection = sqlite3.connect(path, timeout=timeout)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(_SCHEMA)
+    connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    return connection
+
+
+class CycleHistory:
+    """
+    历史记录接收者：创建时写入 runs 行并注册为span接收者，close() 时写入结束时间和返回码
+
+    Args:
+        path: SQLite数据库路径
+        program: 程序名称（main / cell_supervisor / ...）
+        robot: 机器人序列号
+        categories: 写入的span分类，默认 RECORDED_CATEGORIES
+
+    打开数据库失败时抛出 sqlite3.Error / OSError，调用方决定是否在没有历史记录的情况下继续运行。
+    """
+
+    def __init__(self, path, program=None, robot=None, categories=RECORDED_CATEGORIES):
+        self.path = path
+        self.categories = categories
+        self.recorded = 0
+        self.dropped = 0
+        self._queue = queue.Queue()
+        self._ready = threading.Event()
+        self._error = None
+        self.run_id = None
+        self._writer = threading.Thread(target=self._write_loop, args=(program, robot), name="cycle-history",
+                                        daemon=True)
+        self._writer.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        add_span_sink(self)
+
+    def emit(self, span):
+        """span接收者接口（在产生span的线程中调用，只入队）"""
+        if span.category not in self.categories or self.run_id is None:
+            return
+        attributes = json.dumps(span.attributes, ensure_ascii=False, default=str) if span.attributes else None
+        self._queue.put((self.run_id, span.span_id, span.parent_id, span.name, span.category,
+                         span.start, 0.0 if span.instant else span.duration, span.status, attributes))
+
+    def _write_loop(self, program, robot):
+        try:
+            connection = connect(self.path)
+            with connection:
+                self.run_id = connection.execute(
+                    "INSERT INTO runs (started, program, robot, host, pid, argv) VALUES (?, ?, ?, ?, ?, ?)",
+                    (time.time(), program, robot, socket.gethostname(), os.getpid(), " ".join(sys.argv))).lastrowid
+        except (sqlite3.Error, OSError) as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        exit_code, stopping = None, False
+        while not stopping:
+            rows = []
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL)
+                while True:
+                    if item[0] is _STOP:
+                        stopping, exit_code = True, item[1]
+                        break
+                    rows.append(item)
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            if rows:
+                try:
+                    with connection:
+                        connection.executemany("INSERT INTO spans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                    self.recorded += len(rows)
+                except sqlite3.Error as e:
+                    self.dropped += len(rows)
+                    print(f"[WARNING] 写入历史记录失败，丢弃 {len(rows)} 条: {e}")
+        try:
+            with connection:
+                connection.execute("UPDATE runs SET ended = ?, exit_code = ? WHERE id = ?",
+                                   (time.time(), exit_code, self.run_id))
+        except sqlite3.Error as e:
+            print(f"[WARNING] 写入运行结束记录失败: {e}")
+        connection.close()
+
+    def close(self, exit_code=None):
+        """注销接收者，写入剩余记录、结束时间和返回码"""
+        remove_span_sink(self)
+        if self._writer.is_alive():
+            self._queue.put((_STOP, exit_code))
+            self._writer.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import Counter
+
+
+class FakeMode:
+    """与 flexivrdk.Mode 同名的模式常量"""
+    IDLE = "Mode.IDLE"
+    NRT_PLAN_EXECUTION = "Mode.NRT_PLAN_EXECUTION"
+
+
+class FakePlan:
+    """
+    模拟计划
+
+    Args:
+        duration: 执行时间(秒)；也可以是序列，按执行次数依次取值，用完后重复最后一个
+        feedback: 执行结束时写入 WorkFeedBack 的值；也可以是序列（如 [101, 101, 10] 模拟两次拍照失败后成功），
+                  或 callable(global_vars) 根据当前全局变量返回反馈值
+        outputs: 执行结束时额外写入的全局变量
+    """
+
+    def __init__(self, duration=1.0, feedback=None, outputs=None):
+        self.duration = duration
+        self.feedback = feedback
+        self.outputs = dict(outputs or {})
+        self.run_count = 0
+
+    @staticmethod
+    def _pick(value, index):
+        if isinstance(value, (list, tuple)):
+            return value[min(index, len(value) - 1)] if value else None
+        return value
+
+    def next_duration(self):
+        return float(self._pick(self.duration, self.run_count))
+
+    def next_feedback(self, global_vars):
+        if callable(self.feedback):
+            return self.feedback(global_vars)
+        return self._pick(self.feedback, self.run_count)
+
+
+def default_fake_plans():
+    """与 memory_stick 工作流程对应的默认计划及成功反馈值"""
+    return {
+        "ChangeTool": FakePlan(duration=8.0, feedback=90),
+        "PickMestick": FakePlan(duration=12.0, feedback=10),
+        "PutMestick": FakePlan(duration=12.0, feedback=20),
+    }
+
+
+class FakeRobot:
+    """
+    进程内模拟的Flexiv机器人，实现流程用到的 flexivrdk.Robot 接口
+
+    计划执行按配置的时长计时（time_scale 可整体缩放），结束时写入脚本化的 WorkFeedBack，
+    用于在没有真实机械臂时运行和计时工作流程。call_counts 记录各接口调用次数。
+
+    Args:
+        serial: 机器人序列号
+        plans: 计划名称 -> FakePlan，默认 default_fake_plans()
+        time_scale: 计划时长缩放系数，如0.01表示以百分之一的时间运行
+        enable_time: Enable() 后进入operational状态所需时间(秒)，同样按 time_scale 缩放
+        fault: 初始是否处于故障状态
+        global_vars: 初始全局变量
+    """
+
+    Mode = FakeMode
+
+    def __init__(self, serial="Rizon-Fake", plans=None, time_scale=1.0, enable_time=0.0, fault=False, global_vars=None):
+        self.serial = serial
+        self.plans = default_fake_plans() if plans is None else dict(plans)
+        self.time_scale = time_scale
+        self.enable_time = enable_time
+        self.call_counts = Counter()
+        self.executed_plans = []            # (计划名称, 开始时间, 时长, 反馈值)
+        self._fault = fault
+        self._enabled_at = None
+        self._mode = FakeMode.IDLE
+        self._global_vars = {"WorkFeedBack": 0}
+        self._global_vars.update(global_vars or {})
+        self._current = None                # (计划名称, 结束时间, 反馈值)
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        self.call_counts[name] += 1
+
+    def _update(self):
+        """检查当前计划是否已结束，结束时写入反馈（需持有锁）"""
+        if self._current is not None and time.monotonic() >= self._current[1]:
+            name, _, feedback = self._current
+            plan = self.plans[name]
+            if feedback is not None:
+                self._global_vars["WorkFeedBack"] = feedback
+            self._global_vars.update(plan.outputs)
+            plan.run_count += 1
+            self._current = None
+
+    # ------------------------------------------------------------------
+    # 状态与模式
+    # ------------------------------------------------------------------
+    def fault(self):
+        self._count("fault")
+        return self._fault
+
+    def ClearFault(self):
+        self._count("ClearFault")
+        self._fault = False
+        return True
+
+    def inject_fault(self):
+        """模拟机器人故障：停止当前计划并进入故障状态"""
+        with self._lock:
+            self._fault = True
+            self._current = None
+            self._enabled_at = None
+
+    def Enable(self):
+        self._count("Enable")
+        if self._fault:
+            raise RuntimeError("机器人处于故障状态，无法启用")
+        self._enabled_at = time.monotonic() + self.enable_time * self.time_scale
+
+    def operational(self):
+        self._count("operational")
+        return not self._fault and self._enabled_at is not None and time.monotonic() >= self._enabled_at
+
+    def SwitchMode(self, mode):
+        self._count("SwitchMode")
+        self._mode = mode
+
+    def mode(self):
+        self._count("mode")
+        return self._mode
+
+    def Stop(self):
+        self._count("Stop")
+        with self._lock:
+            self._current = None
+        self._mode = FakeMode.IDLE
+
+    # ------------------------------------------------------------------
+    # 计划与全局变量
+    # ------------------------------------------------------------------
+    def plan_list(self):
+        self._count("plan_list")
+        return list(self.plans)
+
+    def ExecutePlan(self, name, continue_exec=False):
+        self._count("ExecutePlan")
+        if not self.operational():
+            raise RuntimeError("机器人未进入operational状态，无法执行计划")
+        if self._mode != FakeMode.NRT_PLAN_EXECUTION:
+            raise RuntimeError(f"当前模式 {self._mode} 不支持执行计划")
+        if name not in self.plans:
+            raise RuntimeError(f"计划不存在: {name}")
+        with self._lock:
+            self._update()
+            if self._current is not None:
+                raise RuntimeError(f"计划 {self._current[0]} 仍在执行")
+            plan = self.plans[name]
+            duration = plan.next_duration() * self.time_scale
+            feedback = plan.next_feedback(dict(self._global_vars))
+            start = time.monotonic()
+            self._current = (name, start + duration, feedback)
+            self.executed_plans.append((name, start, duration, feedback))
+
+    def busy(self):
+        self._count("busy")
+        with self._lock:
+            self._update()
+            return self._current is not None
+
+    def SetGlobalVariables(self, global_vars):
+        self._count("SetGlobalVariables")
+        with self._lock:
+            self._global_vars.update(global_vars)
+
+    def global_variables(self):
+        self._count("global_variables")
+        with self._lock:
+            self._update()
+            return dict(self._global_vars)
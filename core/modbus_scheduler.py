@@ -0,0 +1,242 @@
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.tracing import current_span, trace_span, tracing_enabled
+
+# 事务优先级（数值越小越优先）
+PRIORITY_MOTION = 0        # 运动与控制命令（目标站点、速度、控制权、定位）
+PRIORITY_STATUS = 10       # 工作流程中的状态查询
+PRIORITY_TELEMETRY = 20    # 后台遥测轮询
+PRIORITY_AUDIO = 30        # 音频播放/报警
+PRIORITY_DIAGNOSTIC = 40   # 诊断与连接保活
+
+# 代理默认等待事务完成的超时时间(秒)
+DEFAULT_RESULT_TIMEOUT = 30.0
+
+# 不产生通信的客户端方法，不计入连接健康统计
+UNTRACKED_METHODS = frozenset(("connect", "close", "is_socket_open"))
+
+
+class ModbusTransactionScheduler:
+    """
+    Modbus事务调度器 - 独占一个客户端套接字，按优先级串行执行所有请求
+
+    所有线程通过 submit() 提交事务并拿到 Future，工作线程按 (优先级, 提交顺序)
+    依次执行，保证同一时刻只有一个请求帧在套接字上，运动命令不会排在报警写入之后。
+    """
+
+    def __init__(self, client, name="modbus"):
+        self.client = client
+        self.name = name
+        self.completed_count = 0
+        self.failed_count = 0
+        self.last_success_time = 0.0   # 最近一次事务成功完成的时间
+        self.last_failure_time = 0.0   # 最近一次事务因通信异常失败的时间
+        self._listeners = []
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._thread = None
+        self._running = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """启动调度工作线程"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._worker_loop, name=f"{self.name}-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """停止调度器，未执行的事务以异常结束"""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            # 哨兵以最高优先级入队，立即唤醒工作线程
+            self._queue.put((-1, next(self._sequence), None, None))
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+        while True:
+            try:
+                _, _, future, _ = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if future is not None and future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError(f"[{self.name}] 调度器已停止，事务未执行"))
+
+    def is_running(self):
+        """调度器是否在运行"""
+        return self._running
+
+    def in_worker_thread(self):
+        """当前线程是否为调度工作线程"""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def pending_count(self):
+        """排队中的事务数量"""
+        return self._queue.qsize()
+
+    def add_listener(self, callback):
+        """
+        添加事务结果监听器
+
+        Args:
+            callback: callback(ok, error)，每个事务结束后在工作线程中调用；
+                      ok为False表示通信失败（抛出异常或返回异常对象）
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """移除事务结果监听器"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def idle_time(self):
+        """距最近一次成功事务的时间(秒)"""
+        return time.time() - self.last_success_time
+
+    def submit(self, transaction, priority=PRIORITY_STATUS, track=True, name=None):
+        """
+        提交一个事务
+
+        Args:
+            transaction: 可调用对象，参数为底层客户端，返回值作为Future结果；
+                         一个事务内的多个请求连续执行，不会被其他事务插入
+            priority: 事务优先级，数值越小越优先
+            track: 是否将结果计入连接健康统计并通知监听器，默认True
+            name: 追踪span中的事务名称，默认为事务函数名
+
+        Returns:
+            Future: 事务结果
+        """
+        future = Future()
+        # 追踪启用时记录提交者的span和提交时间，工作线程中据此生成事务span（含排队时间）
+        trace = (name or getattr(transaction, "__name__", "transaction"), priority, current_span(),
+                 time.time()) if tracing_enabled() else None
+        if self.in_worker_thread():
+            # 在事务内部再次提交时直接执行，避免自等待死锁
+            self._execute(future, transaction, track, trace)
+            return future
+        if not self._running:
+            future.set_exception(RuntimeError(f"[{self.name}] 调度器未启动"))
+            return future
+        self._queue.put((priority, next(self._sequence), future, (transaction, track, trace)))
+        return future
+
+    def call(self, method, *args, priority=PRIORITY_STATUS, **kwargs):
+        """提交单个客户端方法调用，返回Future"""
+        return self.submit(lambda client: getattr(client, method)(*args, **kwargs), priority,
+                           track=method not in UNTRACKED_METHODS, name=method)
+
+    def _execute(self, future, transaction, track=True, trace=None):
+        """执行一个事务并设置Future结果"""
+        if trace is None:
+            self._run_transaction(future, transaction, track)
+            return
+        name, priority, parent, submitted_at = trace
+        with trace_span(f"modbus:{name}", category="modbus", parent=parent, scheduler=self.name,
+                        priority=priority, queue_ms=round((time.time() - submitted_at) * 1000, 3)) as span:
+            self._run_transaction(future, transaction, track)
+            error = future.exception() if future.done() else None
+            if error is None and isinstance(future.result(), Exception):
+                error = future.result()
+            if error is not None:
+                span.set_attribute("error", str(error))
+            span.set_status(error is None)
+
+    def _run_transaction(self, future, transaction, track):
+        try:
+            result = transaction(self.client)
+        except BaseException as e:
+            self.failed_count += 1
+            if track:
+                self.last_failure_time = time.time()
+                self._notify(False, e)
+            future.set_exception(e)
+        else:
+            self.completed_count += 1
+            if track:
+                # 客户端在无响应时可能返回异常对象而不是抛出，同样视为通信失败
+                if isinstance(result, Exception):
+                    self.last_failure_time = time.time()
+                    self._notify(False, result)
+                else:
+                    self.last_success_time = time.time()
+                    self._notify(True, None)
+            future.set_result(result)
+
+    def _notify(self, ok, error):
+        """通知事务结果监听器"""
+        for callback in list(self._listeners):
+            try:
+                callback(ok, error)
+            except Exception as e:
+                print(f"[ERROR] [{self.name}] 事务监听器执行失败: {e}")
+
+    def _worker_loop(self):
+        """工作线程循环"""
+        while True:
+            _, _, future, job = self._queue.get()
+            if future is None:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue  # 调用方已取消
+            transaction, track, trace = job
+            self._execute(future, transaction, track, trace)
+
+
+class ScheduledModbusClient:
+    """
+    经调度器转发的Modbus客户端代理
+
+    提供与 ModbusTcpClient 相同的同步调用方式（read_*/write_* 等），每次调用都作为
+    一个事务以固定优先级提交并等待结果，现有以 client 为参数的函数无需修改。
+    需要异步结果时使用 submit()/call() 获取Future。
+    """
+
+    def __init__(self, scheduler, priority=PRIORITY_STATUS, timeout=DEFAULT_RESULT_TIMEOUT):
+        self._scheduler = scheduler
+        self._priority = priority
+        self._timeout = timeout
+
+    @property
+    def scheduler(self):
+        return self._scheduler
+
+    @property
+    def priority(self):
+        return self._priority
+
+    def with_priority(self, priority):
+        """返回共享同一调度器、使用另一优先级的代理"""
+        return ScheduledModbusClient(self._scheduler, priority, self._timeout)
+
+    def submit(self, transaction, priority=None, track=True, name=None):
+        """提交事务（可包含多个请求），返回Future"""
+        return self._scheduler.submit(transaction, self._priority if priority is None else priority, track, name)
+
+    def call(self, method, *args, priority=None, **kwargs):
+        """提交单个客户端方法调用，返回Future"""
+        return self._scheduler.call(method, *args, priority=self._priority if priority is None else priority, **kwargs)
+
+    def __getattr__(self, name):
+        attr = getattr(self._scheduler.client, name)
+        if not callable(attr):
+            return attr
+
+        def scheduled_call(*args, **kwargs):
+            future = self._scheduler.call(name, *args, priority=self._priority, **kwargs)
+            return future.result(timeout=self._timeout)
+
+        scheduled_call.__name__ = name
+        return scheduled_call
+
+    def __repr__(self):
+        return f"ScheduledModbusClient({self._scheduler.name}, priority={self._priority})"
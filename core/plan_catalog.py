@@ -0,0 +1,97 @@
+import threading
+import time
+
+
+class PlanCatalog:
+    """机器人计划目录快照，成员判断为O(1)"""
+
+    def __init__(self, robot_sn, plans):
+        self.robot_sn = robot_sn
+        self.plans = tuple(plans)
+        self.loaded_at = time.time()
+        self._plan_set = frozenset(self.plans)
+
+    def __contains__(self, plan_name):
+        return plan_name in self._plan_set
+
+    def __iter__(self):
+        return iter(self.plans)
+
+    def __len__(self):
+        return len(self.plans)
+
+    def __getitem__(self, index):
+        return self.plans[index]
+
+    def missing(self, plan_names):
+        """返回不在目录中的计划名称列表"""
+        return [name for name in plan_names if name not in self._plan_set]
+
+    def __repr__(self):
+        return f"PlanCatalog({self.robot_sn}, {len(self.plans)} plans)"
+
+
+# 机器人序列号 -> PlanCatalog
+_catalogs = {}
+# id(robot) -> 机器人序列号（RDK机器人对象不支持弱引用，按对象id登记）
+_robot_serials = {}
+_lock = threading.Lock()
+
+
+def _robot_key(robot):
+    return _robot_serials.get(id(robot), f"robot@{id(robot):x}")
+
+
+def load_plan_catalog(robot, robot_sn=None, logger=None):
+    """
+    读取机器人计划列表并缓存（init_robot 连接成功后调用，重连时覆盖旧目录）
+
+    Args:
+        robot: 机器人对象
+        robot_sn: 机器人序列号，作为缓存键；为None时使用已登记的序列号
+        logger: 日志记录器（可选）
+
+    Returns:
+        PlanCatalog: 计划目录
+
+    Raises:
+        Exception: robot.plan_list() 失败时原样抛出
+    """
+    plans = robot.plan_list()
+    with _lock:
+        if robot_sn is not None:
+            _robot_serials[id(robot)] = robot_sn
+        key = _robot_key(robot)
+        catalog = PlanCatalog(key, plans)
+        _catalogs[key] = catalog
+    if logger:
+        logger.info(f"已缓存机器人 {key} 的计划目录，共 {len(catalog)} 个计划")
+    return catalog
+
+
+def get_plan_catalog(robot, logger=None):
+    """获取机器人计划目录，未缓存时读取一次"""
+    with _lock:
+        catalog = _catalogs.get(_robot_key(robot))
+    if catalog is None:
+        catalog = load_plan_catalog(robot, logger=logger)
+    return catalog
+
+
+def has_plan(robot, plan_name):
+    """计划是否存在于机器人计划目录中（使用缓存）"""
+    return plan_name in get_plan_catalog(robot)
+
+
+def refresh_plan_catalog(robot, logger=None):
+    """强制重新读取计划目录（机器人上新增/删除计划后调用）"""
+    return load_plan_catalog(robot, logger=logger)
+
+
+def invalidate_plan_catalog(robot_sn=None):
+    """清除指定序列号（None为全部）的计划目录缓存"""
+    with _lock:
+        if robot_sn is None:
+            _catalogs.clear()
+        else:
+            _catalogs.pop(robot_sn, None)
@@ -0,0 +1,142 @@
+import contextlib
+import signal
+import threading
+import time
+
+from core.rdk_init import ensure_robot_ready
+from utils.tracing import trace_span
+
+
+def verify_cell_ready(robot, logger, agv_enabled=True):
+    """
+    循环/作业之间的轻量状态检查：机器人就绪（必要时恢复），AGV回到工作站点（已在站点时不移动）
+
+    Returns:
+        int: 0-就绪，3-机器人未就绪，5-AGV未能回到工作站点
+    """
+    if not ensure_robot_ready(robot, logger):
+        return 3
+    if not agv_enabled:
+        return 0
+    from AGV import simple_initialize_agv  # 禁用AGV时不加载AGV/Modbus模块
+    if not simple_initialize_agv(logger):
+        logger.error("AGV未能回到工作站点")
+        return 5
+    return 0
+
+
+@contextlib.contextmanager
+def stop_on_signals(request_stop, signals=(signal.SIGINT, signal.SIGTERM)):
+    """
+    安装信号处理：第一次信号调用 request_stop(原因)，再次收到SIGINT时抛出KeyboardInterrupt立即中断
+
+    只能在主线程中使用，退出时恢复原来的处理函数。
+    """
+    previous = {}
+    received = []
+
+    def handler(signum, frame):
+        if received and signum == signal.SIGINT:
+            raise KeyboardInterrupt
+        received.append(signum)
+        request_stop(f"收到信号 {signal.Signals(signum).name}")
+
+    for signum in signals:
+        previous[signum] = signal.signal(signum, handler)
+    try:
+        yield
+    finally:
+        for signum, old_handler in previous.items():
+            signal.signal(signum, old_handler)
+
+
+class ProductionLoop:
+    """
+    连续生产循环 - 在同一机器人会话和AGV连接上重复执行工作循环
+
+    每个循环前（第一个除外）调用 verify 做轻量状态检查，代替每个零件重新初始化；
+    收到停止请求（SIGINT/SIGTERM 或 request_stop）后当前循环正常结束再退出。
+
+    Args:
+        run_cycle: run_cycle(cycle) -> int，执行一个循环，返回0表示成功
+        logger: 日志记录器
+        cycles: 循环次数，None表示持续运行直到停止
+        verify: verify(cycle) -> int，循环之间的状态检查，返回0表示可以继续，否则作为退出码
+        stop_on_failure: 循环失败时是否停止，默认True
+    """
+
+    def __init__(self, run_cycle, logger, cycles=1, verify=None, stop_on_failure=True):
+        self.run_cycle = run_cycle
+        self.logger = logger
+        self.cycles = cycles
+        self.verify = verify
+        self.stop_on_failure = stop_on_failure
+        self.completed = 0
+        self.failed = 0
+        self.cycle_times = []
+        self._stop_event = threading.Event()
+
+    def request_stop(self, reason="停止请求"):
+        """请求在当前循环结束后停止"""
+        if not self._stop_event.is_set():
+            self.logger.warn(f"{reason}，当前循环结束后停止")
+        self._stop_event.set()
+
+    @property
+    def stop_requested(self):
+        return self._stop_event.is_set()
+
+    def handle_signals(self):
+        """SIGINT/SIGTERM时在当前循环结束后停止（见 stop_on_signals）"""
+        return stop_on_signals(self.request_stop)
+
+    def _log_progress(self, cycle, result, elapsed):
+        average = sum(self.cycle_times) / len(self.cycle_times)
+        rate = 3600.0 / average if average else 0.0
+        total = f"/{self.cycles}" if self.cycles is not None else ""
+        if result == 0:
+            self.logger.info(f"第 {cycle}{total} 个循环完成，用时 {elapsed:.1f}s "
+                             f"(平均 {average:.1f}s，约 {rate:.0f} 个/小时)")
+        else:
+            self.logger.error(f"第 {cycle}{total} 个循环失败，返回码 {result}，用时 {elapsed:.1f}s")
+
+    def run(self):
+        """
+        执行循环直到达到次数、收到停止请求或（stop_on_failure时）循环失败
+
+        Returns:
+            int: 0-全部成功，否则为最后一个失败循环或状态检查的返回码
+        """
+        exit_code = 0
+        cycle = 0
+        while not self._stop_event.is_set() and (self.cycles is None or cycle < self.cycles):
+            cycle += 1
+            if cycle > 1 and self.verify is not None:
+                verify_code = self.verify(cycle)
+                if verify_code != 0:
+                    self.logger.error(f"第 {cycle} 个循环前状态检查失败，返回码 {verify_code}")
+                    exit_code = verify_code
+                    break
+                if self._stop_event.is_set():
+                    break
+
+            start = time.monotonic()
+            with trace_span("cycle", category="production", cycle=cycle) as span:
+                result = self.run_cycle(cycle)
+                span.set_attribute("exit_code", result)
+                span.set_status(result == 0)
+            elapsed = time.monotonic() - start
+            self.cycle_times.append(elapsed)
+
+            if result == 0:
+                self.completed += 1
+            else:
+                self.failed += 1
+                exit_code = result
+            self._log_progress(cycle, result, elapsed)
+            if result != 0 and self.stop_on_failure:
+                break
+
+        if self.cycles != 1:
+            self.logger.info(f"生产循环结束：成功 {self.completed}，失败 {self.failed}")
+        return exit_code
@@ -1,23 +1,78 @@
-import flexivrdk
 import time
 
-def init_robot(robot_sn, logger):
+from core.plan_catalog import load_plan_catalog, invalidate_plan_catalog
+from plans.global_variables import invalidate_global_variables
+from utils.polling import poll_until
+
+# 等待条件的超时时间(秒)
+OPERATIONAL_TIMEOUT = 30.0   # Enable() 后进入操作状态
+MODE_SWITCH_TIMEOUT = 10.0   # SwitchMode() 后模式生效
+
+# id(robot) -> 模式常量（RDK机器人对象不支持添加属性，按对象id登记，供 ensure_robot_ready 使用）
+_robot_modes = {}
+
+
+class RobotStartupAborted(Exception):
+    """启用前的条件检查（before_enable）未通过，机器人已连接但未启用"""
+
+
+def _create_rdk_robot(robot_sn, **options):
+    """创建真实的Flexiv机器人连接，返回 (robot, 模式常量)"""
+    import flexivrdk
+    return flexivrdk.Robot(robot_sn), flexivrdk.Mode
+
+
+def _create_fake_robot(robot_sn, **options):
+    """创建进程内模拟机器人，options 传给 FakeRobot（plans、time_scale 等）"""
+    from core.fake_robot import FakeRobot
+    robot = FakeRobot(robot_sn, **options)
+    return robot, robot.Mode
+
+
+# 机器人后端：名称 -> 工厂函数(robot_sn, **options) -> (robot, 模式常量)
+ROBOT_BACKENDS = {
+    "rdk": _create_rdk_robot,
+    "fake": _create_fake_robot,
+}
+
+
+def _record_phase(timings, phase, start):
+    """记录一个初始化阶段的耗时，返回当前时间作为下一阶段的起点"""
+    now = time.monotonic()
+    if timings is not None:
+        timings[phase] = now - start
+    return now
+
+
+def init_robot(robot_sn, logger, backend="rdk", timings=None, before_enable=None, **backend_options):
     """
     初始化Flexiv机器人连接
+
+    不使用固定等待：Enable() 后轮询 operational()，SwitchMode() 后轮询 mode()，各自有超时时间。
     
     Args:
         robot_sn: 机器人序列号
         logger: 日志记录器
+        backend: 机器人后端，"rdk"（真实机器人，默认）或 "fake"（core.fake_robot.FakeRobot）
+        timings: 可选字典，写入各阶段耗时(秒)：connect/wait_gate/enable/mode_switch/plan_catalog
+        before_enable: 可选，连接完成后、启用前调用（可阻塞，如等待AGV初始化结果），返回False时不启用机器人
+        **backend_options: 传给后端工厂的参数
         
     Returns:
         robot: 已初始化的机器人对象
         
     Raises:
+        RobotStartupAborted: before_enable 返回False
         Exception: 当初始化失败时抛出异常
     """
     try:
-        logger.info(f"正在创建机器人连接，序列号: {robot_sn}")
-        robot = flexivrdk.Robot(robot_sn)
+        if backend not in ROBOT_BACKENDS:
+            raise ValueError(f"未知的机器人后端: {backend}，可选: {sorted(ROBOT_BACKENDS)}")
+        logger.info(f"正在创建机器人连接，序列号: {robot_sn} (后端: {backend})")
+        phase_start = time.monotonic()
+        invalidate_plan_catalog(robot_sn)  # 重新连接后计划目录可能已变化
+        robot, robot_mode = ROBOT_BACKENDS[backend](robot_sn, **backend_options)
+        _robot_modes[id(robot)] = robot_mode
         
         # 检查机器人故障状态
         if robot.fault():
@@ -26,35 +81,48 @@ def init_robot(robot_sn, logger):
                 raise Exception("机器人错误无法清除，请检查机器人状态")
             logger.info("机器人错误已清除")
         
+        phase_start = _record_phase(timings, "connect", phase_start)
+
+        # 启用前的条件（其他子系统失败时机器人保持未启用状态）
+        if before_enable is not None:
+            if not before_enable():
+                raise RobotStartupAborted("启用条件未满足，机器人未启用")
+            phase_start = _record_phase(timings, "wait_gate", phase_start)
+
         # 启用机器人
         logger.info("正在启用机器人...")
         robot.Enable()
         
         # 等待机器人进入操作状态
         logger.info("等待机器人进入操作状态...")
-        timeout = 30  # 30秒超时
-        start_time = time.time()
+        poll = poll_until(robot.operational, bool, OPERATIONAL_TIMEOUT, min_interval=0.05, max_interval=0.5)
+        if not poll.ok:
+            raise Exception(f"机器人初始化超时，{OPERATIONAL_TIMEOUT:.0f}秒内未能进入操作状态")
+        phase_start = _record_phase(timings, "enable", phase_start)
         
-        while not robot.operational():
-            if time.time() - start_time > timeout:
-                raise Exception("机器人初始化超时，未能进入操作状态")
-            time.sleep(1)
-            logger.info("机器人仍在初始化中...")
-        
-        # 切换到计划执行模式
+        # 切换到计划执行模式，等待模式生效
         logger.info("切换到计划执行模式...")
-        robot.SwitchMode(flexivrdk.Mode.NRT_PLAN_EXECUTION)
-        
-        # 等待模式切换完成
-        time.sleep(2)
+        robot.SwitchMode(robot_mode.NRT_PLAN_EXECUTION)
+        poll = poll_until(robot.mode, lambda mode: mode == robot_mode.NRT_PLAN_EXECUTION, MODE_SWITCH_TIMEOUT,
+                          min_interval=0.02, max_interval=0.2)
+        if not poll.ok:
+            raise Exception(f"{MODE_SWITCH_TIMEOUT:.0f}秒内未能切换到计划执行模式，当前模式: {poll.value}")
+        logger.info(f"机器人当前模式: {poll.value}")
+        phase_start = _record_phase(timings, "mode_switch", phase_start)
         
-        # 验证当前模式
-        current_mode = robot.mode()
-        logger.info(f"机器人当前模式: {current_mode}")
+        # 缓存计划目录，供主程序和各计划模块复用（失败时在首次使用时再读取）
+        try:
+            load_plan_catalog(robot, robot_sn, logger)
+        except Exception as e:
+            logger.warn(f"读取计划目录失败，将在首次使用时重试: {e}")
+        _record_phase(timings, "plan_catalog", phase_start)
         
         logger.info("✅ 机器人初始化完成")
         return robot
         
+    except RobotStartupAborted as e:
+        logger.warn(f"机器人初始化已中止: {e}")
+        raise
     except Exception as e:
         logger.error(f"机器人初始化失败: {e}")
         logger.error("请检查:")
@@ -63,4 +131,47 @@ def init_robot(robot_sn, logger):
         logger.error("3. 机器人序列号是否正确")
         logger.error("4. 机器人RDK服务是否运行")
         logger.error("5. 机器人是否存在硬件故障")
-        raise
\ No newline at end of file
+        raise
+
+def ensure_robot_ready(robot, logger, timeout=30.0):
+    """
+    轻量检查已初始化的机器人是否可以执行下一个循环，必要时恢复（连续生产模式在循环之间调用）
+
+    正常情况下只查询 fault/operational/mode 三次；有故障时清除故障并重新启用，
+    模式被切换时切回计划执行模式。就绪时清除全局变量会话的已知值。
+
+    Args:
+        robot: init_robot 返回的机器人对象
+        logger: 日志记录器
+        timeout: 重新启用后等待operational的超时时间(秒)
+
+    Returns:
+        bool: 机器人是否就绪
+    """
+    try:
+        if robot.fault():
+            logger.warn("检测到机器人错误，正在尝试清除...")
+            if not robot.ClearFault():
+                logger.error("机器人错误无法清除")
+                return False
+            robot.Enable()
+
+        if not robot.operational():
+            logger.warn("机器人未处于操作状态，重新启用...")
+            robot.Enable()
+            if not poll_until(robot.operational, bool, timeout, min_interval=0.1, max_interval=1.0).ok:
+                logger.error(f"机器人在{timeout:.0f}秒内未进入操作状态")
+                return False
+
+        robot_mode = _robot_modes.get(id(robot))
+        if robot_mode is not None and robot.mode() != robot_mode.NRT_PLAN_EXECUTION:
+            logger.warn(f"机器人模式为 {robot.mode()}，切换到计划执行模式")
+            robot.SwitchMode(robot_mode.NRT_PLAN_EXECUTION)
+
+        # 全局变量可能在循环/作业之间被外部修改（如示教器上修改PalletNum），下一个循环的写入全部下发
+        invalidate_global_variables(robot)
+        return True
+
+    except Exception as e:
+        logger.error(f"检查机器人状态失败: {e}")
+        return False
@@ -0,0 +1,71 @@
+import contextvars
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.tracing import trace_span
+
+# 等待其他子系统结果的阶段（如机器人启用前等待AGV初始化），不计入串行启动耗时
+GATE_PHASE = "wait_gate"
+
+StartupResult = namedtuple('StartupResult', ['name', 'value', 'error', 'elapsed', 'phases'])
+StartupResult.__doc__ = """
+子系统启动结果
+
+name: 子系统名称
+value: 启动函数的返回值（异常时为None）
+error: 启动函数抛出的异常（成功时为None）
+elapsed: 启动耗时(秒)
+phases: 启动函数写入的各阶段耗时 {阶段: 秒}
+"""
+
+
+def _run_subsystem(name, start_func):
+    phases = {}
+    start = time.monotonic()
+    with trace_span(f"startup:{name}", category="startup") as span:
+        try:
+            value, error = start_func(phases), None
+        except Exception as e:
+            value, error = None, e
+        span.set_status(error is None)
+        for phase, seconds in phases.items():
+            span.set_attribute(phase, round(seconds, 3))
+    return StartupResult(name, value, error, time.monotonic() - start, phases)
+
+
+def start_subsystems(subsystems, logger):
+    """
+    并行启动互相独立的子系统（机器人、AGV），等待全部完成
+
+    每个子系统在独立线程中运行自己的就绪条件等待，总启动时间取决于最慢的子系统而不是各子系统之和。
+    启动函数抛出的异常记录在结果中，不影响其他子系统。
+
+    Args:
+        subsystems: [(名称, start_func)]，start_func(phases) 执行启动并返回结果，可向 phases 字典写入各阶段耗时
+        logger: 日志记录器
+
+    Returns:
+        dict: 名称 -> StartupResult，按传入顺序
+    """
+    start = time.monotonic()
+    with trace_span("startup", category="startup"):
+        with ThreadPoolExecutor(max_workers=len(subsystems), thread_name_prefix="startup") as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, _run_subsystem, name, start_func)
+                for name, start_func in subsystems
+            ]
+            results = {future.result().name: future.result() for future in futures}
+    log_startup_report(results, time.monotonic() - start, logger)
+    return results
+
+
+def log_startup_report(results, total, logger):
+    """输出启动耗时明细：各子系统及其阶段耗时、总耗时和相对串行启动节省的时间"""
+    logger.info("启动耗时明细:")
+    for result in results.values():
+        phases = "，".join(f"{phase} {seconds:.2f}s" for phase, seconds in result.phases.items())
+        status = "成功" if result.error is None else f"失败: {result.error}"
+        logger.info(f"  {result.name}: {result.elapsed:.2f}s ({status}){'  [' + phases + ']' if phases else ''}")
+    serial = sum(result.elapsed - result.phases.get(GATE_PHASE, 0.0) for result in results.values())
+    logger.info(f"  总计 {total:.2f}s，串行启动需 {serial:.2f}s，节省 {max(0.0, serial - total):.2f}s")
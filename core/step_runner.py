@@ -0,0 +1,184 @@
+import contextvars
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+# 工作站资源
+RESOURCE_ARM = "arm"                    # 机械臂运动
+RESOURCE_VISION = "vision"              # 相机/视觉
+RESOURCE_AGV_BASE = "agv_base"          # AGV底盘运动
+RESOURCE_AGV_CONTROL = "agv_control"    # AGV控制权与定位操作
+
+# 安全互斥的资源组合：机械臂安装在AGV上，底盘运动时机械臂不得运动
+SAFETY_CONFLICTS = frozenset([
+    frozenset((RESOURCE_ARM, RESOURCE_AGV_BASE)),
+])
+
+# 步骤状态
+STEP_SUCCESS = "success"
+STEP_FAILED = "failed"
+STEP_SKIPPED = "skipped"
+
+StepResult = namedtuple('StepResult', ['name', 'status', 'result', 'start_time', 'end_time'])
+
+
+def resources_conflict(a, b):
+    """两组资源是否冲突（共用同一资源，或构成安全互斥组合）"""
+    if a & b:
+        return True
+    return any(frozenset((x, y)) in SAFETY_CONFLICTS for x in a for y in b)
+
+
+class WorkflowStep:
+    """
+    工作流程步骤声明
+
+    Args:
+        name: 步骤名称（唯一）
+        func: 无参可调用对象，返回步骤结果
+        resources: 步骤占用的资源集合
+        requires: 必须成功完成的前置步骤名称，任一失败/跳过则本步骤跳过
+        check: check(result) 判断步骤是否成功，默认按真值判断
+        critical: 失败时是否终止整个流程（尚未开始的步骤全部跳过）
+        after: 仅需结束（不论成败）的前置步骤名称，用于表达顺序约束
+    """
+
+    def __init__(self, name, func, resources=(), requires=(), check=bool, critical=True, after=()):
+        self.name = name
+        self.func = func
+        self.resources = frozenset(resources)
+        self.requires = tuple(requires)
+        self.after = tuple(after)
+        self.check = check
+        self.critical = critical
+
+    def __repr__(self):
+        return f"WorkflowStep({self.name}, resources={sorted(self.resources)})"
+
+
+class OverlappedStepRunner:
+    """
+    重叠步骤执行器
+
+    按声明顺序调度步骤：一个步骤在其前置步骤成功、且所有排在它前面的未完成步骤都不与它
+    资源冲突时立即开始。互不冲突的步骤（如机械臂作业期间的AGV预检查、控制权抢占）并发执行，
+    冲突步骤保持声明顺序，与串行执行的安全语义一致。
+
+    Args:
+        steps: WorkflowStep列表，前置步骤必须排在其后续步骤之前
+        logger: 日志记录器（可选）
+        sequential: 为True时严格按声明顺序逐个执行
+        max_workers: 工作线程池大小，默认与步骤数相同
+    """
+
+    def __init__(self, steps, logger=None, sequential=False, max_workers=None):
+        names = [step.name for step in steps]
+        if len(set(names)) != len(names):
+            raise ValueError(f"步骤名称重复: {names}")
+        for index, step in enumerate(steps):
+            unknown = [r for r in step.requires + step.after if r not in names[:index]]
+            if unknown:
+                raise ValueError(f"步骤 {step.name} 的前置步骤 {unknown} 不存在或排在其后")
+        self.steps = list(steps)
+        self.logger = logger
+        self.sequential = sequential
+        self.max_workers = max_workers or len(self.steps) or 1
+        self.results = {}
+        self._running = set()
+        self._aborted = False
+        self._condition = threading.Condition()
+
+    def _log(self, level, message):
+        if self.logger:
+            getattr(self.logger, level)(message)
+        else:
+            print(f"[{level.upper()}] {message}")
+
+    def _ready(self, index):
+        """返回步骤状态：'ready' 可开始，'wait' 需等待，'skip' 应跳过"""
+        step = self.steps[index]
+        for name in step.requires:
+            previous = self.results.get(name)
+            if previous is None:
+                return 'wait'
+            if previous.status != STEP_SUCCESS:
+                return 'skip'
+        if any(name not in self.results for name in step.after):
+            return 'wait'
+        for earlier in self.steps[:index]:
+            if earlier.name in self.results:
+                continue
+            if self.sequential or resources_conflict(earlier.resources, step.resources):
+                return 'wait'
+        return 'ready'
+
+    def _run_step(self, step):
+        start_time = time.time()
+        try:
+            result = step.func()
+            status = STEP_SUCCESS if step.check(result) else STEP_FAILED
+        except Exception as e:
+            self._log("error", f"步骤 {step.name} 异常: {e}")
+            result, status = e, STEP_FAILED
+        end_time = time.time()
+
+        with self._condition:
+            self._log("info" if status == STEP_SUCCESS else "error",
+                      f"步骤 {step.name} 结束: {status} (耗时{end_time - start_time:.2f}s)")
+            self.results[step.name] = StepResult(step.name, status, result, start_time, end_time)
+            self._running.discard(step.name)
+            if status != STEP_SUCCESS and step.critical:
+                self._aborted = True
+            self._condition.notify_all()
+
+    def _skip(self, step, reason):
+        now = time.time()
+        self.results[step.name] = StepResult(step.name, STEP_SKIPPED, None, now, now)
+        self._log("warn", f"步骤 {step.name} 跳过: {reason}")
+
+    def run(self):
+        """
+        执行所有步骤，直到全部结束
+
+        Returns:
+            dict: 步骤名称 -> StepResult
+        """
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="workflow-step") as executor:
+            with self._condition:
+                while len(self.results) < len(self.steps):
+                    progressed = False
+                    for index, step in enumerate(self.steps):
+                        if step.name in self.results or step.name in self._running:
+                            continue
+                        if self._aborted:
+                            self._skip(step, "关键步骤失败，流程终止")
+                            progressed = True
+                            continue
+                        state = self._ready(index)
+                        if state == 'skip':
+                            self._skip(step, "前置步骤未成功")
+                            progressed = True
+                        elif state == 'ready':
+                            concurrent = sorted(self._running)
+                            if concurrent:
+                                self._log("info", f"开始步骤 {step.name}（与 {', '.join(concurrent)} 并行）")
+                            else:
+                                self._log("info", f"开始步骤 {step.name}")
+                            self._running.add(step.name)
+                            # 在当前上下文中执行，步骤内的追踪span以流程span为父span
+                            executor.submit(contextvars.copy_context().run, self._run_step, step)
+                            progressed = True
+                    if not progressed and len(self.results) < len(self.steps):
+                        self._condition.wait()
+
+        elapsed = time.time() - start_time
+        busy = sum(r.end_time - r.start_time for r in self.results.values())
+        self._log("info", f"流程用时 {elapsed:.2f}s，步骤累计 {busy:.2f}s，重叠节省 {max(0.0, busy - elapsed):.2f}s")
+        return self.results
+
+    @property
+    def aborted(self):
+        """是否因关键步骤失败而终止"""
+        return self._aborted
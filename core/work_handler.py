@@ -1,4 +1,7 @@
-def handle_work_step(step_func, robot, logger, expected_values: list[int], step_name: str) -> bool:
+from utils.tracing import trace_span
+
+
+def handle_work_step(step_func, robot, logger, expected_values: list[int], step_name: str, **span_attributes) -> bool:
     """
     通用工作步骤处理器，提供统一的执行、日志记录和错误处理
     
@@ -8,25 +11,32 @@ def handle_work_step(step_func, robot, logger, expected_values: list[int], step_
         logger: 日志记录器
         expected_values: 期望的返回值列表
         step_name: 步骤名称（用于日志）
+        **span_attributes: 追踪span的附加属性（如重试次数 attempt）
         
     Returns:
         bool: 执行成功返回True，失败返回False
     """
-    try:
-        logger.info(f"开始执行步骤: {step_name}")
-        result = step_func(robot, logger)
-        logger.info(f"{step_name} 返回值: {result}")
-        
-        if result in expected_values:
-            logger.info(f"{step_name} 执行成功")
-            return True
-        else:
-            logger.error(f"{step_name} 执行失败，返回值 {result} 不在期望范围 {expected_values} 内")
-            return False
+    with trace_span(f"step:{step_name}", category="workflow", step=step_name, **span_attributes) as span:
+        try:
+            logger.info(f"开始执行步骤: {step_name}")
+            result = step_func(robot, logger)
+            logger.info(f"{step_name} 返回值: {result}")
+            span.set_attribute("result", result)
             
-    except Exception as e:
-        logger.error(f"{step_name} 执行异常: {e}")
-        return False
+            if result in expected_values:
+                logger.info(f"{step_name} 执行成功")
+                span.set_status(True)
+                return True
+            else:
+                logger.error(f"{step_name} 执行失败，返回值 {result} 不在期望范围 {expected_values} 内")
+                span.set_status(False)
+                return False
+                
+        except Exception as e:
+            logger.error(f"{step_name} 执行异常: {e}")
+            span.set_attribute("error", str(e))
+            span.set_status(False)
+            return False
     
 
 
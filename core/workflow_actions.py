@@ -0,0 +1,64 @@
+# 工作流程动作注册表：名称 -> action(robot, logger, context, **kwargs)
+WORKFLOW_ACTIONS = {}
+
+
+def workflow_action(name):
+    """注册工作流程动作的装饰器"""
+    def decorator(func):
+        WORKFLOW_ACTIONS[name] = func
+        return func
+    return decorator
+
+
+@workflow_action("agv_prepare")
+def agv_prepare(robot, logger, context, station):
+    """
+    AGV移动前准备：读取当前站点，不在目标站点时提前抢占控制权
+
+    结果写入 context['agv']，供 agv_move 使用；连接设置了站点行驶时间模型时 context['agv']['eta']
+    为预计行驶时间(秒)，供后续步骤按AGV到达时间安排机械臂动作；总是返回True（失败时由 agv_move 重新尝试）
+    """
+    from AGV import get_agv_connection, get_current_station, acquire_control  # AGV/Modbus模块只在使用AGV时加载
+    state = context.setdefault('agv', {'station': None, 'control': False})
+    global_conn = get_agv_connection()
+    client = global_conn.get_client()
+    if not client:
+        logger.warn("无法获取AGV连接，跳过站点检查")
+        return True
+    state['station'] = get_current_station(client, global_conn.get_telemetry_poller())
+    logger.info(f"AGV当前站点: {state['station']}")
+    estimate = global_conn.estimate_travel(station, state['station'])
+    state['eta'] = estimate.seconds if estimate is not None else None
+    if state['station'] != station:
+        state['control'] = acquire_control(client)
+    return True
+
+
+@workflow_action("agv_move")
+def agv_move(robot, logger, context, station):
+    """AGV移动到指定站点（已在该站点时直接返回True）"""
+    state = context.setdefault('agv', {'station': None, 'control': False})
+    if state['station'] == station:
+        logger.info(f"✅ AGV已在站点{station}，无需移动")
+        return True
+    logger.info(f"AGV需要从站点 {state['station']} 移动到站点{station}")
+    from AGV import move_agv_to_station
+    success = move_agv_to_station(station, logger, control_acquired=state['control'])
+    state['control'] = False  # move_agv_to_station 结束时已释放控制权
+    if success:
+        state['station'] = station
+    else:
+        logger.warn(f"AGV移动到站点{station}失败")
+    return success
+
+
+def release_workflow_resources(context, logger):
+    """流程结束后释放动作持有的资源（如提前抢占但未使用的AGV控制权）"""
+    state = context.get('agv')
+    if state and state.get('control'):
+        from AGV import get_agv_connection, release_control
+        client = get_agv_connection().get_client()
+        if client:
+            logger.info("释放预抢占的AGV控制权")
+            release_control(client)
+        state['control'] = False
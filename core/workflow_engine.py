@@ -0,0 +1,244 @@
+import importlib
+import json
+import os
+import re
+import time
+
+from core.work_handler import handle_work_step
+from core.step_runner import WorkflowStep, OverlappedStepRunner, STEP_SUCCESS, STEP_FAILED
+from core.workflow_actions import WORKFLOW_ACTIONS, release_workflow_resources
+from plans.plan_runner import PlanRunner
+from utils.tracing import trace_span
+
+# 工作流程定义目录
+WORKFLOW_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "workflows")
+
+_PARAM_PATTERN = re.compile(r"^\$\{(\w+)\}$")
+
+STEP_KINDS = ("plan", "call", "action")
+
+
+class WorkflowDefinitionError(ValueError):
+    """工作流程定义错误"""
+
+
+def load_workflow(name_or_path):
+    """
+    加载工作流程定义（JSON）
+
+    Args:
+        name_or_path: 文件路径，或 workflows/ 目录下的流程名称（不含 .json）
+
+    Returns:
+        dict: 工作流程定义
+    """
+    path = name_or_path
+    if not os.path.exists(path):
+        path = os.path.join(WORKFLOW_DIR, f"{name_or_path}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            definition = json.load(f)
+    except (OSError, ValueError) as e:
+        raise WorkflowDefinitionError(f"无法加载工作流程定义 {name_or_path}: {e}")
+    definition.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return definition
+
+
+def substitute_params(value, params):
+    """将定义中形如 "${name}" 的字符串替换为运行参数"""
+    if isinstance(value, str):
+        match = _PARAM_PATTERN.match(value)
+        if match:
+            if match.group(1) not in params:
+                raise WorkflowDefinitionError(f"缺少工作流程参数: {match.group(1)}")
+            return params[match.group(1)]
+        return value
+    if isinstance(value, dict):
+        return {k: substitute_params(v, params) for k, v in value.items()}
+    if isinstance(value, list):
+        return [substitute_params(v, params) for v in value]
+    return value
+
+
+def topological_order(specs):
+    """按依赖关系排序步骤定义，无依赖约束时保持声明顺序"""
+    by_id = {spec["id"]: spec for spec in specs}
+    remaining = [spec["id"] for spec in specs]
+    ordered, placed = [], set()
+    while remaining:
+        for step_id in remaining:
+            deps = by_id[step_id].get("requires", []) + by_id[step_id].get("after", [])
+            if all(dep in placed for dep in deps):
+                break
+        else:
+            raise WorkflowDefinitionError(f"工作流程存在循环依赖: {remaining}")
+        remaining.remove(step_id)
+        placed.add(step_id)
+        ordered.append(by_id[step_id])
+    return ordered
+
+
+def _resolve_callable(path):
+    """解析 "module:function" 形式的函数路径"""
+    module_name, _, func_name = path.partition(":")
+    if not func_name:
+        raise WorkflowDefinitionError(f"函数路径格式应为 module:function，实际为 {path}")
+    try:
+        return getattr(importlib.import_module(module_name), func_name)
+    except (ImportError, AttributeError) as e:
+        raise WorkflowDefinitionError(f"无法加载函数 {path}: {e}")
+
+
+def execute_plan(robot, logger, plan, global_vars=None, feedback_var="WorkFeedBack", timeout=None):
+    """执行一个机器人计划并返回反馈变量值（通用plan步骤），超时返回None"""
+    return PlanRunner(robot, logger).run(plan, global_vars, timeout, feedback_var).feedback
+
+
+class WorkflowEngine:
+    """
+    声明式工作流程引擎
+
+    从定义加载步骤DAG，每个步骤通过 handle_work_step 执行并按期望值判断成败，支持重试策略；
+    依赖已满足且资源不冲突的分支由 OverlappedStepRunner 在线程池中并行执行。
+
+    步骤定义字段:
+        id: 步骤名称
+        plan / call / action: 三选一 - 机器人计划名 / "module:function"(robot, logger, **kwargs) / 注册动作名
+        globals: plan步骤执行前写入的全局变量；feedback_var: 反馈变量名，默认WorkFeedBack；timeout: 计划超时(秒)
+        kwargs: call/action 的关键字参数
+        expected: 期望结果列表
+        retry: {"max_attempts": 次数, "on": [触发重试的结果], "delay": 间隔秒}
+        requires: 必须成功的前置步骤；after: 仅需结束的前置步骤
+        resources: 占用资源；critical: 失败是否终止流程(默认true)；exit_code: 失败时的流程返回码
+        when: 运行参数名，参数为假时不执行该步骤
+    值为 "${参数名}" 的字符串在运行时替换为参数值。
+    """
+
+    def __init__(self, definition, robot, logger, params=None, parallel=True):
+        self.definition = definition
+        self.robot = robot
+        self.logger = logger
+        self.params = dict(definition.get("params", {}), **(params or {}))
+        self.parallel = parallel
+        self.context = {}
+        self.results = {}          # 最近一次 run() 的 步骤名称 -> StepResult
+        self.specs = self._enabled_specs(definition.get("steps", []))
+
+    def _enabled_specs(self, specs):
+        """校验步骤定义，并移除 when 条件不成立的步骤（及依赖其成功的步骤）"""
+        ids = [spec.get("id") for spec in specs]
+        if None in ids or len(set(ids)) != len(ids):
+            raise WorkflowDefinitionError(f"步骤id缺失或重复: {ids}")
+        for spec in specs:
+            kinds = [kind for kind in STEP_KINDS if kind in spec]
+            if len(kinds) != 1:
+                raise WorkflowDefinitionError(f"步骤 {spec['id']} 必须且只能指定 plan/call/action 之一")
+            for dep in spec.get("requires", []) + spec.get("after", []):
+                if dep not in ids:
+                    raise WorkflowDefinitionError(f"步骤 {spec['id']} 依赖未定义的步骤 {dep}")
+
+        disabled = set()
+        for spec in topological_order(specs):
+            condition = spec.get("when")
+            if (condition and not self.params.get(condition)) or any(dep in disabled for dep in spec.get("requires", [])):
+                disabled.add(spec["id"])
+
+        enabled = []
+        for spec in topological_order(specs):
+            if spec["id"] in disabled:
+                continue
+            spec = dict(spec)
+            spec["after"] = [dep for dep in spec.get("after", []) if dep not in disabled]
+            enabled.append(spec)
+        return enabled
+
+    def _step_function(self, spec):
+        """构造 handle_work_step 使用的 step_func(robot, logger)"""
+        kwargs = substitute_params(spec.get("kwargs", {}), self.params)
+        if "plan" in spec:
+            global_vars = substitute_params(spec.get("globals", {}), self.params)
+            feedback_var = spec.get("feedback_var", "WorkFeedBack")
+            timeout = spec.get("timeout")
+            return lambda robot, logger: execute_plan(robot, logger, spec["plan"], global_vars, feedback_var, timeout)
+        if "call" in spec:
+            func = _resolve_callable(spec["call"])
+            return lambda robot, logger: func(robot, logger, **kwargs)
+        action = WORKFLOW_ACTIONS.get(spec["action"])
+        if action is None:
+            raise WorkflowDefinitionError(f"未注册的工作流程动作: {spec['action']}")
+        return lambda robot, logger: action(robot, logger, self.context, **kwargs)
+
+    def _build_step(self, spec):
+        """将步骤定义转换为 WorkflowStep，执行函数包含重试策略"""
+        step_func = self._step_function(spec)
+        expected = substitute_params(spec.get("expected", [True]), self.params)
+        retry = spec.get("retry", {})
+        max_attempts = max(1, retry.get("max_attempts", 1))
+        retry_on = retry.get("on")
+        delay = retry.get("delay", 0.0)
+        name = spec["id"]
+
+        def run():
+            for attempt in range(1, max_attempts + 1):
+                outcome = {}
+
+                def captured(robot, logger):
+                    outcome["result"] = step_func(robot, logger)
+                    return outcome["result"]
+
+                if handle_work_step(captured, self.robot, self.logger, expected_values=expected, step_name=name,
+                                    attempt=attempt):
+                    return True
+                result = outcome.get("result")
+                if attempt == max_attempts or (retry_on is not None and result not in retry_on):
+                    return False
+                self.logger.warn(f"{name} 结果 {result}，第 {attempt} 次重试...")
+                if delay:
+                    time.sleep(delay)
+            return False
+
+        return WorkflowStep(name, run, resources=spec.get("resources", []), requires=spec.get("requires", []),
+                            after=spec["after"], critical=spec.get("critical", True))
+
+    def run(self):
+        """
+        执行工作流程
+
+        Returns:
+            int: 0-成功，否则为第一个失败步骤（按声明顺序）的 exit_code
+        """
+        name = self.definition.get("name", "workflow")
+        self.logger.info(f"开始工作流程 {name}，参数: {self.params}")
+        steps = [self._build_step(spec) for spec in self.specs]
+        runner = OverlappedStepRunner(steps, self.logger, sequential=not self.parallel,
+                                      max_workers=self.definition.get("max_workers"))
+        with trace_span(f"workflow:{name}", category="workflow", workflow=name, parallel=self.parallel) as span:
+            try:
+                results = self.results = runner.run()
+            finally:
+                release_workflow_resources(self.context, self.logger)
+            exit_code = self._exit_code(name, results)
+            span.set_attribute("exit_code", exit_code)
+            span.set_status(exit_code == 0)
+        return exit_code
+
+    def _exit_code(self, name, results):
+        """根据步骤结果确定流程返回码"""
+        # 优先报告实际失败的步骤，其次是因此被跳过的步骤
+        for failed_only in (True, False):
+            for spec in self.specs:
+                result = results.get(spec["id"])
+                if result is None or result.status == STEP_SUCCESS or not spec.get("critical", True):
+                    continue
+                if failed_only and result.status != STEP_FAILED:
+                    continue
+                self.logger.error(f"工作流程 {name} 失败于步骤 {spec['id']} ({result.status})")
+                return spec.get("exit_code", 1)
+
+        self.logger.info(f"工作流程 {name} 完成！")
+        return 0
+
+
+def run_workflow(name_or_path, robot, logger, params=None, parallel=True):
+    """加载并执行工作流程，返回流程返回码"""
+    return WorkflowEngine(load_workflow(name_or_path), robot, logger, params, parallel).run()
@@ -3,22 +3,27 @@
 import argparse
 import sys
 import os
+import time
+from concurrent.futures import Future
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from core.rdk_init import init_robot
-from core.work_handler import handle_work_step
-from plans.change_tool import change_tool
-from plans.pick_mestick import pick_mestick
-from plans.Put_mestick import Put_mestick  
+from core.startup import start_subsystems
+from core.production_loop import ProductionLoop, stop_on_signals, verify_cell_ready
+from core.workflow_engine import run_workflow
+from core.plan_catalog import get_plan_catalog
 from utils.logger import get_logger
-from AGV import move_agv_to_station, get_audio_alarm_manager, simple_initialize_agv, get_current_station, get_agv_connection  
+from utils.tracing import configure_tracing
 
-def memory_stick_workflow(robot, logger, tool_num=1, check_mestick=True, agv_enabled=True, work_station=4):
+def memory_stick_workflow(robot, logger, tool_num=1, check_mestick=True, agv_enabled=True, work_station=4, overlap_steps=False,
+                          workflow="memory_stick"):
     """
     内存条操作工作流程
     
+    步骤、期望反馈值和返回码由 workflows/memory_stick.json 声明，由 WorkflowEngine 执行。
+    
     Args:
         robot: 机器人对象
         logger: 日志记录器对象
@@ -26,131 +31,66 @@ def memory_stick_workflow(robot, logger, tool_num=1, check_mestick=True, agv_ena
         check_mestick: 是否进行内存条检查，默认为False
         agv_enabled: 是否启用AGV移动，默认为True
         work_station: AGV工作站点，默认为4
+        overlap_steps: 是否并行执行互不冲突的步骤（AGV预检查与机械臂作业并行），默认False
+        workflow: 工作流程名称或定义文件路径，默认为memory_stick
         
     Returns:
-        int: 0-成功，非0-失败
+        int: 0-成功，1-换工具/取内存条失败，2-放内存条失败，3-内存条检查失败
     """
     logger.info(f"开始内存条工作流程，工具编号: {tool_num}")
-    
-    # 执行换工具操作
-    logger.info("开始执行换工具流程...")
-    if not handle_work_step(
-        lambda r, l: change_tool(r, l, tool_num),
-        robot, 
-        logger, 
-        expected_values=[90], 
-        step_name="换工具"
-    ):
-        logger.error("换工具操作失败，程序终止")
-        return 1
-    
-    # 执行取内存条操作
-    logger.info("开始执行取内存条流程...")
-    if not handle_work_step(
-        pick_mestick,
-        robot,
-        logger,
-        expected_values=[10],
-        step_name="取内存条"
-    ):
-        logger.error("取内存条操作失败，程序终止")
-        return 1
-    
-    # 在执行放内存条之前，AGV移动到站点5（做连接检测）
-    if agv_enabled:
-        logger.info("准备执行放内存条操作，AGV移动到站点5进行连接检测...")
-        try:
-            # 获取AGV全局连接
-            global_conn = get_agv_connection()
-            client = global_conn.get_client()
-            
-            if client:
-                # 检查当前站点
-                current_station = get_current_station(client)
-                logger.info(f"AGV当前站点: {current_station}")
-                
-                if current_station == 5:
-                    logger.info("✅ AGV已在站点5，无需移动")
-                else:
-                    logger.info(f"AGV需要从站点 {current_station} 移动到站点5")
-                    success = move_agv_to_station(5, logger)
-                    if success:
-                        logger.info("AGV已成功到达站点5，准备执行放内存条操作")
-                    else:
-                        logger.warn("AGV移动到站点5失败，但程序将继续执行")
-            else:
-                logger.warn("无法获取AGV连接，跳过站点检查，直接尝试移动到站点5")
-                success = move_agv_to_station(5, logger)
-                if success:
-                    logger.info("AGV已成功到达站点5，准备执行放内存条操作")
-                else:
-                    logger.warn("AGV移动到站点5失败，但程序将继续执行")
-                    
-        except Exception as e:
-            logger.error(f"AGV移动到站点5过程中发生异常: {e}")
-            logger.warn("AGV移动失败，但程序将继续执行")
-    
-    # 执行放内存条操作
-    logger.info("开始执行放内存条流程...")
-    try:
-        result = Put_mestick(robot, logger, WorkServerMestick=1, PalletNum=1, PhotoNum=1)
-        if result == 20:  # 成功
-            logger.info("放内存条操作成功")
-        else:
-            logger.error(f"放内存条操作失败，错误码: {result}")
-            return 2
-    except Exception as e:
-        logger.error(f"放内存条操作异常: {e}")
-        return 2
-    
-    if check_mestick:
-        logger.info("重新拔插内存条...")
-        try:
-            result = Put_mestick(robot, logger, WorkServerMestick=2)
-            if result == 20:  # 成功
-                logger.info("内存条状态检查通过")
-            else:
-                logger.error(f"内存条状态检查失败，错误码: {result}")
-                return 3
-        except Exception as e:
-            logger.error(f"内存条状态检查异常: {e}")
-            return 3
-
-    logger.info("内存条工作流程完成！")
-    return 0
+    params = {
+        "tool_num": tool_num,
+        "check_mestick": check_mestick,
+        "agv_enabled": agv_enabled,
+        "work_station": work_station,
+    }
+    return run_workflow(workflow, robot, logger, params, parallel=overlap_steps)
 
 
-def initialize_agv_system(logger):
+def initialize_agv_system(logger, timings=None):
     """
     初始化AGV系统，确保AGV位于站点4
     
     Args:
         logger: 日志记录器
+        timings: 可选字典，写入各阶段耗时(秒)：locate/homing
         
     Returns:
         bool: True-初始化成功，False-初始化失败
     """
+    from AGV import get_agv_connection, simple_initialize_agv
     logger.info("开始AGV初始化，确保AGV位于站点4...")
+    phase_start = time.monotonic()
     
-    # 先直接读取当前站点寄存器值
+    # 先读取当前站点（后台遥测已有数据时不发起读取）
     try:
         global_conn = get_agv_connection()
-        client = global_conn.get_client()
-        if client:
-            logger.info("📡 正在读取AGV当前站点寄存器...")
-            res = client.read_input_registers(address=33, count=1)  # INPUT_CURRENT_STATION
-            if not res.isError():
-                raw_station = res.registers[0]
-                logger.info(f"🏷️  [MAIN] AGV当前站点寄存器值: {raw_station}")
-            else:
-                logger.error(f"读取站点寄存器失败: {res}")
+        telemetry = global_conn.get_telemetry_poller()
+        state = telemetry.wait_for_update(timeout=2.0) if telemetry else None
+        if state is not None:
+            logger.info(f"🏷️  [MAIN] AGV当前站点: {state.current_station} (遥测数据年龄 {state.age:.2f}s)")
         else:
-            logger.error("无法获取AGV连接")
+            client = global_conn.get_client()
+            if client:
+                logger.info("📡 正在读取AGV当前站点寄存器...")
+                res = client.read_input_registers(address=33, count=1)  # INPUT_CURRENT_STATION
+                if not res.isError():
+                    raw_station = res.registers[0]
+                    logger.info(f"🏷️  [MAIN] AGV当前站点寄存器值: {raw_station}")
+                else:
+                    logger.error(f"读取站点寄存器失败: {res}")
+            else:
+                logger.error("无法获取AGV连接")
     except Exception as e:
         logger.error(f"读取站点信息异常: {e}")
+    if timings is not None:
+        timings["locate"] = time.monotonic() - phase_start
+        phase_start = time.monotonic()
     
     try:
         init_success = simple_initialize_agv(logger)
+        if timings is not None:
+            timings["homing"] = time.monotonic() - phase_start
         if init_success:
             logger.info("✅ AGV初始化成功，已确保AGV位于站点4")
             return True
@@ -164,6 +104,17 @@ def initialize_agv_system(logger):
         return False
 
 
+def _positive_int(text):
+    """argparse类型：大于0的整数"""
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"必须是大于0的整数: {text}")
+    return value
+
+
 def main():
     """
     主程序入口
@@ -178,30 +129,104 @@ def main():
     parser.add_argument("--disable-agv", action="store_true", help="禁用AGV移动功能")
     parser.add_argument("--tool-num", type=int, default=1, help="工具编号")
     parser.add_argument("--check-mestick", action="store_true", help="启用内存条检查")
+    parser.add_argument("--agv-telemetry-interval", type=float, default=0.5, help="AGV后台遥测轮询间隔(秒)")
+    parser.add_argument("--agv-travel-model", help="站点行驶时间模型文件(JSON)，记录每次AGV移动的耗时并用于到达时间预估")
+    parser.add_argument("--overlap-steps", action="store_true", help="重叠执行互不冲突的工作步骤")
+    parser.add_argument("--workflow", default="memory_stick", help="工作流程名称（workflows/目录）或定义文件路径")
+    parser.add_argument("--robot-backend", choices=["rdk", "fake"], default="rdk", help="机器人后端：rdk-真实机器人，fake-模拟机器人")
+    parser.add_argument("--fake-time-scale", type=float, default=1.0, help="模拟机器人计划时长缩放系数")
+    parser.add_argument("--trace-file", help="追踪span输出文件(JSON-lines)，不指定时不记录")
+    parser.add_argument("--history-db", help="生产历史数据库(SQLite)，追加记录循环、步骤、计划反馈、AGV移动、阻挡和报警")
+    parser.add_argument("--cycles", type=_positive_int, default=1, help="连续执行的工作循环次数，机器人和AGV连接在循环之间保持")
+    parser.add_argument("--continuous", action="store_true", help="持续执行工作循环，直到收到SIGINT/SIGTERM")
+    parser.add_argument("--continue-on-failure", action="store_true", help="循环失败后继续执行下一个循环")
+    parser.add_argument("--daemon", action="store_true", help="以守护进程运行，通过本地HTTP接口接收作业")
+    parser.add_argument("--daemon-listen", default="127.0.0.1:8765", help="守护进程监听地址：host:port 或 unix:/path/to/socket")
     
     args = parser.parse_args()
     
     # 初始化日志记录器
     logger = get_logger(args.log_name)
     logger.info("程序启动")
-    logger.info(f"机器人序列号: {args.robot_sn}")
-    
-    # 停止所有连续音频报警（用户重新初始化）
+    if args.trace_file:
+        configure_tracing(args.trace_file)
+        logger.info(f"追踪已启用，span写入 {args.trace_file}")
+
+    history = None
+    if args.history_db:
+        from core.cycle_history import CycleHistory
+        try:
+            history = CycleHistory(args.history_db, program="main", robot=args.robot_sn)
+            logger.info(f"生产历史记录写入 {args.history_db} (运行 {history.run_id})")
+        except Exception as e:
+            logger.warn(f"无法打开历史数据库 {args.history_db}: {e}，本次运行不记录历史")
+
+    exit_code = None
     try:
-        alarm_manager = get_audio_alarm_manager()
-        stopped_count = alarm_manager.stop_all_alarms()
-        if stopped_count > 0:
-            logger.info(f"已停止 {stopped_count} 个连续音频报警")
-    except Exception as e:
-        logger.warn(f"停止音频报警时发生异常: {e}")
+        exit_code = run_cell(args, logger)
+    finally:
+        if history is not None:
+            history.close(exit_code)
+    return exit_code
+
+
+def run_cell(args, logger):
+    """
+    初始化机器人和AGV并执行工作流程（单次、连续生产或守护进程模式）
+
+    Returns:
+        int: 程序返回码
+    """
+    logger.info(f"机器人序列号: {args.robot_sn}")
     
-    # AGV默认启用，除非明确禁用
+    # AGV默认启用，除非明确禁用；禁用时不加载AGV/Modbus模块
     agv_enabled = not args.disable_agv
     if agv_enabled:
+        from AGV import get_audio_alarm_manager, get_agv_connection, configure_agv_endpoint
+
+        # 停止所有连续音频报警（用户重新初始化）
+        try:
+            alarm_manager = get_audio_alarm_manager()
+            stopped_count = alarm_manager.stop_all_alarms()
+            if stopped_count > 0:
+                logger.info(f"已停止 {stopped_count} 个连续音频报警")
+        except Exception as e:
+            logger.warn(f"停止音频报警时发生异常: {e}")
+
         logger.info(f"AGV控制已启用 - 工作站点: {args.work_station}")
-        
-        # AGV初始化函数调用
-        agv_init_success = initialize_agv_system(logger)
+        configure_agv_endpoint(args.agv_ip, args.agv_port)
+        get_agv_connection().set_telemetry_interval(args.agv_telemetry_interval)
+        if args.agv_travel_model:
+            from agv_travel import StationTravelModel
+            get_agv_connection().set_travel_model(StationTravelModel.load(args.agv_travel_model))
+            logger.info(f"站点行驶时间模型: {args.agv_travel_model}")
+    else:
+        logger.info("AGV控制已禁用")
+
+    # 并行启动机器人和AGV：机器人连接与AGV回站点同时进行，机器人在AGV初始化成功后才启用，
+    # AGV失败时机器人保持未启用状态，不会在报警等待期间处于启用状态
+    logger.info("正在初始化机器人连接...")
+    backend_options = {"time_scale": args.fake_time_scale} if args.robot_backend == "fake" else {}
+    agv_ready = Future() if agv_enabled else None
+
+    def start_agv(phases):
+        ok = False
+        try:
+            ok = initialize_agv_system(logger, timings=phases)
+            return ok
+        finally:
+            agv_ready.set_result(bool(ok))
+
+    subsystems = [("robot", lambda phases: init_robot(args.robot_sn, logger, backend=args.robot_backend,
+                                                      timings=phases,
+                                                      before_enable=agv_ready.result if agv_enabled else None,
+                                                      **backend_options))]
+    if agv_enabled:
+        subsystems.append(("agv", start_agv))
+    startup = start_subsystems(subsystems, logger)
+
+    if agv_enabled:
+        agv_init_success = startup["agv"].value
         if not agv_init_success:
             logger.error("AGV初始化失败，程序终止")
             logger.error("请确保AGV在有效站点(4,5,8,9,10)后重新运行程序")
@@ -210,7 +235,6 @@ def main():
             # 等待用户手动停止，保持音频报警运行
             try:
                 while True:
-                    import time
                     time.sleep(1)
             except KeyboardInterrupt:
                 logger.info("用户手动停止程序")
@@ -223,25 +247,19 @@ def main():
                 except Exception as e:
                     logger.warn(f"停止音频报警时发生异常: {e}")
                 return 5  # AGV初始化失败退出码
-    else:
-        logger.info("AGV控制已禁用")
 
     try:
-        # 初始化机器人连接
-        logger.info("正在初始化机器人连接...")
-        robot = init_robot(args.robot_sn, logger)
+        if startup["robot"].error is not None:
+            logger.error(f"程序执行过程中发生异常: {startup['robot'].error}")
+            return 3
+        robot = startup["robot"].value
 
-        # 检查机器人连接状态
+        # 检查机器人连接状态（init_robot 已等待操作状态和模式切换完成，无需额外等待）
         try:
             logger.info("检查机器人连接状态...")
             robot_mode = robot.mode()
             logger.info(f"机器人当前模式: {robot_mode}")
             
-            # 等待机器人完全就绪
-            import time
-            logger.info("等待机器人完全就绪...")
-            time.sleep(2)  # 给机器人一些时间完成初始化
-            
         except Exception as e:
             logger.error(f"无法获取机器人状态: {e}")
             logger.error("机器人可能未正确连接，请检查:")
@@ -258,7 +276,7 @@ def main():
         for attempt in range(max_retries):
             try:
                 logger.info(f"获取计划列表 (第{attempt + 1}次尝试)...")
-                plan_list = robot.plan_list()
+                plan_list = get_plan_catalog(robot, logger)  # init_robot 已缓存时不再请求机器人
                 logger.info("成功获取计划列表:")
                 for i in range(len(plan_list)):
                     logger.info(f"[{i}] {plan_list[i]}")
@@ -285,27 +303,42 @@ def main():
         # 检查必需的计划是否存在
         if plan_list is not None:
             required_plans = ["ChangeTool", "PickMestick", "PutMestick"]
-            missing_plans = []
-            for plan in required_plans:
-                if plan not in plan_list:
-                    missing_plans.append(plan)
+            missing_plans = plan_list.missing(required_plans)
             
             if missing_plans:
                 logger.error(f"缺少必需的计划: {missing_plans}")
                 logger.error("请确保机器人中包含所有必需的计划")
                 return 4
 
-       
+        if args.daemon:
+            from core.cell_daemon import CellDaemon
+            daemon = CellDaemon(robot, logger, agv_enabled=agv_enabled, workflow=args.workflow,
+                                overlap_steps=args.overlap_steps,
+                                defaults={"tool_num": args.tool_num, "check_mestick": True,
+                                          "work_station": args.work_station})
+            daemon.start(args.daemon_listen)
+            with stop_on_signals(daemon.request_stop):
+                daemon.wait()
+            return 0
+
+        def run_cycle(cycle):
+            # 执行内存条工作流程（包含AGV移动）
+            return memory_stick_workflow(
+                robot, 
+                logger, 
+                tool_num=args.tool_num,
+                check_mestick=True,
+                agv_enabled=agv_enabled,
+                work_station=args.work_station,
+                overlap_steps=args.overlap_steps,
+                workflow=args.workflow
+            )
 
-        # 执行内存条工作流程（包含AGV移动）
-        result = memory_stick_workflow(
-            robot, 
-            logger, 
-            tool_num=args.tool_num,
-            check_mestick=True,
-            agv_enabled=agv_enabled,
-            work_station=args.work_station
-        )
+        loop = ProductionLoop(run_cycle, logger, cycles=None if args.continuous else args.cycles,
+                              verify=lambda cycle: verify_cell_ready(robot, logger, agv_enabled),
+                              stop_on_failure=not args.continue_on_failure)
+        with loop.handle_signals():
+            result = loop.run()
         
         if result == 0:
             logger.info("所有操作成功完成！")
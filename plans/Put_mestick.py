@@ -1,5 +1,5 @@
-from time import sleep
-from AGV import get_audio_alarm_manager
+from plans.plan_runner import PlanRunner
+from core.plan_catalog import has_plan
 
 def Put_mestick(robot, logger, WorkServerMestick: int,PalletNum:int=1,PhotoNum:int=1) -> int:
     """
@@ -34,8 +34,7 @@ def Put_mestick(robot, logger, WorkServerMestick: int,PalletNum:int=1,PhotoNum:i
         
         # 检查PutMestick计划是否存在
         try:
-            plan_list = robot.plan_list()
-            if "PutMestick" not in plan_list:
+            if not has_plan(robot, "PutMestick"):
                 logger.error("机器人中没有找到PutMestick计划")
                 logger.error("请确保机器人中包含PutMestick计划")
                 return 1999
@@ -44,30 +43,18 @@ def Put_mestick(robot, logger, WorkServerMestick: int,PalletNum:int=1,PhotoNum:i
             logger.error(f"无法获取计划列表: {e}")
             return 1999
         
+        plan_runner = PlanRunner(robot, logger)
         while True:
             try:
-                # 设置全局变量
-                robot.SetGlobalVariables({"WorkServerMestick": WorkServerMestick})
-                logger.info(f"设置WorkServerMestick = {WorkServerMestick}")
-
-                robot.SetGlobalVariables({"PalletNum": PalletNum})
-                logger.info(f"设置PalletNum = {PalletNum}")
-
-                robot.SetGlobalVariables({"PhotoNum": PhotoNum})
-                logger.info(f"设置PhotoNum = {PhotoNum}")
-
-                # 执行计划
-                logger.info("开始执行PutMestick计划...")
-                robot.ExecutePlan("PutMestick", True)
-                
-                # 等待执行完成
-                while robot.busy():
-                    logger.info("PutMestick 执行中...")
-                    sleep(1)  # 等待1秒再检查
-                
-                # 获取反馈
-                global_vars = robot.global_variables()
-                feedback = global_vars.get("WorkFeedBack", -1)
+                # 设置全局变量（合并为一次写入，重试时未变化的值不再下发）并执行计划
+                result = plan_runner.run("PutMestick", {
+                    "WorkServerMestick": WorkServerMestick,
+                    "PalletNum": PalletNum,
+                    "PhotoNum": PhotoNum,
+                })
+                if result.timed_out:
+                    return 1999
+                feedback = result.feedback
                 
                 try_put_num += 1
                 logger.info(f"PutMestick 第 {try_put_num} 次尝试，反馈值: {feedback}")
@@ -81,6 +68,7 @@ def Put_mestick(robot, logger, WorkServerMestick: int,PalletNum:int=1,PhotoNum:i
                 if try_photo_num > max_retries:
                     logger.error(f"拍照失败，已重试 {max_retries} 次，放弃操作")
                     # 启动连续音频报警 - 拍照失败
+                    from AGV import get_audio_alarm_manager  # 只在报警时加载AGV/Modbus模块
                     alarm_manager = get_audio_alarm_manager()
                     alarm_manager.start_continuous_alarm(3, "put_photo_failed", interval=5.0, audio_duration=3.0, logger=logger)
                     return 201
@@ -90,6 +78,7 @@ def Put_mestick(robot, logger, WorkServerMestick: int,PalletNum:int=1,PhotoNum:i
             elif feedback == 202:  # 放料失败
                 logger.error("放内存条失败，放弃操作")
                 # 启动连续音频报警 - 放料失败
+                from AGV import get_audio_alarm_manager  # 只在报警时加载AGV/Modbus模块
                 alarm_manager = get_audio_alarm_manager()
                 alarm_manager.start_continuous_alarm(2, "put_failed", interval=6.0, audio_duration=4.0, logger=logger)
                 return 202
@@ -1,4 +1,5 @@
-from AGV import get_audio_alarm_manager
+from plans.plan_runner import PlanRunner
+from core.plan_catalog import has_plan
 
 def change_tool(robot, logger, work_num: int = 1) -> int:
     """
@@ -22,14 +23,15 @@ def change_tool(robot, logger, work_num: int = 1) -> int:
         except Exception as e:
             logger.error(f"无法获取机器人状态: {e}")
             # 启动连续音频报警 - 机器人状态错误
+            from AGV import get_audio_alarm_manager, ALARM_PRIORITY_CRITICAL  # 只在报警时加载AGV/Modbus模块
             alarm_manager = get_audio_alarm_manager()
-            alarm_manager.start_continuous_alarm(4, "robot_status_error", interval=5.0, audio_duration=4.0, logger=logger)
+            alarm_manager.start_continuous_alarm(4, "robot_status_error", interval=5.0, audio_duration=4.0, logger=logger,
+                                                 priority=ALARM_PRIORITY_CRITICAL)
             return 1999
         
         # 检查ChangeTool计划是否存在
         try:
-            plan_list = robot.plan_list()
-            if "ChangeTool" not in plan_list:
+            if not has_plan(robot, "ChangeTool"):
                 logger.error("机器人中没有找到ChangeTool计划")
                 logger.error("请确保机器人中包含ChangeTool计划")
                 return 1999
@@ -39,23 +41,11 @@ def change_tool(robot, logger, work_num: int = 1) -> int:
             return 1999
         
         try:
-            # 设置全局变量
-            robot.SetGlobalVariables({"WorkNum": work_num})
-            logger.info(f"设置WorkNum = {work_num}")
-            
-            # 执行计划
-            logger.info("开始执行ChangeTool计划...")
-            robot.ExecutePlan("ChangeTool", True)
-            
-            # 等待执行完成
-            import time
-            while robot.busy():
-                logger.info("ChangeTool 执行中...")
-                time.sleep(1)  # 等待1秒再检查
-            
-            # 获取反馈
-            global_vars = robot.global_variables()
-            feedback = global_vars.get("WorkFeedBack", -1)
+            # 设置全局变量并执行计划
+            result = PlanRunner(robot, logger).run("ChangeTool", {"WorkNum": work_num})
+            if result.timed_out:
+                return 1999
+            feedback = result.feedback
             
             logger.info(f"ChangeTool 完成，反馈值: {feedback}")
             
@@ -64,6 +54,7 @@ def change_tool(robot, logger, work_num: int = 1) -> int:
             else:
                 logger.error(f"换工具操作失败，错误码: {feedback}")
                 # 启动连续音频报警 - 机器人状态错误（换工具失败通常是机器人状态问题）
+                from AGV import get_audio_alarm_manager  # 只在报警时加载AGV/Modbus模块
                 alarm_manager = get_audio_alarm_manager()
                 alarm_manager.start_continuous_alarm(4, "change_tool_failed", interval=5.0, audio_duration=4.0, logger=logger)
                 
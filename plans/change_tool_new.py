@@ -1,4 +1,6 @@
 from simple_agv import SimpleAGV, AudioAlarmManager
+from plans.plan_runner import PlanRunner
+from core.plan_catalog import has_plan
 
 def change_tool(robot, logger, work_num: int = 1) -> int:
     """
@@ -38,8 +40,7 @@ def _check_robot_ready(robot, logger) -> bool:
 def _check_plan_exists(robot, plan_name: str, logger) -> bool:
     """检查计划是否存在"""
     try:
-        plan_list = robot.plan_list()
-        if plan_name not in plan_list:
+        if not has_plan(robot, plan_name):
             logger.error(f"机器人中没有找到{plan_name}计划")
             return False
         logger.info(f"找到{plan_name}计划，开始执行")
@@ -52,19 +53,11 @@ def _check_plan_exists(robot, plan_name: str, logger) -> bool:
 def _execute_change_tool(robot, logger, work_num: int) -> int:
     """执行换工具主逻辑"""
     try:
-        # 设置参数
-        robot.SetGlobalVariables({"WorkNum": work_num})
-        logger.info(f"设置WorkNum = {work_num}")
-        
-        # 执行计划
-        logger.info("开始执行ChangeTool计划...")
-        robot.ExecutePlan("ChangeTool", True)
-        
-        # 等待完成
-        _wait_for_completion(robot, logger, "ChangeTool")
-        
-        # 获取结果
-        feedback = _get_feedback(robot, logger)
+        # 设置参数并执行计划，等待完成后读取反馈
+        result = PlanRunner(robot, logger).run("ChangeTool", {"WorkNum": work_num})
+        if result.timed_out:
+            return 1999
+        feedback = result.feedback
         
         if feedback == 90:
             logger.info("换工具操作成功完成")
@@ -79,26 +72,6 @@ def _execute_change_tool(robot, logger, work_num: int) -> int:
         return 1999
 
 
-def _wait_for_completion(robot, logger, plan_name: str):
-    """等待计划执行完成"""
-    import time
-    while robot.busy():
-        logger.info(f"{plan_name} 执行中...")
-        time.sleep(1)
-
-
-def _get_feedback(robot, logger) -> int:
-    """获取执行反馈"""
-    try:
-        global_vars = robot.global_variables()
-        feedback = global_vars.get("WorkFeedBack", -1)
-        logger.info(f"执行完成，反馈值: {feedback}")
-        return feedback
-    except Exception as e:
-        logger.error(f"获取反馈异常: {e}")
-        return 1999
-
-
 def _start_alarm(audio_id: int, alarm_id: str, logger):
     """启动音频报警"""
     try:
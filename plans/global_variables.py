@@ -0,0 +1,108 @@
+import threading
+
+
+class GlobalVariableSession:
+    """
+    机器人全局变量会话 - 合并写入、跳过未变化的值、缓存最近读取结果
+
+    待写入的变量先暂存，flush() 时只把与机器人上已知值不同的变量合并为一次
+    SetGlobalVariables 调用；read() 一次读取全部变量并刷新已知值。计划执行可能修改
+    全局变量，因此计划结束后应调用 read()（PlanRunner 读取反馈时已完成）；计划超时或异常、
+    以及循环/作业之间（变量可能在示教器上被修改）调用 invalidate()。
+    """
+
+    def __init__(self, robot, logger=None):
+        self.robot = robot
+        self.logger = logger
+        self.write_count = 0       # 实际调用 SetGlobalVariables 的次数
+        self.skipped_count = 0     # 因值未变化而跳过的变量个数
+        self._known = {}           # 机器人上的已知变量值（最近写入或读取）
+        self._pending = {}
+        self._last_read = None
+        self._lock = threading.Lock()
+
+    def stage(self, values=None, **kwargs):
+        """暂存待写入的变量（不立即通信）"""
+        with self._lock:
+            self._pending.update(values or {}, **kwargs)
+
+    def flush(self):
+        """
+        写入暂存的变量，仅包含与已知值不同的部分
+
+        Returns:
+            dict: 实际写入的变量
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            changes = {name: value for name, value in pending.items()
+                       if name not in self._known or self._known[name] != value}
+            self.skipped_count += len(pending) - len(changes)
+            if not changes:
+                return {}
+            self.robot.SetGlobalVariables(changes)
+            self.write_count += 1
+            self._known.update(changes)
+        if self.logger:
+            self.logger.info(f"设置全局变量 {changes}")
+        return changes
+
+    def write(self, values=None, **kwargs):
+        """暂存并立即写入变量，返回实际写入的变量"""
+        self.stage(values, **kwargs)
+        return self.flush()
+
+    def read(self):
+        """读取全部全局变量并刷新缓存"""
+        variables = self.robot.global_variables()
+        with self._lock:
+            self._last_read = dict(variables)
+            self._known.update(variables)
+        return variables
+
+    def get(self, name, default=None, refresh=False):
+        """
+        读取单个全局变量
+
+        Args:
+            name: 变量名
+            default: 变量不存在时的默认值
+            refresh: 为True时重新读取，否则使用最近一次读取结果（尚未读取时读取一次）
+        """
+        if refresh or self._last_read is None:
+            self.read()
+        return self._last_read.get(name, default)
+
+    @property
+    def last_read(self):
+        """最近一次读取的全部变量（尚未读取时为None）"""
+        return self._last_read
+
+    def invalidate(self):
+        """清除已知值（变量可能被外部修改时调用），下次写入将全部下发"""
+        with self._lock:
+            self._known.clear()
+            self._last_read = None
+
+
+# id(robot) -> GlobalVariableSession
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_global_variable_session(robot, logger=None):
+    """获取机器人共享的全局变量会话（各计划模块共用同一份已知值）"""
+    with _sessions_lock:
+        session = _sessions.get(id(robot))
+        if session is None or session.robot is not robot:
+            session = GlobalVariableSession(robot, logger)
+            _sessions[id(robot)] = session
+        return session
+
+
+def invalidate_global_variables(robot):
+    """清除机器人共享会话的已知值（循环/作业之间调用，每个循环的第一次写入总会下发）；尚无会话时不创建"""
+    with _sessions_lock:
+        session = _sessions.get(id(robot))
+    if session is not None and session.robot is robot:
+        session.invalidate()
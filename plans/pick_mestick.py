@@ -1,4 +1,5 @@
-from AGV import get_audio_alarm_manager
+from plans.plan_runner import PlanRunner
+from core.plan_catalog import has_plan
 def pick_mestick(robot, logger) -> int:
     """
     执行取内存条操作，包含重试机制
@@ -31,8 +32,7 @@ def pick_mestick(robot, logger) -> int:
         
         # 检查PickMestick计划是否存在
         try:
-            plan_list = robot.plan_list()
-            if "PickMestick" not in plan_list:
+            if not has_plan(robot, "PickMestick"):
                 logger.error("机器人中没有找到PickMestick计划")
                 logger.error("请确保机器人中包含PickMestick计划")
                 return 1999
@@ -41,21 +41,14 @@ def pick_mestick(robot, logger) -> int:
             logger.error(f"无法获取计划列表: {e}")
             return 1999
         
+        plan_runner = PlanRunner(robot, logger)
         while True:
             try:
-                # 执行计划
-                logger.info("开始执行PickMestick计划...")
-                robot.ExecutePlan("PickMestick", True)
-                
-                # 等待执行完成
-                import time
-                while robot.busy():
-                    logger.info("PickMestick 执行中...")
-                    time.sleep(1)  # 等待1秒再检查
-                
-                # 获取反馈
-                global_vars = robot.global_variables()
-                feedback = global_vars.get("WorkFeedBack", -1)
+                # 执行计划并等待完成
+                result = plan_runner.run("PickMestick")
+                if result.timed_out:
+                    return 1999
+                feedback = result.feedback
                 
                 try_pick_num += 1
                 logger.info(f"PickMestick 第 {try_pick_num} 次尝试，反馈值: {feedback}")
@@ -69,6 +62,7 @@ def pick_mestick(robot, logger) -> int:
                 if try_photo_num > max_retries:
                     logger.error(f"拍照失败，已重试 {max_retries} 次，放弃操作")
                     # 启动连续音频报警 - 拍照失败
+                    from AGV import get_audio_alarm_manager  # 只在报警时加载AGV/Modbus模块
                     alarm_manager = get_audio_alarm_manager()
                     alarm_manager.start_continuous_alarm(3, "pick_photo_failed", interval=5.0, audio_duration=3.0, logger=logger)
                     return 101
@@ -79,6 +73,7 @@ def pick_mestick(robot, logger) -> int:
                 if try_pick_num > max_retries:
                     logger.error(f"取料失败，已重试 {max_retries} 次，放弃操作")
                     # 启动连续音频报警 - 取料失败
+                    from AGV import get_audio_alarm_manager  # 只在报警时加载AGV/Modbus模块
                     alarm_manager = get_audio_alarm_manager()
                     alarm_manager.start_continuous_alarm(1, "pick_failed", interval=6.0, audio_duration=4.0, logger=logger)
                     return 102
@@ -0,0 +1,131 @@
+import time
+from collections import namedtuple
+
+from plans.global_variables import get_global_variable_session
+from utils.polling import poll_until
+from utils.tracing import trace_span
+
+# 各计划的执行超时(秒)，未列出的计划使用 DEFAULT_PLAN_TIMEOUT
+PLAN_TIMEOUTS = {
+    "ChangeTool": 120.0,
+    "PickMestick": 180.0,
+    "PutMestick": 180.0,
+}
+DEFAULT_PLAN_TIMEOUT = 300.0
+
+# 完成检测轮询参数(秒)：计划刚启动时快速检测，运行中逐渐退避到 max_interval
+PLAN_POLL_MIN_INTERVAL = 0.02
+PLAN_POLL_MAX_INTERVAL = 0.1
+# 执行中进度日志的输出间隔(秒)
+PLAN_PROGRESS_INTERVAL = 5.0
+
+PlanResult = namedtuple('PlanResult', ['plan', 'feedback', 'wall_time', 'polls', 'timed_out'])
+PlanResult.__doc__ = """
+计划执行结果
+
+plan: 计划名称
+feedback: 反馈变量值（超时时为None）
+wall_time: 从下发计划到检测到完成的耗时(秒)
+polls: robot.busy() 查询次数
+timed_out: 是否超时
+"""
+
+
+class PlanRunner:
+    """
+    机器人计划执行器 - 下发计划、自适应检测完成、读取反馈
+
+    代替各计划模块中 "ExecutePlan + while busy(): sleep(1) + global_variables()" 的重复写法，
+    完成检测精度由1秒提升到几十毫秒，执行中的进度日志按间隔输出而不是每秒一条。
+    全局变量经机器人共享的 GlobalVariableSession 合并写入，未变化的值不再下发。
+    """
+
+    def __init__(self, robot, logger, timeouts=None, min_interval=PLAN_POLL_MIN_INTERVAL,
+                 max_interval=PLAN_POLL_MAX_INTERVAL, progress_interval=PLAN_PROGRESS_INTERVAL):
+        self.robot = robot
+        self.logger = logger
+        self.variables = get_global_variable_session(robot)
+        self.timeouts = dict(PLAN_TIMEOUTS, **(timeouts or {}))
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.progress_interval = progress_interval
+
+    def wait_for_completion(self, plan, timeout=None):
+        """
+        等待当前计划执行结束
+
+        Returns:
+            PollResult: ok为False表示超时
+        """
+        timeout = timeout if timeout is not None else self.timeouts.get(plan, DEFAULT_PLAN_TIMEOUT)
+        start = time.monotonic()
+        last_progress = [start]
+
+        def probe():
+            busy = self.robot.busy()
+            now = time.monotonic()
+            if busy and now - last_progress[0] >= self.progress_interval:
+                self.logger.info(f"{plan} 执行中... (已用时{now - start:.1f}s)")
+                last_progress[0] = now
+            return busy
+
+        return poll_until(probe, lambda busy: not busy, timeout,
+                          min_interval=self.min_interval, max_interval=self.max_interval)
+
+    def read_feedback(self, feedback_var="WorkFeedBack"):
+        """读取反馈变量（一次读取全部变量并刷新会话缓存），不存在时返回-1"""
+        return self.variables.get(feedback_var, -1, refresh=True)
+
+    def run(self, plan, global_vars=None, timeout=None, feedback_var="WorkFeedBack"):
+        """
+        执行计划并返回结果
+
+        Args:
+            plan: 计划名称
+            global_vars: 执行前写入的全局变量字典（可选）
+            timeout: 超时时间(秒)，默认按 PLAN_TIMEOUTS
+            feedback_var: 反馈变量名
+
+        Returns:
+            PlanResult: 超时时会尝试停止机器人，feedback为None
+        """
+        with trace_span(f"plan:{plan}", category="plan", plan=plan) as span:
+            result = self._run(plan, global_vars, timeout, feedback_var)
+            span.set_attribute("feedback", result.feedback)
+            span.set_attribute("polls", result.polls)
+            span.set_attribute("timed_out", result.timed_out)
+            span.set_status(not result.timed_out)
+            return result
+
+    def _run(self, plan, global_vars, timeout, feedback_var):
+        if global_vars:
+            written = self.variables.write(global_vars)
+            if written:
+                self.logger.info(f"设置全局变量 {written}")
+            if len(written) < len(global_vars):
+                unchanged = {k: v for k, v in global_vars.items() if k not in written}
+                self.logger.info(f"全局变量未变化，跳过写入 {unchanged}")
+
+        self.logger.info(f"开始执行{plan}计划...")
+        start = time.monotonic()
+        try:
+            self.robot.ExecutePlan(plan, True)
+            waited = self.wait_for_completion(plan, timeout)
+            wall_time = time.monotonic() - start
+
+            if not waited.ok:
+                self.logger.error(f"{plan} 执行超时({wall_time:.1f}s)，停止机器人")
+                # 计划可能已修改全局变量但没有读取结果，清除已知值避免下次跳过写入
+                self.variables.invalidate()
+                try:
+                    self.robot.Stop()
+                except Exception as e:
+                    self.logger.error(f"停止机器人失败: {e}")
+                return PlanResult(plan, None, wall_time, waited.polls, True)
+
+            feedback = self.read_feedback(feedback_var)
+        except Exception:
+            self.variables.invalidate()
+            raise
+        self.logger.info(f"{plan} 执行完成，反馈值: {feedback} (耗时{wall_time:.2f}s, 检测{waited.polls}次)")
+        return PlanResult(plan, feedback, wall_time, waited.polls, False)
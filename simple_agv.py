@@ -49,7 +49,7 @@ class SimpleAGV:
     def __init__(self, ip: str = '192.168.2.112', port: int = 502, auto_reconnect: bool = True):
         self.ip = ip
         self.port = port
-        self.client = ModbusTcpClient(ip, port)
+        self.client = ModbusTcpClient(ip, port=port)
         self.state = AGVState()
         self._monitor_thread: Optional[threading.Thread] = None
         self._stop_monitor = threading.Event()
@@ -72,7 +72,7 @@ class SimpleAGV:
             try:
                 # 测试连接
                 if self.client.is_socket_open():
-                    result = self.client.read_input_registers(self.INPUT_LOCALIZATION_STATE, 1)
+                    result = self.client.read_input_registers(self.INPUT_LOCALIZATION_STATE, count=1)
                     if not result.isError():
                         if not self.state.connected:
                             self.state.connected = True
@@ -129,7 +129,7 @@ class SimpleAGV:
             
         try:
             # 检查定位状态
-            result = self.client.read_input_registers(self.INPUT_LOCALIZATION_STATE, 1)
+            result = self.client.read_input_registers(self.INPUT_LOCALIZATION_STATE, count=1)
             if result.isError() or result.registers[0] != 1:
                 print("❌ AGV未正确定位，无法抢占控制权")
                 return False
@@ -142,7 +142,7 @@ class SimpleAGV:
             time.sleep(1)
             
             # 验证抢占成功
-            result = self.client.read_coils(self.COIL_ACQUIRE_CONTROL, 1)
+            result = self.client.read_coils(self.COIL_ACQUIRE_CONTROL, count=1)
             if not result.isError() and not result.bits[0]:
                 self.state.has_control = True
                 return True
@@ -206,7 +206,7 @@ class SimpleAGV:
         
         while time.time() - start_time < timeout:
             try:
-                result = self.client.read_input_registers(self.INPUT_NAVIGATION_STATE, 1)
+                result = self.client.read_input_registers(self.INPUT_NAVIGATION_STATE, count=1)
                 if result.isError():
                     time.sleep(1)
                     continue
@@ -242,7 +242,7 @@ class SimpleAGV:
             return None
             
         try:
-            result = self.client.read_input_registers(self.INPUT_CURRENT_STATION, 1)
+            result = self.client.read_input_registers(self.INPUT_CURRENT_STATION, count=1)
             if not result.isError():
                 station = result.registers[0]
                 return station if station > 0 else None
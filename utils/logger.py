@@ -1,5 +1,3 @@
-import spdlog
-
 def get_logger(name="RobotLogger"):
     """
     创建并返回一个控制台日志记录器
@@ -10,4 +8,5 @@ def get_logger(name="RobotLogger"):
     Returns:
         logger: spdlog控制台日志记录器实例
     """
+    import spdlog  # 首次创建日志记录器时才加载
     return spdlog.ConsoleLogger(name)
\ No newline at end of file
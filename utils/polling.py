@@ -0,0 +1,111 @@
+import time
+from collections import namedtuple
+
+# 自适应轮询默认参数(秒)
+DEFAULT_MIN_INTERVAL = 0.05   # 命令刚发出时的轮询间隔
+DEFAULT_MAX_INTERVAL = 1.0    # 状态长时间不变时的最大轮询间隔
+DEFAULT_BACKOFF = 1.5         # 状态未变化时间隔的放大倍数
+
+PollResult = namedtuple('PollResult', ['ok', 'value', 'elapsed', 'polls'])
+PollResult.__doc__ = """
+轮询结果
+
+ok: 条件是否在超时前满足
+value: 最后一次读取到的值（读取失败时为None）
+elapsed: 等待耗时(秒)
+polls: 读取次数
+"""
+
+
+class AdaptiveInterval:
+    """
+    自适应轮询间隔
+
+    刚开始（或观测值发生变化后）以最小间隔快速轮询，观测值保持不变时按倍数退避到最大间隔，
+    既能在状态切换的瞬间及时返回，又不会在长时间稳定的状态上频繁读取。
+    """
+
+    def __init__(self, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL, backoff=DEFAULT_BACKOFF):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff = backoff
+        self.current = min_interval
+        self._last_value = None
+        self._has_value = False
+
+    def reset(self):
+        """恢复为最小间隔（例如刚发出新命令后）"""
+        self.current = self.min_interval
+
+    def next(self, value):
+        """
+        根据最新观测值返回下一次等待的间隔
+
+        Args:
+            value: 最新观测值，与上次不同时间隔重置为最小值
+        """
+        if self._has_value and value == self._last_value:
+            self.current = min(self.current * self.backoff, self.max_interval)
+        else:
+            self.current = self.min_interval
+        self._last_value = value
+        self._has_value = True
+        return self.current
+
+
+def poll_until(probe, predicate, timeout, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+               backoff=DEFAULT_BACKOFF, sleep=time.sleep):
+    """
+    自适应轮询直到条件满足或超时
+
+    Args:
+        probe: 无参可调用对象，返回当前观测值；读取失败时应返回None
+        predicate: predicate(value) 为真时停止等待（value不为None时才调用）
+        timeout: 最长等待时间(秒)，超时前至少读取一次
+        min_interval: 最小轮询间隔(秒)
+        max_interval: 最大轮询间隔(秒)
+        backoff: 观测值未变化时间隔的放大倍数
+        sleep: 等待函数，默认time.sleep
+
+    Returns:
+        PollResult: 条件满足时ok为True，value为满足条件的值
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    interval = AdaptiveInterval(min_interval, max_interval, backoff)
+    polls = 0
+    while True:
+        value = probe()
+        polls += 1
+        now = time.monotonic()
+        if value is not None and predicate(value):
+            return PollResult(True, value, now - start, polls)
+        remaining = deadline - now
+        if remaining <= 0:
+            return PollResult(False, value, now - start, polls)
+        sleep(min(interval.next(value), remaining))
+
+
+async def async_poll_until(probe, predicate, timeout, min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                           backoff=DEFAULT_BACKOFF):
+    """
+    poll_until 的协程版本，probe 为返回观测值的协程函数，等待可被取消
+
+    Returns:
+        PollResult: 同 poll_until
+    """
+    import asyncio  # 同步调用方不需要加载asyncio
+    start = time.monotonic()
+    deadline = start + timeout
+    interval = AdaptiveInterval(min_interval, max_interval, backoff)
+    polls = 0
+    while True:
+        value = await probe()
+        polls += 1
+        now = time.monotonic()
+        if value is not None and predicate(value):
+            return PollResult(True, value, now - start, polls)
+        remaining = deadline - now
+        if remaining <= 0:
+            return PollResult(False, value, now - start, polls)
+        await asyncio.sleep(min(interval.next(value), remaining))
@@ -0,0 +1,102 @@
+import math
+import time
+
+# 默认时间轮参数
+DEFAULT_TICK = 0.1     # 每个槽位的时长(秒)
+DEFAULT_SLOTS = 128    # 槽位数量，一圈覆盖 tick * slots 秒，更远的定时器跨圈存放
+
+
+class TimerWheel:
+    """
+    哈希时间轮 - 以固定精度管理大量定时器，添加/取消为O(1)，推进时只检查经过的槽位
+
+    每个定时器以键标识，同一个键只保留最后一次 schedule() 的到期时间。
+    时间轮本身不启动线程也不加锁：由持有它的线程调用 advance() 取出到期的键，
+    其他线程访问时由调用方加锁。
+
+    用法:
+        wheel = TimerWheel(tick=0.1)
+        wheel.schedule("alarm_1", 3.0)
+        ...
+        for key in wheel.advance():
+            ...
+    """
+
+    def __init__(self, tick=DEFAULT_TICK, slots=DEFAULT_SLOTS, clock=time.monotonic):
+        self.tick = tick
+        self.clock = clock
+        self._slots = [dict() for _ in range(slots)]   # 槽位 -> {键: 到期刻度}
+        self._timers = {}                              # 键 -> 到期刻度
+        self._current = self._tick_of(clock())
+
+    def _tick_of(self, timestamp):
+        return int(timestamp / self.tick)
+
+    def schedule(self, key, delay, now=None):
+        """
+        设置键的定时器（已存在时替换）
+
+        Args:
+            key: 定时器标识
+            delay: 距现在的延迟(秒)，最早在下一个刻度到期
+            now: 当前时间，默认读取时钟
+
+        Returns:
+            float: 到期时间（按刻度取整后）
+        """
+        self.cancel(key)
+        now = self.clock() if now is None else now
+        # 向上取整到刻度，定时器不会早于设定时间到期
+        due = max(math.ceil((now + delay) / self.tick), self._current + 1)
+        self._slots[due % len(self._slots)][key] = due
+        self._timers[key] = due
+        return due * self.tick
+
+    def cancel(self, key):
+        """取消键的定时器，返回是否存在"""
+        due = self._timers.pop(key, None)
+        if due is None:
+            return False
+        del self._slots[due % len(self._slots)][key]
+        return True
+
+    def advance(self, now=None):
+        """
+        推进到当前时间，返回到期的键（按到期先后排序）
+
+        Args:
+            now: 当前时间，默认读取时钟
+        """
+        target = self._tick_of(self.clock() if now is None else now)
+        if target <= self._current:
+            return []
+        # 落后超过一圈时每个槽位只需检查一次
+        ticks = range(self._current + 1, min(target, self._current + len(self._slots)) + 1)
+        self._current = target
+        expired = []
+        for tick in ticks:
+            slot = self._slots[tick % len(self._slots)]
+            for key, due in list(slot.items()):
+                if due <= target:
+                    del slot[key]
+                    del self._timers[key]
+                    expired.append((due, key))
+        expired.sort(key=lambda item: item[0])
+        return [key for _, key in expired]
+
+    def deadline(self, key):
+        """键的到期时间，不存在时返回None"""
+        due = self._timers.get(key)
+        return None if due is None else due * self.tick
+
+    def next_deadline(self):
+        """最近一个定时器的到期时间，没有定时器时返回None"""
+        if not self._timers:
+            return None
+        return min(self._timers.values()) * self.tick
+
+    def __contains__(self, key):
+        return key in self._timers
+
+    def __len__(self):
+        return len(self._timers)
@@ -0,0 +1,291 @@
+"""
+Span计时追踪 - 工作步骤、计划执行、AGV导航、Modbus事务的结构化耗时记录
+
+未启用时 trace_span() 返回空操作span，开销只有一次判断。启用后每个span结束时向文件追加一行
+Chrome Trace Event格式的完整事件（"ph": "X"，时间单位微秒），args 中包含 span_id/parent_id、
+属性和结果。文件为JSON-lines，可逐行解析；export_chrome_trace() 转换为 chrome://tracing 与
+Perfetto (ui.perfetto.dev) 可直接加载的 {"traceEvents": [...]} 文件。
+
+用法:
+    configure_tracing("trace.jsonl")
+    with trace_span("plan:PickMestick", category="plan", plan="PickMestick") as span:
+        ...
+        span.set_attribute("feedback", 10)
+        span.set_status(True)
+
+    python -m utils.tracing trace.jsonl trace.json   # 转换后在 ui.perfetto.dev 打开
+
+trace_event() 记录瞬时事件（Chrome Trace "ph": "i"），如AGV阻挡结束、报警启动。
+add_span_sink() 注册额外的接收者（如 core.cycle_history.CycleHistory），与文件同时接收结束的span和事件；
+只注册接收者而不配置文件时同样启用追踪。
+
+当前span通过 contextvars 传递：asyncio任务自动继承；线程池中执行时需用 contextvars.copy_context().run
+提交，跨线程的队列（如Modbus事务调度器）在提交时用 current_span() 取得父span并显式传入。
+"""
+import contextvars
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+_tracer = None
+_sinks = ()         # add_span_sink 注册的接收者
+_emitter = None     # 文件追踪器与接收者的合并输出，均未启用时为None
+
+
+class Span:
+    """一个计时区间"""
+
+    __slots__ = ("name", "category", "span_id", "parent_id", "attributes", "status", "start", "end", "thread_id",
+                 "instant")
+
+    def __init__(self, name, category, parent_id, attributes):
+        self.name = name
+        self.category = category
+        self.span_id = next(_span_ids)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = None
+        self.start = time.time()
+        self.end = None
+        self.thread_id = threading.get_ident()
+        self.instant = False
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_status(self, ok):
+        """设置结果：True/False，或状态字符串"""
+        self.status = ok if isinstance(ok, str) else (STATUS_OK if ok else STATUS_ERROR)
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.time()) - self.start
+
+    def to_event(self, pid):
+        """转换为Chrome Trace Event完整事件"""
+        args = {"span_id": self.span_id, "parent_id": self.parent_id, "status": self.status}
+        args.update(self.attributes)
+        event = {
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": int(self.start * 1e6),
+            "dur": int(self.duration * 1e6),
+            "pid": pid,
+            "tid": self.thread_id,
+            "args": args,
+        }
+        if self.instant:
+            event["ph"], event["s"] = "i", "t"
+            del event["dur"]
+        return event
+
+
+class _NoopSpan:
+    """追踪未启用时使用的空操作span"""
+
+    span_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_status(self, ok):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanTracer:
+    """将结束的span逐行写入JSON-lines文件"""
+
+    def __init__(self, path):
+        self.path = path
+        self.span_count = 0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def emit(self, span):
+        line = json.dumps(span.to_event(self._pid), ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.span_count += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class _FanOut:
+    """同时输出到多个接收者，单个接收者异常不影响其他接收者和被追踪的代码"""
+
+    def __init__(self, targets):
+        self.targets = targets
+
+    def emit(self, span):
+        for target in self.targets:
+            try:
+                target.emit(span)
+            except Exception as e:
+                print(f"[WARNING] span输出失败 {type(target).__name__}: {e}")
+
+
+class _ActiveSpan:
+    """trace_span() 返回的上下文管理器"""
+
+    __slots__ = ("_tracer", "_span", "_token")
+
+    def __init__(self, tracer, span):
+        self._tracer = tracer
+        self._span = span
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        span = self._span
+        span.end = time.time()
+        if exc_type is not None:
+            span.status = STATUS_ERROR
+            span.attributes["error"] = f"{exc_type.__name__}: {exc_val}"
+        elif span.status is None:
+            span.status = STATUS_OK
+        _current_span.reset(self._token)
+        self._tracer.emit(span)
+        return False
+
+
+def configure_tracing(path):
+    """
+    启用追踪，span写入 path（追加）；path为None时关闭追踪
+
+    Returns:
+        SpanTracer: 当前追踪器（关闭时为None）
+    """
+    global _tracer
+    previous, _tracer = _tracer, (SpanTracer(path) if path else None)
+    _refresh_emitter()
+    if previous is not None:
+        previous.close()
+    return _tracer
+
+
+def add_span_sink(sink):
+    """注册接收者，sink.emit(span) 在每个span结束和每个事件记录时调用（在产生span的线程中）"""
+    global _sinks
+    _sinks = _sinks + (sink,)
+    _refresh_emitter()
+
+
+def remove_span_sink(sink):
+    global _sinks
+    _sinks = tuple(existing for existing in _sinks if existing is not sink)
+    _refresh_emitter()
+
+
+def _refresh_emitter():
+    global _emitter
+    targets = ([_tracer] if _tracer is not None else []) + list(_sinks)
+    if not targets:
+        _emitter = None
+    elif len(targets) == 1 and _tracer is not None:
+        _emitter = _tracer
+    else:
+        _emitter = _FanOut(targets)
+
+
+def get_tracer():
+    return _tracer
+
+
+def tracing_enabled():
+    return _emitter is not None
+
+
+def current_span():
+    """当前上下文中的span（未启用或不在span内时为None）"""
+    return _current_span.get()
+
+
+def trace_span(name, category="", parent=None, **attributes):
+    """
+    创建span上下文管理器
+
+    Args:
+        name: span名称
+        category: 分类（workflow/plan/agv/modbus）
+        parent: 显式指定父span（跨线程传递时使用），默认为当前上下文中的span
+        **attributes: 属性，结束前可通过 span.set_attribute() 补充
+
+    Returns:
+        上下文管理器，with 语句得到span；退出时记录结束时间，异常时结果为error
+    """
+    emitter = _emitter
+    if emitter is None:
+        return NOOP_SPAN
+    parent = parent if parent is not None else _current_span.get()
+    return _ActiveSpan(emitter, Span(name, category, parent.span_id if parent is not None else None, attributes))
+
+
+def trace_event(name, category="", parent=None, **attributes):
+    """
+    记录瞬时事件（未启用时无操作）
+
+    Args:
+        name: 事件名称
+        category: 分类
+        parent: 显式指定父span，默认为当前上下文中的span
+        **attributes: 属性
+    """
+    emitter = _emitter
+    if emitter is None:
+        return
+    parent = parent if parent is not None else _current_span.get()
+    span = Span(name, category, parent.span_id if parent is not None else None, attributes)
+    span.end = span.start
+    span.instant = True
+    span.status = STATUS_OK
+    emitter.emit(span)
+
+
+def export_chrome_trace(jsonl_path, output_path):
+    """将JSON-lines追踪文件转换为 chrome://tracing / Perfetto 可加载的JSON，返回事件数"""
+    events = []
+    with open(jsonl_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                events.append(json.loads(line))
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+    return len(events)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("用法: python -m utils.tracing <trace.jsonl> <trace.json>")
+        sys.exit(1)
+    count = export_chrome_trace(sys.argv[1], sys.argv[2])
+    print(f"[INFO] 已转换 {count} 个span: {sys.argv[2]}")